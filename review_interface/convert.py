@@ -0,0 +1,64 @@
+"""
+Conversão de lotes de revisão entre CSV e Parquet.
+Permite que revisores editem em planilhas (CSV) lotes armazenados em Parquet
+e devolvam o resultado em Parquet, com os tipos das colunas preservados.
+
+Uso:
+    python -m review_interface.convert review_batches/lote.parquet   # gera lote.csv
+    python -m review_interface.convert review_batches/lote.csv       # gera lote.parquet
+"""
+
+import argparse
+import os
+from typing import Optional
+
+from review_interface.export_batch import _export_to_csv, _export_to_parquet
+from review_interface.import_review import iter_review_file
+
+
+def convert_review_file(source: str, destination: Optional[str] = None, compress: bool = False) -> str:
+    """
+    Converte um lote de revisão de CSV para Parquet ou de Parquet para CSV.
+    Os produtos são lidos e escritos em streaming.
+
+    Args:
+        source: Arquivo de origem (.csv, .csv.gz ou .parquet)
+        destination: Arquivo de destino (padrão: origem com a outra extensão)
+        compress: Se True, comprime o destino (gzip no CSV, zstd no Parquet)
+
+    Returns:
+        str: Caminho do arquivo convertido
+    """
+    to_parquet = not source.lower().endswith('.parquet')
+    if not destination:
+        base = source[:-3] if source.lower().endswith('.gz') else source
+        base = os.path.splitext(base)[0]
+        destination = base + ('.parquet' if to_parquet else '.csv' + ('.gz' if compress else ''))
+
+    # Escrever em arquivo temporário e renomear, como em export_batch
+    tmp_path = destination + ".tmp"
+    try:
+        if to_parquet:
+            _export_to_parquet(iter_review_file(source), tmp_path, compress)
+        else:
+            _export_to_csv(iter_review_file(source), tmp_path, compress)
+        os.replace(tmp_path, destination)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return destination
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte lotes de revisão entre CSV e Parquet")
+    parser.add_argument("source", help="Arquivo .csv, .csv.gz ou .parquet")
+    parser.add_argument("destination", nargs="?", default=None, help="Arquivo de destino (opcional)")
+    parser.add_argument("--compress", action="store_true", help="Comprime o destino (gzip no CSV, zstd no Parquet)")
+    args = parser.parse_args()
+
+    print(f"Lote convertido: {convert_review_file(args.source, args.destination, args.compress)}")
+
+
+if __name__ == "__main__":
+    main()
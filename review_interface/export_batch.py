@@ -1,27 +1,74 @@
 """
 Módulo para exportação de lotes de produtos para revisão humana.
 Fornece funções para exportar produtos para formatos como CSV ou JSON.
+A exportação é feita em streaming: os produtos podem vir de qualquer iterável
+(lista, gerador, cursor do banco) e são divididos em arquivos de até
+max_batch_size produtos, escritos em paralelo e opcionalmente comprimidos com gzip.
+O formato Parquet (colunas tipadas) requer o pacote opcional pyarrow.
 """
 
 import csv
+import gzip
+import itertools
 import json
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
+from dotenv import load_dotenv
 
-def export_batch(products: List[Dict[str, Any]], 
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Lotes escritos simultaneamente por export_for_review
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "4"))
+# Nível de compressão gzip (1 = mais rápido, 9 = menor arquivo)
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+# Linhas por row group nos arquivos Parquet
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "10000"))
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional; sem ele o formato parquet fica indisponível
+    pa = None
+    pq = None
+
+# Campos exportados no CSV
+CSV_FIELDS = [
+    "id", "title", "description", "price", "sale_price", 
+    "category", "brand", "product_url", "affiliate_url", 
+    "image_url", "platform", "rank", "prescore", "score", "approved"
+]
+
+# Tipos das colunas no Parquet (mesmos campos do CSV). O id fica como texto:
+# ids externos (ex.: SKU-1) e inteiros grandes voltam exatamente como saíram
+PARQUET_COLUMNS = {
+    "id": "string", "title": "string", "description": "string", "price": "float64",
+    "sale_price": "float64", "category": "string", "brand": "string", "product_url": "string",
+    "affiliate_url": "string", "image_url": "string", "platform": "string", "rank": "int64",
+    "prescore": "float64", "score": "float64", "approved": "bool"
+}
+
+TRUE_VALUES = ('true', 'yes', 'sim', '1', 'verdadeiro')
+FALSE_VALUES = ('false', 'no', 'não', '0', 'falso')
+
+
+def export_batch(products: Iterable[Dict[str, Any]], 
                 format: str = "csv", 
                 output_dir: str = "./review_batches",
-                batch_name: Optional[str] = None) -> str:
+                batch_name: Optional[str] = None,
+                compress: bool = False) -> str:
     """
     Exporta um lote de produtos para revisão humana.
     
     Args:
-        products: Lista de produtos a serem exportados
-        format: Formato de exportação ('csv' ou 'json')
+        products: Produtos a serem exportados (qualquer iterável)
+        format: Formato de exportação ('csv', 'json' ou 'parquet')
         output_dir: Diretório de saída
         batch_name: Nome do lote (opcional)
+        compress: Se True, comprime o arquivo com gzip (.csv.gz / .json.gz); no Parquet usa zstd
         
     Returns:
         str: Caminho do arquivo exportado
@@ -35,99 +82,204 @@ def export_batch(products: List[Dict[str, Any]],
         batch_name = f"batch_{timestamp}"
     
     # Determinar caminho do arquivo
-    if format.lower() == "json":
-        file_path = os.path.join(output_dir, f"{batch_name}.json")
-        _export_to_json(products, file_path)
-    else:  # csv é o padrão
-        file_path = os.path.join(output_dir, f"{batch_name}.csv")
-        _export_to_csv(products, file_path)
+    extension = format.lower() if format.lower() in ("json", "parquet") else "csv"  # csv é o padrão
+    if extension == "parquet":
+        # Parquet já é comprimido internamente; compress troca snappy por zstd
+        file_path = os.path.join(output_dir, f"{batch_name}.parquet")
+    else:
+        file_path = os.path.join(output_dir, f"{batch_name}.{extension}" + (".gz" if compress else ""))
+    
+    # Escrever em arquivo temporário e renomear, para que a importação nunca leia um lote incompleto
+    tmp_path = file_path + ".tmp"
+    try:
+        if extension == "json":
+            _export_to_json(products, tmp_path, compress)
+        elif extension == "parquet":
+            _export_to_parquet(products, tmp_path, compress)
+        else:
+            _export_to_csv(products, tmp_path, compress)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
     
     return file_path
 
-def _export_to_csv(products: List[Dict[str, Any]], file_path: str) -> None:
+def _open_output(file_path: str, compress: bool):
+    """Abre o arquivo de saída em modo texto, com ou sem gzip."""
+    if compress:
+        return gzip.open(file_path, 'wt', newline='', encoding='utf-8', compresslevel=EXPORT_GZIP_LEVEL)
+    return open(file_path, 'w', newline='', encoding='utf-8')
+
+def _with_approval(products: Iterable[Dict[str, Any]], default: Any) -> Iterator[Dict[str, Any]]:
+    """Acrescenta o campo de aprovação em cópias dos produtos, sem alterar os originais."""
+    for product in products:
+        if "approved" in product:
+            yield product
+        else:
+            yield {**product, "approved": default}  # Campo a ser preenchido na revisão
+
+def _export_to_csv(products: Iterable[Dict[str, Any]], file_path: str, compress: bool = False) -> None:
     """
     Exporta produtos para formato CSV.
     
     Args:
-        products: Lista de produtos
+        products: Produtos (qualquer iterável)
         file_path: Caminho do arquivo de saída
+        compress: Se True, comprime com gzip
     """
-    # Definir campos a serem exportados
-    fields = [
-        "id", "title", "description", "price", "sale_price", 
-        "category", "brand", "product_url", "affiliate_url", 
-        "image_url", "platform", "rank", "score", "approved"
-    ]
-    
-    # Adicionar campo de aprovação para revisão
-    for product in products:
-        if "approved" not in product:
-            product["approved"] = ""  # Campo a ser preenchido na revisão
-    
     # Escrever arquivo CSV
-    with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fields, extrasaction='ignore')
+    with _open_output(file_path, compress) as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS, extrasaction='ignore')
         writer.writeheader()
-        for product in products:
-            writer.writerow(product)
+        writer.writerows(_with_approval(products, ""))
 
-def _export_to_json(products: List[Dict[str, Any]], file_path: str) -> None:
+def _export_to_json(products: Iterable[Dict[str, Any]], file_path: str, compress: bool = False) -> None:
     """
     Exporta produtos para formato JSON.
+    Os produtos são escritos um a um, sem montar a lista inteira em memória.
     
     Args:
-        products: Lista de produtos
+        products: Produtos (qualquer iterável)
         file_path: Caminho do arquivo de saída
+        compress: Se True, comprime com gzip
     """
-    # Adicionar campo de aprovação para revisão
-    for product in products:
-        if "approved" not in product:
-            product["approved"] = None  # Campo a ser preenchido na revisão
-    
     # Escrever arquivo JSON
-    with open(file_path, 'w', encoding='utf-8') as jsonfile:
-        json.dump(products, jsonfile, ensure_ascii=False, indent=2)
+    with _open_output(file_path, compress) as jsonfile:
+        jsonfile.write("[")
+        for index, product in enumerate(_with_approval(products, None)):
+            item = json.dumps(product, ensure_ascii=False, indent=2, default=str)
+            jsonfile.write(("," if index else "") + "\n  " + item.replace("\n", "\n  "))
+        jsonfile.write("\n]\n")
 
-def export_for_review(products: List[Dict[str, Any]], 
+def _parquet_value(kind: str, value: Any) -> Any:
+    """
+    Converte um valor para o tipo da coluna Parquet.
+    
+    Args:
+        kind: Tipo da coluna (PARQUET_COLUMNS)
+        value: Valor do produto
+        
+    Returns:
+        Any: Valor convertido, ou None se vazio
+        
+    Raises:
+        ValueError: Se o valor não puder ser convertido para o tipo da coluna
+    """
+    if value is None or value == "":
+        return None
+    try:
+        if kind == "int64":
+            if isinstance(value, float):
+                if not value.is_integer():
+                    raise ValueError
+                return int(value)
+            return int(str(value).strip())
+        if kind == "float64":
+            return float(value)
+        if kind == "bool":
+            if isinstance(value, bool):
+                return value
+            text = str(value).lower().strip()
+            if text in TRUE_VALUES:
+                return True
+            if text in FALSE_VALUES:
+                return False
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError(f"Valor inválido para coluna {kind}: {value!r}") from None
+    return str(value)
+
+def _export_to_parquet(products: Iterable[Dict[str, Any]], file_path: str, compress: bool = False) -> None:
+    """
+    Exporta produtos para formato Parquet, com colunas tipadas (PARQUET_COLUMNS).
+    Os produtos são escritos em row groups de PARQUET_ROW_GROUP_SIZE linhas.
+    
+    Args:
+        products: Produtos (qualquer iterável)
+        file_path: Caminho do arquivo de saída
+        compress: Se True, usa zstd em vez de snappy
+    """
+    if pa is None:
+        raise ImportError("O formato parquet requer o pacote pyarrow (pip install pyarrow)")
+    
+    schema = pa.schema([(field, pa.type_for_alias(kind)) for field, kind in PARQUET_COLUMNS.items()])
+    with pq.ParquetWriter(file_path, schema, compression="zstd" if compress else "snappy") as writer:
+        for chunk in _chunks(_with_approval(products, None), PARQUET_ROW_GROUP_SIZE):
+            try:
+                columns = {
+                    field: [_parquet_value(kind, product.get(field)) for product in chunk]
+                    for field, kind in PARQUET_COLUMNS.items()
+                }
+            except ValueError as e:
+                raise ValueError(f"Produto não exportável para Parquet: {e}") from e
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+
+def _chunks(products: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Divide o iterável em listas de até `size` produtos, consumindo-o sob demanda."""
+    iterator = iter(products)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def export_for_review(products: Iterable[Dict[str, Any]], 
                      format: str = "csv", 
                      output_dir: str = "./review_batches",
                      batch_name: Optional[str] = None,
-                     max_batch_size: int = 100) -> List[str]:
+                     max_batch_size: int = 100,
+                     compress: bool = False,
+                     max_workers: int = EXPORT_WORKERS) -> List[str]:
     """
     Função principal para exportar produtos para revisão humana.
-    Divide em múltiplos lotes se necessário.
+    Divide em múltiplos lotes se necessário. Os produtos são consumidos sob
+    demanda: no máximo max_workers lotes ficam em memória ao mesmo tempo,
+    qualquer que seja o total exportado.
     
     Args:
-        products: Lista de produtos a serem exportados
-        format: Formato de exportação ('csv' ou 'json')
+        products: Produtos a serem exportados (lista, gerador ou cursor)
+        format: Formato de exportação ('csv', 'json' ou 'parquet')
         output_dir: Diretório de saída
         batch_name: Prefixo do nome do lote (opcional)
         max_batch_size: Tamanho máximo de cada lote
+        compress: Se True, comprime os lotes com gzip
+        max_workers: Lotes escritos em paralelo
         
     Returns:
-        List[str]: Lista de caminhos dos arquivos exportados
+        List[str]: Lista de caminhos dos arquivos exportados, na ordem dos produtos
     """
     # Gerar prefixo do lote se não fornecido
     if not batch_name:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         batch_name = f"batch_{timestamp}"
     
-    # Dividir em lotes se necessário
-    batch_files = []
+    chunks = _chunks(products, max_batch_size)
+    first = next(chunks, None)
+    if first is None:
+        return []
+    second = next(chunks, None)
     
-    if len(products) <= max_batch_size:
-        # Exportar como um único lote
-        file_path = export_batch(products, format, output_dir, batch_name)
-        batch_files.append(file_path)
-    else:
-        # Dividir em múltiplos lotes
-        for i in range(0, len(products), max_batch_size):
-            batch_products = products[i:i+max_batch_size]
-            batch_file_name = f"{batch_name}_part{i//max_batch_size + 1}"
-            file_path = export_batch(batch_products, format, output_dir, batch_file_name)
-            batch_files.append(file_path)
-    
-    return batch_files
+    # Exportar como um único lote
+    if second is None:
+        return [export_batch(first, format, output_dir, batch_name, compress)]
+    
+    # Dividir em múltiplos lotes, escritos em paralelo com no máximo max_workers pendentes
+    batch_files: Dict[int, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = {}
+        for part, chunk in enumerate(itertools.chain([first, second], chunks), start=1):
+            while len(pending) >= max(1, max_workers):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_files[pending.pop(future)] = future.result()
+            batch_file_name = f"{batch_name}_part{part}"
+            future = executor.submit(export_batch, chunk, format, output_dir, batch_file_name, compress)
+            pending[future] = part
+        for future in pending:
+            batch_files[pending[future]] = future.result()
+    
+    return [batch_files[part] for part in sorted(batch_files)]
 
 
 # Exemplo de uso
@@ -1,32 +1,118 @@
 """
 Módulo para importação de revisões humanas de produtos.
-Fornece funções para importar produtos revisados de formatos como CSV ou JSON.
+Fornece funções para importar produtos revisados de formatos como CSV, JSON ou
+Parquet (este último requer o pacote opcional pyarrow). A importação incremental registra os arquivos já processados em um manifesto
+SQLite (caminho, tamanho, mtime, hash e status) e só lê arquivos novos ou alterados.
 """
 
 import csv
+import gzip
+import hashlib
 import json
 import os
+import sqlite3
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from dotenv import load_dotenv
 
-def import_review_file(file_path: str) -> List[Dict[str, Any]]:
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Manifesto da importação incremental (padrão: <review_dir>/.import_manifest.sqlite3)
+REVIEW_MANIFEST_PATH = os.getenv("REVIEW_MANIFEST_PATH")
+
+# Extensões dos lotes de revisão (exportados por export_batch, com ou sem gzip)
+REVIEW_EXTENSIONS = ('.csv', '.json', '.csv.gz', '.json.gz', '.parquet')
+
+# Caracteres lidos por vez dos lotes JSON
+JSON_READ_SIZE = 64 * 1024
+
+try:
+    import pyarrow.dataset as ds
+except ImportError:  # pyarrow é opcional; sem ele arquivos parquet não são lidos
+    ds = None
+
+
+def import_review_file(file_path: str,
+                       columns: Optional[List[str]] = None,
+                       only_approved: bool = False) -> List[Dict[str, Any]]:
     """
     Importa um arquivo de revisão de produtos.
     
     Args:
         file_path: Caminho do arquivo a ser importado
+        columns: Campos retornados (opcional; no Parquet só essas colunas são lidas)
+        only_approved: Se True, retorna apenas produtos aprovados (no Parquet o filtro é aplicado na leitura)
         
     Returns:
         List[Dict[str, Any]]: Lista de produtos revisados
     """
-    # Determinar formato com base na extensão
-    if file_path.lower().endswith('.json'):
-        return _import_from_json(file_path)
-    elif file_path.lower().endswith('.csv'):
-        return _import_from_csv(file_path)
+    return list(iter_review_file(file_path, columns, only_approved))
+
+def iter_review_file(file_path: str,
+                     columns: Optional[List[str]] = None,
+                     only_approved: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Itera sobre os produtos de um arquivo de revisão sem montar a lista
+    (CSV linha a linha, JSON produto a produto, Parquet por row group).
+    
+    Args:
+        file_path: Caminho do arquivo a ser importado
+        columns: Campos retornados (opcional)
+        only_approved: Se True, produz apenas produtos aprovados
+        
+    Returns:
+        Iterator[Dict[str, Any]]: Produtos revisados
+    """
+    # Determinar formato com base na extensão (lotes .gz são lidos descomprimindo)
+    name = file_path.lower()
+    if name.endswith('.parquet'):
+        return _iter_parquet(file_path, columns, only_approved)
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.json'):
+        products = _iter_json(file_path)
+    elif name.endswith('.csv'):
+        products = _iter_csv(file_path)
     else:
         raise ValueError(f"Formato de arquivo não suportado: {file_path}")
+    
+    if only_approved:
+        products = (p for p in products if p.get('approved') is True)
+    if columns:
+        products = ({field: p.get(field) for field in columns} for p in products)
+    return products
+
+def _iter_parquet(file_path: str,
+                  columns: Optional[List[str]] = None,
+                  only_approved: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Lê os produtos de um arquivo Parquet lendo só as colunas pedidas e
+    filtrando approved == True na varredura (row groups sem aprovados são pulados).
+    
+    Args:
+        file_path: Caminho do arquivo Parquet
+        columns: Colunas lidas (padrão: todas)
+        only_approved: Se True, produz apenas produtos aprovados
+        
+    Returns:
+        Iterator[Dict[str, Any]]: Produtos revisados, com os tipos das colunas
+    """
+    if ds is None:
+        raise ImportError("O formato parquet requer o pacote pyarrow (pip install pyarrow)")
+    
+    dataset = ds.dataset(file_path, format="parquet")
+    approved_filter = (ds.field('approved') == True) if only_approved else None  # noqa: E712
+    for batch in dataset.to_batches(columns=columns, filter=approved_filter):
+        yield from batch.to_pylist()
+
+def _open_input(file_path: str):
+    """Abre o arquivo de revisão em modo texto, com ou sem gzip."""
+    if file_path.lower().endswith('.gz'):
+        return gzip.open(file_path, 'rt', newline='', encoding='utf-8')
+    return open(file_path, 'r', newline='', encoding='utf-8')
 
 def _import_from_csv(file_path: str) -> List[Dict[str, Any]]:
     """
@@ -38,13 +124,23 @@ def _import_from_csv(file_path: str) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: Lista de produtos revisados
     """
-    products = []
+    return list(_iter_csv(file_path))
+
+def _iter_csv(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lê os produtos de um arquivo CSV, uma linha por vez.
     
-    with open(file_path, 'r', newline='', encoding='utf-8') as csvfile:
+    Args:
+        file_path: Caminho do arquivo CSV
+        
+    Returns:
+        Iterator[Dict[str, Any]]: Produtos revisados
+    """
+    with _open_input(file_path) as csvfile:
         reader = csv.DictReader(csvfile)
         for row in reader:
             # Converter campos numéricos
-            for field in ['price', 'sale_price', 'score']:
+            for field in ['price', 'sale_price', 'prescore', 'score']:
                 if field in row and row[field]:
                     try:
                         row[field] = float(row[field])
@@ -53,7 +149,7 @@ def _import_from_csv(file_path: str) -> List[Dict[str, Any]]:
             
             # Converter campo de aprovação para booleano
             if 'approved' in row:
-                approved_value = row['approved'].lower().strip()
+                approved_value = (row['approved'] or '').lower().strip()
                 if approved_value in ['true', 'yes', 'sim', '1', 'verdadeiro']:
                     row['approved'] = True
                 elif approved_value in ['false', 'no', 'não', '0', 'falso']:
@@ -61,9 +157,7 @@ def _import_from_csv(file_path: str) -> List[Dict[str, Any]]:
                 else:
                     row['approved'] = None
             
-            products.append(row)
-    
-    return products
+            yield row
 
 def _import_from_json(file_path: str) -> List[Dict[str, Any]]:
     """
@@ -75,10 +169,49 @@ def _import_from_json(file_path: str) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: Lista de produtos revisados
     """
-    with open(file_path, 'r', encoding='utf-8') as jsonfile:
-        products = json.load(jsonfile)
+    return list(_iter_json(file_path))
+
+def _iter_json(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lê os produtos de um arquivo JSON (lista de objetos) sem carregar o
+    arquivo inteiro: cada produto é decodificado assim que está completo.
     
-    return products
+    Args:
+        file_path: Caminho do arquivo JSON
+        
+    Returns:
+        Iterator[Dict[str, Any]]: Produtos revisados
+        
+    Raises:
+        ValueError: Se o arquivo não for uma lista JSON ou estiver truncado
+    """
+    decoder = json.JSONDecoder()
+    with _open_input(file_path) as jsonfile:
+        buffer = jsonfile.read(JSON_READ_SIZE).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"O lote JSON deve ser uma lista de produtos: {file_path}")
+        position = 1
+        while True:
+            # Pular separadores, lendo mais do arquivo quando o buffer acaba
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                buffer, position = jsonfile.read(JSON_READ_SIZE), 0
+                if not buffer:
+                    raise ValueError(f"Lote JSON truncado: {file_path}")
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                product, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Produto incompleto no buffer: ler mais e tentar de novo
+                chunk = jsonfile.read(JSON_READ_SIZE)
+                if not chunk:
+                    raise
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield product
 
 def import_reviewed_products(file_paths: List[str] = None, 
                             review_dir: str = "./review_batches",
@@ -102,10 +235,7 @@ def import_reviewed_products(file_paths: List[str] = None,
             return []
         
         # Buscar arquivos CSV e JSON no diretório
-        file_paths = []
-        for file in os.listdir(review_dir):
-            if file.lower().endswith(('.csv', '.json')):
-                file_paths.append(os.path.join(review_dir, file))
+        file_paths = [entry.path for entry in _list_review_files(review_dir)]
     
     # Importar cada arquivo
     for file_path in file_paths:
@@ -121,6 +251,13 @@ def import_reviewed_products(file_paths: List[str] = None,
     
     return all_products
 
+def _list_review_files(review_dir: str) -> Iterator[os.DirEntry]:
+    """Lista os lotes de revisão do diretório (entradas do scandir, com stat em cache)."""
+    with os.scandir(review_dir) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(REVIEW_EXTENSIONS) and entry.is_file():
+                yield entry
+
 def get_latest_review_batch(review_dir: str = "./review_batches") -> Optional[str]:
     """
     Obtém o lote de revisão mais recente.
@@ -134,18 +271,199 @@ def get_latest_review_batch(review_dir: str = "./review_batches") -> Optional[st
     if not os.path.exists(review_dir):
         return None
     
-    # Buscar arquivos CSV e JSON no diretório
-    files = []
-    for file in os.listdir(review_dir):
-        if file.lower().endswith(('.csv', '.json')):
-            file_path = os.path.join(review_dir, file)
-            files.append((file_path, os.path.getmtime(file_path)))
+    # Uma única passagem pelo diretório, guardando só o mais recente
+    latest = max(_list_review_files(review_dir), key=lambda entry: entry.stat().st_mtime_ns, default=None)
+    return latest.path if latest else None
+
+
+class ReviewManifest:
+    """
+    Manifesto SQLite dos arquivos de revisão já importados.
+    Um arquivo é considerado alterado quando tamanho ou mtime mudam e o hash
+    do conteúdo também; só então é lido de novo. Arquivos cuja importação
+    falhou são sempre tentados de novo, e o escopo da importação ("all" ou
+    "approved") é registrado: um arquivo lido só com os aprovados volta a ser
+    lido por uma importação de todas as linhas.
+    """
+
+    def __init__(self, path: str):
+        """
+        Abre (ou cria) o manifesto.
+        
+        Args:
+            path: Caminho do arquivo SQLite
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS review_files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                rows INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                scope TEXT NOT NULL DEFAULT 'all',
+                imported_at REAL NOT NULL
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(review_files)")}
+        if "scope" not in columns:
+            # Manifestos criados antes do registro do escopo
+            self._conn.execute("ALTER TABLE review_files ADD COLUMN scope TEXT NOT NULL DEFAULT 'all'")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """SHA-256 do conteúdo do arquivo, lido em blocos."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, file_path: str) -> Optional[Tuple[int, int, str, str, str]]:
+        """Retorna (size, mtime_ns, content_hash, status, scope) do arquivo, ou None se nunca foi visto."""
+        return self._conn.execute(
+            "SELECT size, mtime_ns, content_hash, status, scope FROM review_files WHERE path = ?", (file_path,)
+        ).fetchone()
+
+    def record(self, file_path: str, size: int, mtime_ns: int, content_hash: str,
+               status: str, rows: int = 0, error: Optional[str] = None, scope: str = "all") -> None:
+        """Registra o resultado da importação do arquivo."""
+        self._conn.execute(
+            """
+            INSERT INTO review_files (path, size, mtime_ns, content_hash, status, rows, error, scope, imported_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                size = excluded.size, mtime_ns = excluded.mtime_ns, content_hash = excluded.content_hash,
+                status = excluded.status, rows = excluded.rows, error = excluded.error,
+                scope = excluded.scope, imported_at = excluded.imported_at
+            """,
+            (file_path, size, mtime_ns, content_hash, status, rows, error, scope, time.time())
+        )
+        self._conn.commit()
+
+    def changed(self, file_path: str, stat: os.stat_result, scope: str = "all") -> Optional[str]:
+        """
+        Verifica se o arquivo precisa ser importado.
+        
+        Args:
+            file_path: Caminho do arquivo
+            stat: Resultado do stat do arquivo
+            scope: Escopo pedido ("all" ou "approved")
+            
+        Returns:
+            Optional[str]: Hash do conteúdo se o arquivo precisa ser lido, senão None
+        """
+        known = self.get(file_path)
+        # Falhas são tentadas de novo e uma importação parcial não cobre a completa
+        if known and (known[3] != "imported" or (known[4] == "approved" and scope == "all")):
+            return self.file_hash(file_path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return None
+        content_hash = self.file_hash(file_path)
+        if known and known[2] == content_hash:
+            # Só o mtime mudou (ex.: arquivo copiado ou tocado); atualizar sem ler de novo
+            self._conn.execute(
+                "UPDATE review_files SET size = ?, mtime_ns = ? WHERE path = ?",
+                (stat.st_size, stat.st_mtime_ns, file_path)
+            )
+            self._conn.commit()
+            return None
+        return content_hash
+
+
+def iter_review_delta(review_dir: str = "./review_batches",
+                      file_paths: Optional[Iterable[str]] = None,
+                      only_approved: bool = False,
+                      manifest_path: Optional[str] = None,
+                      stats: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Itera sobre os produtos dos arquivos de revisão novos ou alterados desde a
+    última importação. Cada arquivo é lido por completo antes de produzir a
+    primeira linha: um arquivo que falha no meio não entrega linhas, e a nova
+    tentativa na próxima chamada não as duplica. A memória fica limitada ao
+    maior arquivo (um lote de export_for_review), não ao total importado.
+    Cada arquivo é marcado como importado no manifesto depois que todas as
+    suas linhas foram consumidas; se a iteração for interrompida, o arquivo
+    volta na próxima chamada.
     
-    # Ordenar por data de modificação (mais recente primeiro)
-    files.sort(key=lambda x: x[1], reverse=True)
+    Args:
+        review_dir: Diretório de revisão
+        file_paths: Arquivos a verificar (padrão: todos os lotes do diretório)
+        only_approved: Se True, produz apenas produtos aprovados
+        manifest_path: Caminho do manifesto (padrão: REVIEW_MANIFEST_PATH ou <review_dir>/.import_manifest.sqlite3)
+        stats: Dicionário preenchido com files, rows, unchanged e failed
+        
+    Returns:
+        Iterator[Dict[str, Any]]: Produtos revisados, com o campo review_file
+    """
+    stats = stats if stats is not None else {}
+    stats.update(files=[], rows=0, unchanged=0, failed={})
+    if file_paths is None:
+        if not os.path.exists(review_dir):
+            return
+        candidates = [(entry.path, entry.stat()) for entry in _list_review_files(review_dir)]
+    else:
+        candidates = [(path, os.stat(path)) for path in file_paths]
     
-    # Retornar o mais recente ou None se não houver
-    return files[0][0] if files else None
+    scope = "approved" if only_approved else "all"
+    manifest = ReviewManifest(manifest_path or REVIEW_MANIFEST_PATH
+                              or os.path.join(review_dir, ".import_manifest.sqlite3"))
+    try:
+        # Arquivos mais antigos primeiro, para que revisões posteriores prevaleçam
+        for file_path, stat in sorted(candidates, key=lambda item: item[1].st_mtime_ns):
+            content_hash = manifest.changed(file_path, stat, scope)
+            if content_hash is None:
+                stats["unchanged"] += 1
+                continue
+            
+            try:
+                products = list(iter_review_file(file_path, only_approved=only_approved))
+            except Exception as e:
+                print(f"Erro ao importar arquivo {file_path}: {e}")
+                manifest.record(file_path, stat.st_size, stat.st_mtime_ns, content_hash, "failed", 0, str(e), scope)
+                stats["failed"][file_path] = str(e)
+                continue
+            
+            for product in products:
+                product['review_file'] = file_path
+                yield product
+            manifest.record(file_path, stat.st_size, stat.st_mtime_ns, content_hash, "imported", len(products), scope=scope)
+            stats["files"].append(file_path)
+            stats["rows"] += len(products)
+    finally:
+        manifest.close()
+
+def import_review_delta(review_dir: str = "./review_batches",
+                        only_approved: bool = False,
+                        manifest_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Importa apenas os arquivos de revisão novos ou alterados (ver iter_review_delta).
+    
+    Args:
+        review_dir: Diretório de revisão
+        only_approved: Se True, retorna apenas produtos aprovados
+        manifest_path: Caminho do manifesto (opcional)
+        
+    Returns:
+        Dict[str, Any]: products (delta), files (arquivos lidos), rows, unchanged e failed
+    """
+    stats: Dict[str, Any] = {}
+    products = list(iter_review_delta(review_dir, only_approved=only_approved,
+                                      manifest_path=manifest_path, stats=stats))
+    return {"products": products, **stats}
 
 
 # Exemplo de uso
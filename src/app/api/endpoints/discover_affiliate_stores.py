@@ -4,30 +4,22 @@ import os
 
 from typing import Any, Dict, List
 
-from crewai_tools import SerperDevTool, WebsiteSearchTool
 from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from src.app.db.session import get_db
+from src.app.discovery_cache import DISCOVERY_CACHE_TTL, request_key
 from src.app.models.affiliate_store import AffiliateStore
+from src.app.repositories.job_repository import JobRepository
 from src.app.schemas.affiliate_store import AffiliateStoreInDB
-from src.crews.store_selection_crew import ResearchStores
-from src.utils.MyLLM import MyLLM
+from src.app.schemas.job import JobCreated
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
 router = APIRouter()
 
-# Inicializar ferramentas necessárias
-scraper_tool = SerperDevTool()
-scraper_tool.n_results = 20
-web_rag_tool = WebsiteSearchTool()
-
-# Definir modelo de linguagem
-llm = MyLLM.GTP4o_mini
-
 # def _to_plain_text(result: Union[str, "CrewOutput"]) -> str:
 #     """
 #     Garante que o resultado vindo da Crew seja texto.
@@ -63,53 +55,36 @@ llm = MyLLM.GTP4o_mini
 #     return stores
 
 
-@router.post("/discover", response_model=Dict[str, Any])
+@router.post("/discover", response_model=JobCreated, status_code=202)
 def discover_stores(
     country: str,
     niche: str,
     period: str,
+    force_refresh: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Endpoint para descobrir lojas de afiliados com base no país, nicho e período.
-    Utiliza CrewAI para realizar a pesquisa e salva os resultados no banco de dados.
+    Enfileira a pesquisa CrewAI e retorna imediatamente o ID do job; o worker
+    (python -m src.worker) executa a pesquisa e o status/resultado ficam em GET /jobs/{id}.
+    Requisições idênticas reutilizam o job em andamento ou o resultado recente
+    (até DISCOVERY_CACHE_TTL), exceto com force_refresh.
     """
     try:
-        inputs = {"country": country, "period": period, "niche": niche}
-
-        research_stores = ResearchStores()
-        selection_crew = research_stores.store_selection_crew()
-        
-        raw_output = selection_crew.kickoff(inputs=inputs)
-        print(f'raw_output: {raw_output}')
-        # stores_data = _normalize_crew_output(raw_output)
-        # plain_text = _to_plain_text(stores_data)
-
-        # repo = AffiliateStoreRepository(db)
-        # created_stores = repo.bulk_create_from_crew_results(plain_text)
-
-        # print(f"[Discover_affiliate_atores.py] CREATED STORES: {plain_text}")
-
-        # return {
-        #     "status": "success",
-        #     "raw_result": plain_text,
-        #     "stores_created": len(created_stores),
-        #     "stores": [
-        #         {
-        #             "id": s.id,
-        #             "name": s.name,
-        #             "platform": s.platform,
-        #             "active": s.active,
-        #             "created_at": s.created_at,
-        #         }
-        #         for s in created_stores
-        #     ],
-        # }
+        params = {"country": country, "period": period, "niche": niche}
+        job, source = JobRepository(db).enqueue_once(
+            "discover_stores",
+            params,
+            dedupe_key=request_key("discover_stores", params),
+            ttl_seconds=DISCOVERY_CACHE_TTL,
+            force_refresh=force_refresh
+        )
+        return {"job_id": job.id, "status": job.status, "source": source}
 
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Erro durante a descoberta de lojas: {e}"
+            detail=f"Erro ao enfileirar a descoberta de lojas: {e}"
         )
 
 
@@ -0,0 +1,32 @@
+# app/api/endpoints/jobs.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from src.app.db.session import get_db
+from src.app.repositories.job_repository import JobRepository
+from src.app.schemas.job import JobInDB
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobInDB)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Retorna o status e, quando concluído, o resultado de um job.
+    """
+    job = JobRepository(db).get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+@router.post("/{job_id}/cancel", response_model=JobInDB)
+def cancel_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Cancela um job: na fila é cancelado na hora; em execução, o worker
+    encerra o processo do job na próxima verificação.
+    """
+    job = JobRepository(db).request_cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
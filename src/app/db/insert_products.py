@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 from src.app.db.session import get_db
 from src.app.models.affiliate_store import AffiliateStore
 from src.app.models.product import Product
+from src.utils.metrics import instrument
 
 
 def insert_product(product_data: Dict[str, Any], db: Session, affiliate_store_id: Optional[int] = None) -> Product:
@@ -57,6 +58,8 @@ def insert_product(product_data: Dict[str, Any], db: Session, affiliate_store_id
         existing_product.category = product_data.get('category', '')
         existing_product.brand = product_data.get('brand', '')
         existing_product.available = product_data.get('available', True)
+        if product_data.get('prescore') is not None:
+            existing_product.prescore = product_data['prescore']
         
         # Atualizar loja afiliada se fornecida
         if affiliate_store_id:
@@ -81,6 +84,7 @@ def insert_product(product_data: Dict[str, Any], db: Session, affiliate_store_id
         category=product_data.get('category', ''),
         brand=product_data.get('brand', ''),
         available=product_data.get('available', True),
+        prescore=product_data.get('prescore'),
         affiliate_store_id=affiliate_store_id
     )
     
@@ -90,6 +94,7 @@ def insert_product(product_data: Dict[str, Any], db: Session, affiliate_store_id
     
     return new_product
 
+@instrument("tool", "insert_products")
 def insert_products(products_data: List[Dict[str, Any]], 
                    affiliate_store_name: Optional[str] = None,
                    db_session: Optional[Session] = None) -> List[Product]:
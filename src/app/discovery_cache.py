@@ -0,0 +1,97 @@
+"""
+Cache de resultados e coalescência das requisições de descoberta.
+Requisições idênticas (mesmo tipo e parâmetros) simultâneas compartilham uma
+única execução, e resultados concluídos ficam no banco por DISCOVERY_CACHE_TTL.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+
+from src.app.db.session import SessionLocal
+from src.app.repositories.result_cache_repository import ResultCacheRepository
+from src.utils.singleflight import SingleFlight
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Validade (segundos) dos resultados de descoberta reaproveitados
+DISCOVERY_CACHE_TTL = float(os.getenv("DISCOVERY_CACHE_TTL", str(6 * 3600)))
+
+_flight = SingleFlight()
+
+
+def request_key(kind: str, params: Dict[str, Any]) -> str:
+    """
+    Chave de uma requisição: hash do tipo e dos parâmetros normalizados.
+
+    Args:
+        kind: Tipo da requisição (ex.: "discover_stores")
+        params: Parâmetros da requisição
+
+    Returns:
+        str: SHA-256 hexadecimal
+    """
+    normalized = {
+        name: " ".join(value.lower().split()) if isinstance(value, str) else value
+        for name, value in params.items()
+    }
+    payload = json.dumps({"kind": kind, "params": normalized}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_call(kind: str,
+                params: Dict[str, Any],
+                compute: Callable[[], Any],
+                force_refresh: bool = False,
+                ttl_seconds: float = DISCOVERY_CACHE_TTL,
+                session_factory: Callable = SessionLocal,
+                cacheable: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, str]:
+    """
+    Executa compute() com cache no banco e coalescência de chamadas idênticas.
+
+    Args:
+        kind: Tipo da requisição
+        params: Parâmetros da requisição (compõem a chave)
+        compute: Função que produz o resultado
+        force_refresh: Ignora o resultado em cache e executa novamente
+        ttl_seconds: Validade do resultado gravado
+        session_factory: Fábrica de sessões do banco
+        cacheable: Decide se o resultado pode ser gravado (ex.: não gravar execuções
+                   parciais ou canceladas); por padrão todo resultado é gravado
+
+    Returns:
+        Tuple[Any, str]: Resultado serializável e origem ("cache", "inflight" ou "computed")
+    """
+    key = request_key(kind, params)
+
+    if not force_refresh:
+        db = session_factory()
+        try:
+            entry = ResultCacheRepository(db).get_fresh(key)
+            if entry is not None:
+                return entry.result, "cache"
+        except Exception as e:
+            print(f"Erro ao consultar cache de resultados: {e}")
+        finally:
+            db.close()
+
+    def _compute_and_store():
+        result = jsonable_encoder(compute())
+        if cacheable is not None and not cacheable(result):
+            return result
+        db = session_factory()
+        try:
+            ResultCacheRepository(db).put(key, kind, params, result, ttl_seconds)
+        except Exception as e:
+            print(f"Erro ao gravar cache de resultados: {e}")
+        finally:
+            db.close()
+        return result
+
+    result, shared = _flight.do(key, _compute_and_store)
+    return result, "inflight" if shared else "computed"
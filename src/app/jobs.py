@@ -0,0 +1,68 @@
+"""
+Tipos de job executados pelo worker (src/worker.py).
+Cada handler recebe os parâmetros gravados no job e devolve um resultado
+serializável em JSON, que fica disponível em GET /jobs/{id}.
+"""
+
+import json
+import traceback
+from typing import Any, Callable, Dict
+
+
+def discover_stores(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Pesquisa de lojas afiliadas (antes executada dentro de POST /api/stores/discover).
+    Usa a mesma descoberta e pontuação de lojas do modo pipeline.
+
+    Args:
+        params: country, period e niche
+
+    Returns:
+        Dict[str, Any]: Lojas descobertas e pontuadas
+    """
+    from src.crews.discover_and_score_stores import find_and_score_stores
+    from src.utils.MyLLM import MyLLM
+
+    inputs = {key: params[key] for key in ("country", "period", "niche")}
+    stores = find_and_score_stores(llm=MyLLM.for_task("research"), **inputs)
+    return {"stores": stores}
+
+
+def warm_trends(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Atualiza os produtos em alta dos nichos informados (ou da lista padrão).
+
+    Args:
+        params: targets (lista de {country, niche, period}, opcional) e force_refresh
+
+    Returns:
+        Dict[str, Any]: Resultado por nicho
+    """
+    from src.app.trend_store import warm_trends as _warm_trends
+
+    return {"results": _warm_trends(params.get("targets"), force_refresh=bool(params.get("force_refresh")))}
+
+
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "discover_stores": discover_stores,
+    "warm_trends": warm_trends,
+}
+
+
+def execute_job(kind: str, params: Dict[str, Any], connection) -> None:
+    """
+    Executa um job no processo atual e envia (status, payload) pela conexão.
+
+    Args:
+        kind: Tipo do job (chave de JOB_HANDLERS)
+        params: Parâmetros do job
+        connection: Extremidade de um multiprocessing.Pipe
+    """
+    try:
+        result = JOB_HANDLERS[kind](params)
+        # Garantir que o resultado pode ser gravado na coluna JSON
+        connection.send(("succeeded", json.loads(json.dumps(result, default=str))))
+    except Exception:
+        connection.send(("failed", traceback.format_exc()))
+    finally:
+        connection.close()
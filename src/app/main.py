@@ -1,15 +1,24 @@
 # app/main.py
 # No início do seu arquivo app/main.py
+import contextvars
 import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional
 from logging.handlers import RotatingFileHandler
 
-from fastapi import APIRouter, FastAPI
+from fastapi import APIRouter, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
-from src.app.api.endpoints import discover_affiliate_stores
-from src.app.db.session import Base, engine
-from src.crews.product_discovery_crew import ProductDiscoveryCrew
-from src.crews.store_selection_crew import ResearchStores
+from src.app.api.endpoints import discover_affiliate_stores, jobs
+from src.app.discovery_cache import cached_call
+from src.app.startup import ensure_schema, start_warmup
+from src.utils import events, metrics
+from src.utils.MyLLM import MyLLM
+from src.utils.llm_scheduler import llm_priority
+from src.tools.product_spool import validate_run_id
+from src.utils.run_ledger import RunLedger
 
 # Configurar logging
 log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -25,14 +34,20 @@ root_logger = logging.getLogger()
 root_logger.addHandler(file_handler)
 root_logger.setLevel(logging.DEBUG)
 
-# Criar as tabelas no banco de dados
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Criar as tabelas no banco de dados (opcional, ver DB_CREATE_SCHEMA)
+    ensure_schema()
+    # Aquecer pool do banco, modelos e crews em background (ver APP_WARMUP)
+    start_warmup()
+    yield
 
 # Inicializar o aplicativo FastAPI
 app = FastAPI(
     title="E-commerce Affiliate Platform API",
     description="API para descoberta e gerenciamento de lojas afiliadas e produtos",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -46,6 +61,7 @@ app.add_middleware(
 
 # Incluir os routers
 app.include_router(discover_affiliate_stores.router, prefix="/api/stores", tags=["stores"])
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 
 @app.get("/")
 def read_root():
@@ -53,19 +69,188 @@ def read_root():
 
 router = APIRouter()
 
-@router.get("/run-complete-discovery")
-def run_discovery(country: str, period: str, niche: str):
+
+def _pipeline_discovery(inputs: dict, ledger: RunLedger, concurrency: Optional[int],
+                        store_timeout: Optional[float], review: bool) -> dict:
+    # Agentes só pesquisam e curam; a persistência é feita em Python.
+    # O progresso é publicado em events.bus (ver /run-complete-discovery/stream).
+    from src.crews.discover_and_score_stores import find_and_score_stores
+    from src.crews.product_discovery_crew import ProductDiscoveryCrew
+
+    events.bus.open(ledger.run_id)
+    with metrics.run_scope(ledger.run_id):
+        try:
+            events.emit("run_started", run_id=ledger.run_id, **inputs)
+            stores = ledger.stage("stores", inputs, lambda: find_and_score_stores(
+                llm=MyLLM.for_task("research"), **inputs
+            ))
+            events.emit("stores_selected", stores=[
+                {key: store.get(key) for key in ("name", "url", "score", "rank")} for store in stores
+            ])
+            products = ProductDiscoveryCrew().run_pipeline(
+                inputs, stores, max_workers=concurrency, store_timeout=store_timeout,
+                ledger=ledger, review=review
+            )
+        except Exception as e:
+            events.emit("error", error=str(e))
+            raise
+        cancelled = events.cancel_requested()
+        events.emit("done", cancelled=cancelled, stores=products.get("stores"),
+                    products_inserted=products.get("products_inserted"))
+    return {"run_id": ledger.run_id, "stores": stores, "products": products, "cancelled": cancelled}
+
+
+def _is_complete(result: dict) -> bool:
+    # Só execuções completas vão para o cache: lojas com timeout/erro ou
+    # execuções canceladas seriam servidas degradadas durante todo o TTL
+    if result.get("cancelled"):
+        return False
+    products = result.get("products")
+    store_results = products.get("stores") or {} if isinstance(products, dict) else {}
+    return all(store.get("status") == "ok" for store in store_results.values())
+
+
+def _check_run_id(run_id: Optional[str]) -> None:
+    # run_id vira diretório em ./runs e ./spool: rejeitar valores fora do padrão
+    if run_id is not None:
+        try:
+            validate_run_id(run_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+def _event_stream(run_id: str) -> StreamingResponse:
+    return StreamingResponse(
+        map(events.format_sse, events.bus.subscribe(run_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/run-complete-discovery", description=(
+    "mode=pipeline processa as lojas em paralelo, com prazo por loja, cancelamento "
+    "(/runs/{run_id}/cancel) e checkpoints. mode=crew (padrão) delega o scraping aos "
+    "agentes, que percorrem as lojas em sequência: concurrency, store_timeout, run_id "
+    "e review são ignorados."
+))
+def run_discovery(country: str, period: str, niche: str, mode: str = "crew",
+                  concurrency: Optional[int] = None, store_timeout: Optional[float] = None,
+                  run_id: Optional[str] = None, fresh: bool = False, review: bool = False,
+                  force_refresh: bool = False):
+    # Paralelismo por loja, prazos e cancelamento só existem no modo pipeline
+    # Imports pesados (crewai) adiados até o primeiro uso
+    from src.crews.product_discovery_crew import ProductDiscoveryCrew
+    from src.crews.store_selection_crew import ResearchStores
+
+    _check_run_id(run_id)
     inputs = {"country": country, "period": period, "niche": niche}
-    
-    # Etapa 1
-    store_selector = ResearchStores()
-    store_result = store_selector.store_selection_crew().kickoff(inputs=inputs)
-
-    # Etapa 2
-    product_crew = ProductDiscoveryCrew()
-    final_result = product_crew.run_full_discovery(inputs)
-
-    return {
-        "stores": store_result,
-        "products": final_result
-    }
\ No newline at end of file
+
+    def _execute():
+        # Chamadas de LLM da API passam à frente das do worker e de lotes
+        with llm_priority("interactive"):
+            return _discover()
+
+    def _discover():
+        if mode == "pipeline":
+            # Com run_id, a execução é retomada da última etapa concluída.
+            ledger = RunLedger(run_id=run_id, reuse=not fresh)
+            return _pipeline_discovery(inputs, ledger, concurrency, store_timeout, review)
+
+        # Etapa 1
+        store_selector = ResearchStores()
+        store_result = store_selector.store_selection_crew().kickoff(inputs=inputs)
+
+        # Etapa 2
+        product_crew = ProductDiscoveryCrew()
+        final_result = product_crew.run_full_discovery(inputs)
+
+        return {
+            "stores": store_result,
+            "products": final_result
+        }
+
+    # Requisições idênticas simultâneas compartilham a execução e resultados
+    # recentes e completos são servidos do banco (ver DISCOVERY_CACHE_TTL)
+    result, source = cached_call(
+        "run_discovery",
+        dict(inputs, mode=mode, review=review, run_id=run_id),
+        _execute,
+        force_refresh=force_refresh or fresh,
+        cacheable=_is_complete
+    )
+    return dict(result, source=source)
+
+
+@router.get("/run-complete-discovery/stream")
+def stream_discovery(country: str, period: str, niche: str,
+                     concurrency: Optional[int] = None, store_timeout: Optional[float] = None,
+                     run_id: Optional[str] = None, fresh: bool = False, review: bool = False):
+    # Executa o modo pipeline em background e transmite o progresso por SSE:
+    # run_started, stores_selected, trending_products, store_scraped, store_inserted,
+    # store_failed, scores, review_batches, agent_step, task_completed e done/error.
+    # Se a execução já estiver em andamento, apenas acompanha os eventos dela.
+    _check_run_id(run_id)
+    ledger = RunLedger(run_id=run_id, reuse=not fresh)
+    # open() verifica e abre sob o mesmo lock: requisições simultâneas com o
+    # mesmo run_id iniciam uma única execução
+    if events.bus.open(ledger.run_id):
+        inputs = {"country": country, "period": period, "niche": niche}
+
+        def _run():
+            with llm_priority("interactive"):
+                try:
+                    _pipeline_discovery(inputs, ledger, concurrency, store_timeout, review)
+                except Exception as e:
+                    print(f"Erro na execução {ledger.run_id}: {e}")
+
+        threading.Thread(target=contextvars.copy_context().run, args=(_run,),
+                         name=f"run-{ledger.run_id}", daemon=True).start()
+    return _event_stream(ledger.run_id)
+
+
+@router.get("/runs/{run_id}/events")
+def get_run_events(run_id: str):
+    # Eventos da execução (histórico + novos) por SSE
+    _check_run_id(run_id)
+    if events.bus.has_run(run_id):
+        return _event_stream(run_id)
+    raise HTTPException(status_code=404, detail="Execução sem eventos registrados")
+
+
+@router.post("/runs/{run_id}/cancel")
+def cancel_run(run_id: str):
+    # Lojas ainda não iniciadas e a revisão são puladas; a execução termina com done
+    _check_run_id(run_id)
+    if not events.bus.cancel(run_id):
+        raise HTTPException(status_code=404, detail="Execução não está em andamento")
+    return {"run_id": run_id, "status": "cancel_requested"}
+
+
+@router.get("/runs/{run_id}")
+def get_run(run_id: str):
+    # Etapas concluídas da execução (para decidir se vale retomá-la)
+    _check_run_id(run_id)
+    return RunLedger(run_id=run_id).summary()
+
+
+@router.get("/runs/{run_id}/metrics")
+def get_run_metrics(run_id: str):
+    # Tempo, tokens e custo por operação, das mais demoradas para as mais rápidas
+    _check_run_id(run_id)
+    run_metrics = metrics.load_run_metrics(run_id)
+    if run_metrics is None:
+        raise HTTPException(status_code=404, detail="Execução sem métricas registradas")
+    return run_metrics
+
+
+@router.get("/metrics")
+def prometheus_metrics():
+    # Métricas no formato do Prometheus (requer prometheus_client)
+    latest = metrics.render_latest()
+    if latest is None:
+        raise HTTPException(status_code=503, detail="prometheus_client não instalado")
+    body, content_type = latest
+    return Response(content=body, media_type=content_type)
+
+
+app.include_router(router)
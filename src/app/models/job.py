@@ -0,0 +1,36 @@
+# app/models/job.py
+from sqlalchemy import (JSON, Boolean, Column, DateTime, Index, Integer, String,
+                        Text, func, text)
+
+from src.app.db.session import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    # No máximo um job ativo por chave: requisições idênticas compartilham a execução
+    __table_args__ = (
+        Index(
+            "uq_jobs_active_dedupe_key", "dedupe_key", unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, index=True, nullable=False)  # discover_stores, ...
+    status = Column(String, index=True, nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    params = Column(JSON, nullable=False)
+    dedupe_key = Column(String(64), index=True, nullable=True)  # Hash do tipo e dos parâmetros
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    worker = Column(String, nullable=True)  # Identificador do worker que assumiu o job
+    lease_expires_at = Column(DateTime(timezone=True), index=True, nullable=True)  # Renovado pelo heartbeat do worker
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} {self.status}>"
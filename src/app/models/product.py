@@ -23,6 +23,7 @@ class Product(Base):
     category = Column(String, nullable=True)
     brand = Column(String, nullable=True)
     available = Column(Boolean, default=True)
+    prescore = Column(Numeric(5, 4), nullable=True)  # Pré-pontuação heurística (ver product_prescorer)
     # Novo relacionamento com AffiliateStore
     affiliate_store_id = Column(Integer, ForeignKey('affiliate_stores.id'), nullable=True)
     affiliate_store = relationship('AffiliateStore', backref="products")
@@ -0,0 +1,18 @@
+# app/models/result_cache.py
+from sqlalchemy import JSON, Column, DateTime, String, func
+
+from src.app.db.session import Base
+
+
+class ResultCache(Base):
+    __tablename__ = "result_cache"
+
+    key = Column(String(64), primary_key=True)  # Hash do tipo de requisição e dos parâmetros
+    kind = Column(String, index=True, nullable=False)  # run_discovery, ...
+    params = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+
+    def __repr__(self):
+        return f"<ResultCache {self.kind} {self.key[:8]}>"
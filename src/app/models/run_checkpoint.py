@@ -0,0 +1,22 @@
+# app/models/run_checkpoint.py
+from sqlalchemy import (Column, DateTime, Integer, String, UniqueConstraint,
+                        func)
+
+from src.app.db.session import Base
+
+
+class RunCheckpoint(Base):
+    __tablename__ = "run_checkpoints"
+    __table_args__ = (UniqueConstraint("run_id", "stage", name="uq_run_checkpoints_run_stage"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String(64), index=True, nullable=False)
+    stage = Column(String(255), index=True, nullable=False)  # stores, trending_products, scraped/<loja>/<hash da url>, ...
+    input_hash = Column(String(64), index=True, nullable=False)  # Hash das entradas da etapa
+    artifact_path = Column(String, nullable=False)  # Arquivo JSON com a saída da etapa
+    item_count = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<RunCheckpoint {self.run_id}:{self.stage}>"
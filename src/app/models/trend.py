@@ -0,0 +1,23 @@
+# app/models/trend.py
+from sqlalchemy import (JSON, Column, DateTime, Integer, String,
+                        UniqueConstraint, func)
+
+from src.app.db.session import Base
+
+
+class TrendEntry(Base):
+    __tablename__ = "trend_products"
+    __table_args__ = (UniqueConstraint("country", "niche", "period", name="uq_trend_products_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    country = Column(String(100), index=True, nullable=False)  # Valores normalizados (minúsculas, espaços simples)
+    niche = Column(String(255), index=True, nullable=False)
+    period = Column(String(255), nullable=False)
+    products = Column(JSON, nullable=False)  # Nomes dos produtos em alta, em ordem
+    source = Column(String(50), nullable=False, default="analyst")  # analyst, manual, ...
+    hits = Column(Integer, nullable=False, default=0)  # Execuções atendidas sem rodar o analista
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+
+    def __repr__(self):
+        return f"<TrendEntry {self.country}/{self.niche}/{self.period}>"
@@ -0,0 +1,233 @@
+# app/repositories/job_repository.py
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.app.models.job import Job
+
+# Estados finais: o job não volta a ser executado
+FINAL_STATUSES = ("succeeded", "failed", "cancelled")
+# Duração (segundos) da posse de um job; o worker a renova com heartbeat enquanto executa.
+# Jobs com posse vencida (worker morto ou encerrado à força) voltam para a fila.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Tentativas antes de um job com posse vencida ser dado como falho
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+class JobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(self, kind: str, params: Dict[str, Any], dedupe_key: Optional[str] = None) -> Job:
+        """
+        Cria um job na fila.
+        """
+        job = Job(kind=kind, params=params, dedupe_key=dedupe_key, status="queued", cancel_requested=False, attempts=0)
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def enqueue_once(self,
+                     kind: str,
+                     params: Dict[str, Any],
+                     dedupe_key: str,
+                     ttl_seconds: float,
+                     force_refresh: bool = False) -> Tuple[Job, str]:
+        """
+        Enfileira um job somente se não houver um equivalente utilizável.
+        Retorna o job concluído com sucesso há menos de ttl_seconds ("cache", exceto
+        com force_refresh), o job equivalente na fila ou em execução ("inflight")
+        ou um job novo ("queued"). Um equivalente com posse vencida é recuperado
+        antes (volta à fila ou falha), para não bloquear a chave no índice único.
+        """
+        if not force_refresh:
+            since = datetime.now(timezone.utc) - timedelta(seconds=ttl_seconds)
+            cached = self.db.query(Job).filter(
+                Job.dedupe_key == dedupe_key,
+                Job.status == "succeeded",
+                Job.finished_at >= since
+            ).order_by(Job.finished_at.desc()).first()
+            if cached is not None:
+                return cached, "cache"
+
+        # O índice único não pode depender do relógio: jobs órfãos saem de 'running' aqui
+        self.reclaim_expired(dedupe_key)
+        active = self.find_active(dedupe_key)
+        if active is not None:
+            return active, "inflight"
+
+        try:
+            return self.enqueue(kind, params, dedupe_key=dedupe_key), "queued"
+        except IntegrityError:
+            # Outra requisição enfileirou o mesmo job entre a consulta e o insert
+            self.db.rollback()
+            active = self.find_active(dedupe_key)
+            if active is None:
+                raise
+            return active, "inflight"
+
+    def find_active(self, dedupe_key: str) -> Optional[Job]:
+        """
+        Busca o job na fila ou em execução (com posse válida) com a chave informada.
+        """
+        return self.db.query(Job).filter(
+            Job.dedupe_key == dedupe_key,
+            or_(
+                Job.status == "queued",
+                (Job.status == "running") & (Job.lease_expires_at >= datetime.now(timezone.utc))
+            )
+        ).first()
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """
+        Busca um job pelo ID.
+        """
+        return self.db.query(Job).filter(Job.id == job_id).first()
+
+    def reclaim_expired(self, dedupe_key: Optional[str] = None) -> int:
+        """
+        Devolve à fila os jobs em execução cuja posse venceu (ou os marca como
+        falhos depois de JOB_MAX_ATTEMPTS tentativas).
+        Retorna o número de jobs recuperados.
+        """
+        now = datetime.now(timezone.utc)
+        query = self.db.query(Job).filter(
+            Job.status == "running",
+            or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now)
+        )
+        if dedupe_key is not None:
+            query = query.filter(Job.dedupe_key == dedupe_key)
+        expired = query.with_for_update(skip_locked=True).all()
+
+        for job in expired:
+            job.worker = None
+            job.lease_expires_at = None
+            if (job.attempts or 0) >= JOB_MAX_ATTEMPTS:
+                job.status = "failed"
+                job.error = f"Worker parou de responder ({job.attempts} tentativas)"
+                job.finished_at = now
+            else:
+                job.status = "queued"
+                job.started_at = None
+        self.db.commit()
+        return len(expired)
+
+    def claim(self, worker: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Job]:
+        """
+        Assume o job mais antigo da fila, depois de recuperar jobs com posse vencida.
+        Usa SELECT ... FOR UPDATE SKIP LOCKED para que workers concorrentes
+        nunca assumam o mesmo job.
+        """
+        self.reclaim_expired()
+        job = self.db.query(Job).filter(
+            Job.status == "queued"
+        ).order_by(Job.id).with_for_update(skip_locked=True).first()
+
+        if job is None:
+            self.db.rollback()
+            return None
+
+        job.status = "running"
+        job.worker = worker
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = datetime.now(timezone.utc)
+        job.lease_expires_at = job.started_at + timedelta(seconds=lease_seconds)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def heartbeat(self, job_id: int, worker: str, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+        """
+        Renova a posse do job pelo worker que o executa.
+        Retorna False se o job não está mais em execução por este worker.
+        """
+        updated = self.db.query(Job).filter(
+            Job.id == job_id,
+            Job.status == "running",
+            Job.worker == worker
+        ).update(
+            {Job.lease_expires_at: datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)},
+            synchronize_session=False
+        )
+        self.db.commit()
+        return updated > 0
+
+    def complete(self, job_id: int, result: Any) -> Optional[Job]:
+        """
+        Marca o job como concluído com o resultado.
+        """
+        return self._finish(job_id, "succeeded", result=result)
+
+    def fail(self, job_id: int, error: str) -> Optional[Job]:
+        """
+        Marca o job como falho com a mensagem de erro.
+        """
+        return self._finish(job_id, "failed", error=error)
+
+    def mark_cancelled(self, job_id: int) -> Optional[Job]:
+        """
+        Marca o job como cancelado.
+        """
+        return self._finish(job_id, "cancelled")
+
+    def request_cancel(self, job_id: int) -> Optional[Job]:
+        """
+        Solicita o cancelamento de um job.
+        Jobs na fila são cancelados na hora; jobs em execução são interrompidos
+        pelo worker ao perceber a solicitação.
+        """
+        job = self.db.query(Job).filter(Job.id == job_id).with_for_update().first()
+        if job is None:
+            self.db.rollback()
+            return None
+
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = datetime.now(timezone.utc)
+        elif job.status == "running":
+            job.cancel_requested = True
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def release(self, job_id: int) -> Optional[Job]:
+        """
+        Devolve à fila um job em execução (ex.: worker encerrado antes do fim).
+        """
+        job = self.get(job_id)
+        if job is None or job.status != "running":
+            return job
+
+        job.status = "queued"
+        job.worker = None
+        job.started_at = None
+        job.lease_expires_at = None
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def is_cancel_requested(self, job_id: int) -> bool:
+        """
+        Indica se o cancelamento do job foi solicitado.
+        """
+        job = self.get(job_id)
+        return bool(job and job.cancel_requested)
+
+    def _finish(self, job_id: int, status: str, result: Any = None, error: Optional[str] = None) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.status in FINAL_STATUSES:
+            return job
+
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.now(timezone.utc)
+        job.lease_expires_at = None
+        self.db.commit()
+        self.db.refresh(job)
+        return job
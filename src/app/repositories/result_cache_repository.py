@@ -0,0 +1,51 @@
+# app/repositories/result_cache_repository.py
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from src.app.models.result_cache import ResultCache
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ResultCacheRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_fresh(self, key: str) -> Optional[ResultCache]:
+        """
+        Busca um resultado ainda válido pela chave.
+        """
+        return self.db.query(ResultCache).filter(
+            ResultCache.key == key,
+            ResultCache.expires_at > _utcnow()
+        ).first()
+
+    def put(self, key: str, kind: str, params: Dict[str, Any], result: Any, ttl_seconds: float) -> ResultCache:
+        """
+        Grava (ou substitui) o resultado de uma requisição com validade de ttl_seconds.
+        """
+        entry = self.db.query(ResultCache).filter(ResultCache.key == key).first()
+        if entry is None:
+            entry = ResultCache(key=key)
+            self.db.add(entry)
+
+        entry.kind = kind
+        entry.params = params
+        entry.result = result
+        entry.created_at = _utcnow()
+        entry.expires_at = _utcnow() + timedelta(seconds=ttl_seconds)
+        self.db.commit()
+        self.db.refresh(entry)
+        return entry
+
+    def purge_expired(self) -> int:
+        """
+        Remove os resultados vencidos.
+        """
+        deleted = self.db.query(ResultCache).filter(ResultCache.expires_at <= _utcnow()).delete()
+        self.db.commit()
+        return deleted
@@ -0,0 +1,61 @@
+# app/repositories/run_checkpoint_repository.py
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.app.models.run_checkpoint import RunCheckpoint
+
+
+class RunCheckpointRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def save(self, run_id: str, stage: str, input_hash: str, artifact_path: str,
+             item_count: Optional[int] = None) -> RunCheckpoint:
+        """
+        Registra (ou substitui) o checkpoint de uma etapa da execução.
+        """
+        checkpoint = self.get(run_id, stage)
+        if checkpoint is None:
+            checkpoint = RunCheckpoint(run_id=run_id, stage=stage)
+            self.db.add(checkpoint)
+
+        checkpoint.input_hash = input_hash
+        checkpoint.artifact_path = artifact_path
+        checkpoint.item_count = item_count
+        # Marca a substituição mesmo sem mudança de valores (ver find_fresh)
+        checkpoint.updated_at = func.now()
+        self.db.commit()
+        self.db.refresh(checkpoint)
+        return checkpoint
+
+    def get(self, run_id: str, stage: str) -> Optional[RunCheckpoint]:
+        """
+        Busca o checkpoint de uma etapa da execução.
+        """
+        return self.db.query(RunCheckpoint).filter(
+            RunCheckpoint.run_id == run_id,
+            RunCheckpoint.stage == stage
+        ).first()
+
+    def find_fresh(self, stage: str, input_hash: str, since: datetime) -> Optional[RunCheckpoint]:
+        """
+        Busca o checkpoint mais recente de qualquer execução com as mesmas entradas,
+        gravado (ou substituído) a partir de `since`.
+        """
+        saved_at = func.coalesce(RunCheckpoint.updated_at, RunCheckpoint.created_at)
+        return self.db.query(RunCheckpoint).filter(
+            RunCheckpoint.stage == stage,
+            RunCheckpoint.input_hash == input_hash,
+            saved_at >= since
+        ).order_by(saved_at.desc()).first()
+
+    def list_for_run(self, run_id: str) -> List[RunCheckpoint]:
+        """
+        Lista os checkpoints de uma execução na ordem em que foram criados.
+        """
+        return self.db.query(RunCheckpoint).filter(
+            RunCheckpoint.run_id == run_id
+        ).order_by(RunCheckpoint.id).all()
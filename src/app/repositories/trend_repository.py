@@ -0,0 +1,77 @@
+# app/repositories/trend_repository.py
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from src.app.models.trend import TrendEntry
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite devolve datas sem fuso
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def normalize_key(value: str) -> str:
+    """Normaliza país, nicho ou período para a chave da tendência."""
+    return " ".join(str(value).lower().split())
+
+
+class TrendRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, country: str, niche: str, period: str) -> Optional[TrendEntry]:
+        """
+        Busca a tendência registrada para (country, niche, period), vencida ou não.
+        """
+        return self.db.query(TrendEntry).filter(
+            TrendEntry.country == normalize_key(country),
+            TrendEntry.niche == normalize_key(niche),
+            TrendEntry.period == normalize_key(period)
+        ).first()
+
+    def is_fresh(self, entry: TrendEntry) -> bool:
+        return _aware(entry.expires_at) > _utcnow()
+
+    def get_fresh(self, country: str, niche: str, period: str) -> Optional[TrendEntry]:
+        """
+        Busca a tendência ainda dentro da validade.
+        """
+        entry = self.get(country, niche, period)
+        return entry if entry is not None and self.is_fresh(entry) else None
+
+    def record_hit(self, entry: TrendEntry) -> None:
+        entry.hits = (entry.hits or 0) + 1
+        self.db.commit()
+
+    def upsert(self, country: str, niche: str, period: str, products: List[str],
+               ttl_seconds: float, source: str = "analyst") -> TrendEntry:
+        """
+        Grava (ou substitui) os produtos em alta com validade de ttl_seconds.
+        """
+        entry = self.get(country, niche, period)
+        if entry is None:
+            entry = TrendEntry(country=normalize_key(country), niche=normalize_key(niche),
+                               period=normalize_key(period), hits=0)
+            self.db.add(entry)
+
+        entry.products = list(products)
+        entry.source = source
+        entry.refreshed_at = _utcnow()
+        entry.expires_at = _utcnow() + timedelta(seconds=ttl_seconds)
+        self.db.commit()
+        self.db.refresh(entry)
+        return entry
+
+    def list_stale(self, limit: int = 100) -> List[TrendEntry]:
+        """
+        Tendências vencidas, das mais antigas para as mais recentes.
+        """
+        return self.db.query(TrendEntry).filter(
+            TrendEntry.expires_at <= _utcnow()
+        ).order_by(TrendEntry.expires_at).limit(limit).all()
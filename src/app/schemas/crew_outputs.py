@@ -0,0 +1,27 @@
+# app/schemas/crew_outputs.py
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SelectedStore(BaseModel):
+    name: str
+    url: str = ""
+    platform: Optional[str] = None
+    commission: Optional[str] = None
+    description: Optional[str] = None
+    rank: Optional[int] = None
+    score: Optional[float] = None
+
+class StoreSelection(BaseModel):
+    stores: List[SelectedStore] = Field(..., description="Selected affiliate stores ordered by rank")
+
+class ScoredProduct(BaseModel):
+    rank: int
+    product_name: str = Field(..., description="Exact product title as given in the input")
+    score: float = 0
+    strengths: str = ""
+    marketing_approach: str = ""
+
+class ProductCuration(BaseModel):
+    products: List[ScoredProduct] = Field(..., description="Prioritized products, rank 1 first")
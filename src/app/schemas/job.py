@@ -0,0 +1,27 @@
+# app/schemas/job.py
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+
+class JobCreated(BaseModel):
+    job_id: int
+    status: str
+    source: str = "queued"  # queued, inflight (job equivalente em andamento) ou cache
+
+class JobInDB(BaseModel):
+    id: int
+    kind: str
+    status: str
+    params: Dict[str, Any]
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
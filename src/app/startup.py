@@ -0,0 +1,106 @@
+"""
+Rotinas de inicialização da API.
+Mantém o boot do worker leve: a checagem de schema é opcional e o
+aquecimento (pool do banco, modelos e imports das crews) roda em background.
+"""
+
+import importlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.app.db.session import Base, engine
+
+logger = logging.getLogger(__name__)
+
+# Criar tabelas ausentes no startup (desative quando as migrações cuidam do schema)
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "true").lower() in ("1", "true", "yes", "sim")
+# Aquecer conexões, modelos e imports em background após o startup
+APP_WARMUP = os.getenv("APP_WARMUP", "false").lower() in ("1", "true", "yes", "sim")
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", "5"))
+# Atualizar também os produtos em alta dos nichos de src/config/trend_warmup.yaml
+TREND_WARMUP = os.getenv("TREND_WARMUP", "false").lower() in ("1", "true", "yes", "sim")
+APP_WARMUP_MODELS = [m.strip() for m in os.getenv("APP_WARMUP_MODELS", "GTP4o_mini").split(",") if m.strip()]
+
+# Módulos pesados (crewai, crewai_tools) importados sob demanda pelos endpoints
+DEFERRED_MODULES = [
+    "src.crews.store_selection_crew",
+    "src.crews.discover_and_score_stores",
+    "src.crews.product_discovery_crew",
+]
+
+
+def ensure_schema() -> None:
+    """Cria as tabelas ausentes, se habilitado por DB_CREATE_SCHEMA."""
+    if not DB_CREATE_SCHEMA:
+        return
+    # Registrar os modelos no metadata antes do create_all
+    import src.app.models.affiliate_store  # noqa: F401
+    import src.app.models.job  # noqa: F401
+    import src.app.models.product  # noqa: F401
+    import src.app.models.result_cache  # noqa: F401
+    import src.app.models.run_checkpoint  # noqa: F401
+    import src.app.models.trend  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+
+
+def _warm_db_pool() -> None:
+    """Abre conexões simultâneas para que o pool já as tenha ao receber tráfego."""
+    def _connect(_):
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+
+    with ThreadPoolExecutor(max_workers=DB_WARMUP_CONNECTIONS) as executor:
+        list(executor.map(_connect, range(DB_WARMUP_CONNECTIONS)))
+
+
+def _warm_models() -> None:
+    """Instancia os modelos usados pelas crews no registro compartilhado."""
+    from src.utils.llm_registry import get_registry
+
+    registry = get_registry()
+    for name in APP_WARMUP_MODELS:
+        registry.get(name)
+
+
+def _warm_imports() -> None:
+    """Importa os módulos das crews antes da primeira requisição."""
+    for module in DEFERRED_MODULES:
+        importlib.import_module(module)
+
+
+def _warm_trends() -> None:
+    """Executa o analista de tendências para os nichos configurados com entrada vencida."""
+    from src.app.trend_store import warm_trends
+
+    warm_trends()
+
+
+def warm_up() -> None:
+    """Executa cada etapa de aquecimento, registrando falhas sem interromper as demais."""
+    steps = [_warm_db_pool, _warm_models, _warm_imports]
+    if TREND_WARMUP:
+        steps.append(_warm_trends)
+    for step in steps:
+        try:
+            step()
+            logger.info("Aquecimento concluído: %s", step.__name__)
+        except Exception as e:
+            logger.warning("Falha no aquecimento %s: %s", step.__name__, e)
+
+
+def start_warmup() -> Optional[threading.Thread]:
+    """
+    Dispara o aquecimento em uma thread daemon, se habilitado por APP_WARMUP.
+
+    Returns:
+        threading.Thread: Thread iniciada (ou None se desabilitado)
+    """
+    if not APP_WARMUP:
+        return None
+    thread = threading.Thread(target=warm_up, name="app-warmup", daemon=True)
+    thread.start()
+    return thread
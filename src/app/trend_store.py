@@ -0,0 +1,192 @@
+"""
+Produtos em alta por (país, nicho, período).
+O resultado do analista de tendências é gravado na tabela trend_products com
+validade TREND_TTL; enquanto a entrada estiver válida, as execuções reaproveitam
+os produtos sem rodar o agente. Nichos frequentes podem ser aquecidos com
+`python -m src.app.trend_store` (lista em src/config/trend_warmup.yaml).
+"""
+
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+from dotenv import load_dotenv
+
+from src.app.db.session import SessionLocal
+from src.app.repositories.trend_repository import TrendRepository, normalize_key
+from src.utils.singleflight import SingleFlight
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Validade (segundos) dos produtos em alta registrados
+TREND_TTL = float(os.getenv("TREND_TTL", str(24 * 3600)))
+TREND_WARMUP_FILE = os.getenv("TREND_WARMUP_FILE", os.path.join(os.path.dirname(__file__), "..", "config", "trend_warmup.yaml"))
+TREND_WARMUP_CONCURRENCY = int(os.getenv("TREND_WARMUP_CONCURRENCY", "2"))
+
+_flight = SingleFlight()
+
+
+def peek_fresh(country: str, niche: str, period: str, session_factory: Callable = SessionLocal) -> Optional[List[str]]:
+    """
+    Produtos em alta ainda válidos, sem calcular nada.
+
+    Returns:
+        Optional[List[str]]: Produtos registrados ou None se ausentes/vencidos
+    """
+    db = session_factory()
+    try:
+        entry = TrendRepository(db).get_fresh(country, niche, period)
+        if entry is None:
+            return None
+        TrendRepository(db).record_hit(entry)
+        return list(entry.products)
+    except Exception as e:
+        print(f"Erro ao consultar tendências: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def trending_products(country: str,
+                      niche: str,
+                      period: str,
+                      compute: Callable[[], List[str]],
+                      force_refresh: bool = False,
+                      ttl_seconds: float = TREND_TTL,
+                      session_factory: Callable = SessionLocal) -> Tuple[List[str], str]:
+    """
+    Retorna os produtos em alta, executando compute() apenas se a entrada estiver vencida.
+    Chamadas simultâneas para a mesma chave compartilham um único cálculo; se o
+    cálculo falhar e houver uma entrada vencida, ela é devolvida.
+
+    Args:
+        country: País
+        niche: Nicho
+        period: Período
+        compute: Função que executa o analista e devolve os nomes dos produtos
+        force_refresh: Ignora a entrada válida e recalcula
+        ttl_seconds: Validade da entrada gravada
+        session_factory: Fábrica de sessões do banco
+
+    Returns:
+        Tuple[List[str], str]: Produtos e origem ("store", "inflight", "computed" ou "stale")
+    """
+    if not force_refresh:
+        products = peek_fresh(country, niche, period, session_factory)
+        if products:
+            return products, "store"
+
+    def _compute_and_store():
+        products = list(compute())
+        if not products:
+            return products
+        db = session_factory()
+        try:
+            TrendRepository(db).upsert(country, niche, period, products, ttl_seconds)
+        except Exception as e:
+            print(f"Erro ao gravar tendências: {e}")
+        finally:
+            db.close()
+        return products
+
+    key = "|".join(normalize_key(value) for value in (country, niche, period))
+    try:
+        products, shared = _flight.do(key, _compute_and_store)
+    except Exception:
+        db = session_factory()
+        try:
+            entry = TrendRepository(db).get(country, niche, period)
+        finally:
+            db.close()
+        if entry is None:
+            raise
+        print(f"Falha ao atualizar tendências de {key}; usando a entrada vencida")
+        return list(entry.products), "stale"
+    return products, "inflight" if shared else "computed"
+
+
+def load_warmup_targets(path: str = TREND_WARMUP_FILE) -> List[Dict[str, str]]:
+    """
+    Lê a lista de nichos a aquecer.
+
+    Args:
+        path: YAML com country/period padrão e a lista niches (itens texto ou {niche, country, period})
+
+    Returns:
+        List[Dict[str, str]]: Alvos com country, niche e period
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    targets = []
+    for item in config.get("niches", []):
+        item = {"niche": item} if isinstance(item, str) else dict(item)
+        item.setdefault("country", config.get("country"))
+        item.setdefault("period", config.get("period"))
+        targets.append({key: item[key] for key in ("country", "niche", "period")})
+    return targets
+
+
+def warm_trends(targets: Optional[List[Dict[str, str]]] = None,
+                force_refresh: bool = False,
+                max_workers: int = TREND_WARMUP_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Garante entradas válidas para os nichos informados (padrão: TREND_WARMUP_FILE).
+    Nichos já válidos não executam o analista.
+
+    Args:
+        targets: Alvos com country, niche e period
+        force_refresh: Recalcula mesmo as entradas válidas
+        max_workers: Nichos aquecidos em paralelo
+
+    Returns:
+        List[Dict[str, Any]]: Resultado por alvo (source e products, ou error)
+    """
+    from src.crews.product_discovery_crew import ProductDiscoveryCrew
+
+    targets = load_warmup_targets() if targets is None else targets
+    crew = ProductDiscoveryCrew()
+
+    def _warm(target: Dict[str, str]) -> Dict[str, Any]:
+        try:
+            products, source = crew.trending_products(target, force_refresh=force_refresh)
+            return dict(target, source=source, products=products)
+        except Exception as e:
+            print(f"Erro ao aquecer tendências de {target}: {e}")
+            return dict(target, error=str(e))
+
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets)))) as executor:
+        return list(executor.map(_warm, targets))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aquecimento dos produtos em alta por nicho")
+    parser.add_argument("--file", default=TREND_WARMUP_FILE, help="YAML com os nichos a aquecer")
+    parser.add_argument("--niche", action="append", default=None,
+                        help="Nicho a aquecer (repetível; substitui a lista do arquivo)")
+    parser.add_argument("--country", default=None, help="País dos nichos passados em --niche")
+    parser.add_argument("--period", default=None, help="Período dos nichos passados em --niche")
+    parser.add_argument("--force", action="store_true", help="Recalcula mesmo as entradas válidas")
+    args = parser.parse_args()
+
+    targets = load_warmup_targets(args.file)
+    if args.niche:
+        defaults = targets[0] if targets else {}
+        targets = [{
+            "country": args.country or defaults.get("country"),
+            "niche": niche,
+            "period": args.period or defaults.get("period"),
+        } for niche in args.niche]
+
+    for result in warm_trends(targets, force_refresh=args.force):
+        status = result.get("error") or f"{result['source']}: {', '.join(result['products'])}"
+        print(f"{result['country']} / {result['niche']} / {result['period']} -> {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# /batch.py
+"""
+Execução em lote do pipeline para vários nichos.
+Lê uma matriz de jobs (country, niche, period) em YAML ou CSV e executa cada
+job em um processo separado, com até --concurrency processos simultâneos e
+tempo limite por job. Os caches de LLM e Serper (SQLite em modo WAL), o trend
+store e os checkpoints (banco) são compartilhados entre os processos. O índice
+de sites (Chroma) não suporta vários processos gravando no mesmo diretório:
+cada vaga usa o seu, em <WEBSITE_INDEX_PATH>_slot<n>, reaproveitado pelos jobs
+seguintes da mesma vaga. Os limites RPM/TPM do agendador de LLM também são do
+processo: cada vaga recebe a fração 1/<vagas> (LLM_RATE_SHARE), de modo que a
+soma das vagas respeite os limites do provedor.
+
+Uso:
+    python -m src.batch nichos.yaml --concurrency 4 --timeout 1800
+
+Formato YAML:
+    defaults: {country: Brasil, period: junho de 2024 a maio 2025}
+    matrix: {niche: [moda, games]}        # produto cartesiano das listas
+    jobs:                                 # jobs avulsos
+      - {niche: pets, country: Portugal}
+
+Formato CSV: cabeçalho com country, niche, period e opcionalmente
+concurrency, store_timeout, review, run_id.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+from dotenv import load_dotenv
+
+from src.tools.website_index import WEBSITE_INDEX_PATH
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", str(max(1, (os.cpu_count() or 2) // 2))))
+BATCH_JOB_TIMEOUT = float(os.getenv("BATCH_JOB_TIMEOUT", "1800"))
+RUNS_DIR = os.getenv("RUNS_DIR", "./runs")
+
+JOB_KEYS = ("country", "niche", "period")
+OPTIONAL_KEYS = {"concurrency": int, "store_timeout": float, "review": lambda v: str(v).lower() in ("1", "true", "yes", "sim"),
+                 "run_id": str, "fresh": lambda v: str(v).lower() in ("1", "true", "yes", "sim")}
+
+
+def _coerce(job: Dict[str, Any]) -> Dict[str, Any]:
+    missing = [key for key in JOB_KEYS if not job.get(key)]
+    if missing:
+        raise ValueError(f"Job sem {', '.join(missing)}: {job}")
+    coerced = {key: str(job[key]).strip() for key in JOB_KEYS}
+    for key, cast in OPTIONAL_KEYS.items():
+        if job.get(key) not in (None, ""):
+            coerced[key] = cast(job[key])
+    return coerced
+
+
+def load_matrix(path: str) -> List[Dict[str, Any]]:
+    """
+    Lê a matriz de jobs.
+
+    Args:
+        path: Arquivo .yaml/.yml ou .csv
+
+    Returns:
+        List[Dict[str, Any]]: Jobs com country, niche, period e opções, sem duplicatas
+
+    Raises:
+        ValueError: Se algum job não tiver country, niche ou period
+    """
+    jobs: List[Dict[str, Any]] = []
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            jobs = [dict(row) for row in csv.DictReader(f)]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        defaults = config.get("defaults", {})
+        matrix = config.get("matrix") or {}
+        if matrix:
+            keys = list(matrix)
+            values = [value if isinstance(value, list) else [value] for value in matrix.values()]
+            jobs.extend(dict(defaults, **dict(zip(keys, combo))) for combo in itertools.product(*values))
+        jobs.extend(dict(defaults, **job) for job in config.get("jobs", []))
+
+    unique = {}
+    for job in map(_coerce, jobs):
+        unique.setdefault(tuple(" ".join(job[key].lower().split()) for key in JOB_KEYS), job)
+    return list(unique.values())
+
+
+def run_niche(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Executa o pipeline completo de um nicho (mesmo fluxo de `src.main --mode pipeline`).
+
+    Args:
+        job: country, niche, period e opções (concurrency, store_timeout, review, run_id, fresh)
+
+    Returns:
+        Dict[str, Any]: Resumo da execução
+    """
+    from src.crews.discover_and_score_stores import find_and_score_stores
+    from src.crews.product_discovery_crew import ProductDiscoveryCrew
+    from src.utils import metrics
+    from src.utils.MyLLM import MyLLM
+    from src.utils.run_ledger import RunLedger
+
+    inputs = {key: job[key] for key in JOB_KEYS}
+    ledger = RunLedger(run_id=job.get("run_id"), reuse=not job.get("fresh", False))
+    with metrics.run_scope(ledger.run_id):
+        stores = ledger.stage("stores", inputs, lambda: find_and_score_stores(
+            llm=MyLLM.for_task("research"), **inputs
+        ))
+        result = ProductDiscoveryCrew().run_pipeline(
+            inputs, stores, max_workers=job.get("concurrency"), store_timeout=job.get("store_timeout"),
+            ledger=ledger, review=job.get("review", False)
+        )
+    return {
+        "run_id": ledger.run_id,
+        "stores": len(stores),
+        "products_inserted": sum(result.get("products_inserted", {}).values()),
+        "store_status": {name: store.get("status") for name, store in result.get("stores", {}).items()},
+    }
+
+
+def _execute(target: Callable[[Dict[str, Any]], Any], job: Dict[str, Any], connection,
+             env: Optional[Dict[str, str]] = None) -> None:
+    """Executa o job no processo filho e envia (status, payload) pela conexão."""
+    try:
+        # Aplicado antes dos imports do pipeline, que leem a configuração do ambiente
+        os.environ.update(env or {})
+        result = target(job)
+        connection.send(("succeeded", json.loads(json.dumps(result, default=str))))
+    except Exception:
+        connection.send(("failed", traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+class BatchRunner:
+    """
+    Pool limitado de processos: cada vaga executa um job por vez em um processo
+    novo, encerrado ao estourar o tempo limite sem afetar os demais.
+    """
+
+    def __init__(self,
+                 concurrency: int = BATCH_CONCURRENCY,
+                 timeout: float = BATCH_JOB_TIMEOUT,
+                 target: Callable[[Dict[str, Any]], Any] = run_niche):
+        """
+        Inicializa o executor.
+
+        Args:
+            concurrency: Jobs executados simultaneamente
+            timeout: Tempo limite (segundos) de cada job
+            target: Função de nível de módulo executada para cada job
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.target = target
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = threading.Event()
+
+    def run(self, jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Executa todos os jobs e devolve o relatório.
+
+        Args:
+            jobs: Jobs da matriz
+
+        Returns:
+            Dict[str, Any]: Resultados por job, contagens por status e tempo total
+        """
+        started = time.monotonic()
+        pending: queue.Queue = queue.Queue()
+        for index, job in enumerate(jobs):
+            pending.put((index, job))
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+
+        slot_count = max(1, min(self.concurrency, len(jobs)))
+
+        def _slot(slot: int):
+            env = {"WEBSITE_INDEX_PATH": f"{WEBSITE_INDEX_PATH}_slot{slot}",
+                   "LLM_RATE_SHARE": str(slot_count)}
+            while not self._stop.is_set():
+                try:
+                    index, job = pending.get_nowait()
+                except queue.Empty:
+                    return
+                results[index] = self._run_job(job, env)
+                outcome = results[index]
+                print(f"[{outcome['status']}] {job['country']} / {job['niche']} / {job['period']} "
+                      f"({outcome['elapsed']:.1f}s)")
+
+        slots = [threading.Thread(target=_slot, args=(i,), name=f"batch-slot-{i}", daemon=True)
+                 for i in range(slot_count)]
+        for slot in slots:
+            slot.start()
+        try:
+            for slot in slots:
+                while slot.is_alive():
+                    slot.join(0.5)
+        except KeyboardInterrupt:
+            self._stop.set()
+            for slot in slots:
+                slot.join()
+
+        outcomes = [result or dict(job, status="skipped", elapsed=0.0) for result, job in zip(results, jobs)]
+        counts: Dict[str, int] = {}
+        for outcome in outcomes:
+            counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+        return {
+            "jobs": outcomes,
+            "counts": counts,
+            "elapsed": round(time.monotonic() - started, 2),
+            "job_seconds": round(sum(outcome["elapsed"] for outcome in outcomes), 2),
+        }
+
+    def _run_job(self, job: Dict[str, Any], env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        started = time.monotonic()
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=_execute, args=(self.target, job, sender, env), daemon=True)
+        process.start()
+        sender.close()
+        deadline = started + self.timeout
+
+        status, payload = "timeout", f"Tempo limite de {self.timeout:.0f}s excedido"
+        while time.monotonic() < deadline:
+            if self._stop.is_set():
+                status, payload = "interrupted", "Execução interrompida"
+                break
+            if receiver.poll(min(1.0, max(0.0, deadline - time.monotonic()))):
+                try:
+                    status, payload = receiver.recv()
+                except EOFError:
+                    status, payload = "failed", "Processo do job encerrou sem resultado"
+                break
+
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        outcome = dict(job, status=status, elapsed=round(time.monotonic() - started, 2))
+        outcome["result" if status == "succeeded" else "error"] = payload
+        return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline de descoberta em lote para vários nichos")
+    parser.add_argument("matrix", help="Arquivo YAML ou CSV com os jobs (country, niche, period)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help="Jobs executados em paralelo (um processo por job)")
+    parser.add_argument("--timeout", type=float, default=BATCH_JOB_TIMEOUT,
+                        help="Tempo limite em segundos de cada job")
+    parser.add_argument("--report", default=None,
+                        help="Arquivo JSON do relatório (padrão: runs/batch_<data>.json)")
+    args = parser.parse_args()
+
+    jobs = load_matrix(args.matrix)
+    print(f"{len(jobs)} jobs, {args.concurrency} em paralelo")
+    report = BatchRunner(concurrency=args.concurrency, timeout=args.timeout).run(jobs)
+
+    report_path = args.report or os.path.join(RUNS_DIR, f"batch_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\nConcluído em {report['elapsed']:.1f}s (soma dos jobs: {report['job_seconds']:.1f}s)")
+    for status, count in sorted(report["counts"].items()):
+        print(f"  {status}: {count}")
+    for outcome in report["jobs"]:
+        if outcome["status"] == "succeeded":
+            result = outcome["result"]
+            print(f"  {outcome['niche']} ({outcome['country']}): {result['products_inserted']} produtos, "
+                  f"run_id {result['run_id']}")
+    print(f"Relatório: {report_path}")
+    raise SystemExit(0 if report["counts"].get("succeeded", 0) == len(jobs) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+from src.utils.metrics import install_crewai_hooks
+
+# Medir kickoffs, tarefas e ferramentas de todas as crews (ver src/utils/metrics.py)
+install_crewai_hooks()
@@ -8,9 +8,14 @@ import os
 from typing import Any, Dict, List
 
 from crewai import Agent, Crew, CrewOutput, Process, Task
-from crewai_tools import SerperDevTool, WebsiteSearchTool
 from dotenv import load_dotenv
 
+from src.app.schemas.crew_outputs import StoreSelection
+from src.crews.structured_output import parse_structured_output
+from src.tools.tool_pool import get_serper_tool, get_website_search_tool
+from src.utils import events
+from src.utils.prompt_packing import trim_text
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
@@ -22,9 +27,8 @@ class StoreDiscoveryAgent:
     
     def __init__(self):
         """Inicializa o agente com as ferramentas necessárias."""
-        self.serper_tool = SerperDevTool()
-        self.serper_tool.n_results = 20
-        self.web_tool = WebsiteSearchTool()
+        self.serper_tool = get_serper_tool(n_results=20)
+        self.web_tool = get_website_search_tool()
     
     def create_researcher_agent(self, config: Dict[str, Any], llm) -> Agent:
         """
@@ -84,17 +88,22 @@ class StoreDiscoveryAgent:
             agent=agent
         )
     
-    def create_selection_task(self, config: Dict[str, Any], agent: Agent, context: str = "") -> Task:
+    def create_selection_task(self, config: Dict[str, Any], agent: Agent) -> Task:
         """
         Cria a tarefa de seleção e pontuação das melhores lojas.
+        O resultado da pesquisa é interpolado via input "research_result" no kickoff
+        e a resposta é validada contra o modelo StoreSelection.
         """
-        research_text = context.raw if isinstance(context, CrewOutput) else str(context)
+        description = config.get("description", "A filtered list with the top 5 Stores to work with in affiliate market.")
+        if "{research_result}" not in description:
+            description += "\n\nResearch results:\n{research_result}"
         
         return Task(
-            description=config.get("description", "A filtered list with the top 5 Stores to work with in affiliate market."),
-            expected_output=config.get("expected_output", "An ordered list of the top 5 companies along with store's affiliate program website url."),
+            description=description,
+            expected_output=config.get("expected_output", "An ordered list of the top 5 companies along with store's affiliate program website url.")
+                            + "\nAnswer as JSON with a 'stores' list (name, url, platform, commission, description, rank, score).",
             agent=agent,
-            inputs={"research_result": research_text}  # apenas tipos básicos aqui!
+            output_pydantic=StoreSelection
         )
 
     def discover_and_score_stores(self, 
@@ -142,109 +151,57 @@ class StoreDiscoveryAgent:
             agents=[researcher],
             tasks=[research_task],
             process=Process.sequential,
-            verbose=True
+            verbose=True,
+            step_callback=events.step_callback("store_research"),
+            task_callback=events.task_callback("store_research")
         )
         
         research_result = crew.kickoff(inputs={"country": country, "period": period, "niche": niche})
         
         # Criar tarefa de seleção com o resultado da pesquisa
-        selection_task = self.create_selection_task(selection_task_config, curator, context=research_result)
+        selection_task = self.create_selection_task(selection_task_config, curator)
         
         # Executar seleção
         crew = Crew(
             agents=[curator],
             tasks=[selection_task],
             process=Process.sequential,
-            verbose=True
+            verbose=True,
+            step_callback=events.step_callback("store_selection"),
+            task_callback=events.task_callback("store_selection")
         )
         
-        selection_result = crew.kickoff(
-            inputs={"research_result": research_result.raw if isinstance(research_result, CrewOutput) else research_result}
-        )
+        # O curador recebe a pesquisa cortada ao orçamento STAGE_CONTEXT_TOKENS
+        research_text = research_result.raw if isinstance(research_result, CrewOutput) else str(research_result)
+        selection_result = crew.kickoff(inputs={"research_result": trim_text(research_text)})
 
         
         # Processar e formatar o resultado
         try:
             # Tentar extrair uma lista estruturada do resultado
-            stores = self._parse_selection_result(selection_result)
+            stores = self._parse_selection_result(selection_result, llm)
         except Exception as e:
             print(f"Erro ao processar resultado: {e}")
             # Retornar o resultado bruto em caso de erro
-            stores = [{"name": "Resultado bruto", "url": "", "raw_data": selection_result}]
+            raw_text = selection_result.raw if isinstance(selection_result, CrewOutput) else str(selection_result)
+            stores = [{"name": "Resultado bruto", "url": "", "raw_data": raw_text}]
         
         return stores
     
         
-    # def _parse_selection_result(self, result) -> List[Dict[str, Any]]:
-    def _parse_selection_result(self, result: str) -> List[Dict[str, Any]]:
+    def _parse_selection_result(self, result: Any, llm=None) -> List[Dict[str, Any]]:
         """
         Processa o resultado da seleção para extrair informações estruturadas.
         
         Args:
-            result: Resultado bruto da seleção (string ou objeto CrewOutput)
-            result: Resultado bruto da seleção
+            result: Resultado da seleção (CrewOutput ou texto JSON)
+            llm: Modelo usado para uma única tentativa de reparo (opcional)
             
         Returns:
             List[Dict[str, Any]]: Lista estruturada de lojas
         """
-        # Processar o resultado para garantir que temos uma string
-        if hasattr(result, 'raw_output'):
-            # Se for um objeto CrewOutput
-            result_text = str(result.raw_output)
-        elif hasattr(result, 'strip'):
-            # Se já for uma string
-            result_text = result
-        else:
-            # Caso seja outro tipo
-            result_text = str(result)
-        
-        # Implementação básica - em um cenário real, seria necessário um parser mais robusto
-        stores = []
-        
-        # Tentar extrair informações do texto
-        lines = result_text.strip().split('\n')
-        lines = result.strip().split('\n')
-        current_store = {}
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Verificar se é uma nova loja (começa com número ou marcador de lista)
-            if line[0].isdigit() or line.startswith('*') or line.startswith('-'):
-                # Salvar loja anterior se existir
-                if current_store and 'name' in current_store:
-                    stores.append(current_store)
-                
-                # Iniciar nova loja
-                current_store = {"name": line.lstrip('0123456789.*- ').split(':')[0].strip()}
-            
-            # Extrair URL se presente
-            elif 'http' in line:
-                url_start = line.find('http' )
-                url_start = line.find('http')
-                url_end = line.find(' ', url_start) if ' ' in line[url_start:] else len(line)
-                current_store['url'] = line[url_start:url_end].strip()
-            
-            # Adicionar outras informações como descrição
-            elif current_store and 'name' in current_store:
-                if 'description' not in current_store:
-                    current_store['description'] = line
-                else:
-                    current_store['description'] += " " + line
-        
-        # Adicionar a última loja se existir
-        if current_store and 'name' in current_store:
-            stores.append(current_store)
-        
-        # Se não conseguiu extrair lojas estruturadas, criar uma entrada com o texto completo
-        if not stores:
-            stores = [{"name": "Resultado não estruturado", "description": str(result_text)}]
-        
-        return stores
-
-
+        selection = parse_structured_output(result, StoreSelection, llm=llm)
+        return [store.model_dump(exclude_none=True) for store in selection.stores]
 
 
 # Função principal para uso direto do módulo
@@ -318,7 +275,7 @@ if __name__ == "__main__":
         country="Brasil",
         period="junho de 2024 a maio 2025",
         niche="produtos infantis",
-        llm=MyLLM.GTP4o_mini
+        llm=MyLLM.for_task("research")
     )
     
     print(json.dumps(stores, indent=2, ensure_ascii=False))
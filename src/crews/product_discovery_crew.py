@@ -1,30 +1,77 @@
-from crewai import Agent, Crew, Process, Task
+import contextvars
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
-from src.tools.db_tools import insert_affiliate_stores_tool, insert_products_tool
-from src.tools.product_scraper_tool import scrape_store_products
+from crewai import Agent, Crew, CrewOutput, Process, Task
+
+from src.app import trend_store
+from src.app.db.insert_affiliate_stores import insert_affiliate_stores
+from src.app.db.insert_products import insert_products
+from src.tools.db_tools import (insert_affiliate_stores_tool,
+                                insert_spooled_products_tool)
+from src.tools.product_scraper_tool import (scrape_products,
+                                            scrape_store_products)
+from src.tools.product_spool import (load_spooled_products, new_run_id,
+                                     spool_products)
+from src.utils import events, metrics
 from src.utils.MyLLM import MyLLM
+from src.utils.product_prescorer import select_for_scoring
+from src.utils.run_ledger import RunLedger
+
+# Lojas processadas em paralelo e prazo (segundos) de cada loja no modo pipeline
+PIPELINE_STORE_CONCURRENCY = int(os.getenv("PIPELINE_STORE_CONCURRENCY", "4"))
+PIPELINE_STORE_TIMEOUT = float(os.getenv("PIPELINE_STORE_TIMEOUT", "120"))
+# Produtos com pré-score abaixo do mínimo não são inseridos
+PIPELINE_MIN_PRESCORE = float(os.getenv("PIPELINE_MIN_PRESCORE", "0.0"))
 
 
 class ProductDiscoveryCrew:
 
+    def create_analyst_agent(self) -> Agent:
+        return Agent(
+            role="Product Trend Analyst",
+            goal="Discover the most searched products in the {niche} niche during {period}",
+            backstory="You analyze trending product data from the web to surface the most desired items in specific markets.",
+            verbose=True,
+            llm=MyLLM.for_task("research")
+        )
+
+    def create_trending_products_task(self, agent: Agent) -> Task:
+        return Task(
+            description="Analyze recent trends and identify the top 5 most searched products within the {niche} niche during {period}.",
+            expected_output="A list of product names with highest search interest.",
+            agent=agent
+        )
+
     def run_full_discovery(self, inputs: dict):
+        """
+        Executa a descoberta com agentes (modo crew). O agente de scraping
+        percorre as lojas em sequência; o processamento paralelo por loja, com
+        prazo e cancelamento, existe apenas em run_pipeline (modo pipeline).
+
+        Args:
+            inputs: country, niche e period
+
+        Returns:
+            CrewOutput: Resultado da crew
+        """
         # Definindo agentes
         db_agent = Agent(
             role="Database Inserter",
             goal="Insert validated affiliate stores and products into the system",
             backstory="You specialize in structured data persistence and work with schemas for affiliate marketing.",
             verbose=True,
-            tools=[insert_affiliate_stores_tool, insert_products_tool ],
-            llm=MyLLM.GTP4o_mini
+            tools=[insert_affiliate_stores_tool, insert_spooled_products_tool],
+            llm=MyLLM.for_task("extraction")
         )
 
-        analyst = Agent(
-            role="Product Trend Analyst",
-            goal="Discover the most searched products in the {nicho} niche during {periodo}",
-            backstory="You analyze trending product data from the web to surface the most desired items in specific markets.",
-            verbose=True,
-            llm=MyLLM.GTP4o_mini
-        )
+        analyst = self.create_analyst_agent()
 
         scraper = Agent(
             role="E-commerce Scraper",
@@ -32,7 +79,7 @@ class ProductDiscoveryCrew:
             backstory="You use automated tools to fetch product details from e-commerce websites based on search queries.",
             tools=[scrape_store_products],
             verbose=True,
-            llm=MyLLM.GTP4o_mini
+            llm=MyLLM.for_task("extraction")
         )
 
         # Definindo tarefas
@@ -42,35 +89,291 @@ class ProductDiscoveryCrew:
             agent=db_agent
         )
 
-        find_trending_products_task = Task(
-            description="Analyze recent trends and identify the top 5 most searched products within the {nicho} niche during {periodo}.",
-            expected_output="A list of product names with highest search interest.",
-            agent=analyst
-        )
+        # Produtos em alta resolvidos antes da crew pelo trend store: entradas válidas são
+        # reaproveitadas e, na falta delas, o analista roda uma vez e o resultado é gravado
+        trending, _ = self.trending_products(inputs)
+        find_trending_products_task = None if trending else self.create_trending_products_task(analyst)
 
+        scrape_description = ("Use the trending product names to scrape up to 100 relevant items from each store in the database. "
+                              "Pass the same run_id to every scraper call.")
+        if trending:
+            scrape_description += "\nTrending product names: {trending_products}"
+            inputs = dict(inputs, trending_products=", ".join(trending))
         scrape_products_task = Task(
-            description="Use the trending product names to scrape up to 100 relevant items from each store in the database.",
-            expected_output="Dictionary with store names as keys and up to 100 products per store in ProductCreate format.",
+            description=scrape_description,
+            expected_output="JSON object with store names as keys and the spool handle returned by the scraper as values.",
             agent=scraper
         )
 
         insert_products_task = Task(
-            description="Insert the scraped product data into the database using the ProductCreate schema.",
+            description="Insert the scraped products into the database by passing the store name to spool handle mapping to InsertSpooledProductsTool.",
             expected_output="Confirmation of how many products were inserted per store.",
             agent=db_agent
         )
 
         # Criando e executando a Crew
         crew = Crew(
-            agents=[db_agent, analyst, scraper],
-            tasks=[
+            agents=[db_agent, scraper] if trending else [db_agent, analyst, scraper],
+            tasks=[task for task in (
                 insert_stores_task,
                 find_trending_products_task,
                 scrape_products_task,
                 insert_products_task
-            ],
+            ) if task is not None],
             process=Process.sequential,
             verbose=True
         )
 
         return crew.kickoff(inputs=inputs)
+
+    def run_pipeline(self,
+                     inputs: dict,
+                     stores: List[Dict[str, Any]],
+                     max_workers: Optional[int] = None,
+                     store_timeout: Optional[float] = None,
+                     ledger: Optional[RunLedger] = None,
+                     review: bool = False) -> Dict[str, Any]:
+        """
+        Executa a descoberta de produtos em modo pipeline.
+        Apenas a análise de tendências usa um agente; inserção de lojas, scraping
+        e inserção de produtos são etapas determinísticas em Python. Cada loja é
+        uma unidade independente (scraping, pré-score e inserção) executada em
+        paralelo: a falha ou o estouro de prazo de uma loja não descarta as demais.
+        Com um RunLedger, produtos em alta, produtos coletados por loja, pontuações
+        e lotes de revisão são registrados e reaproveitados ao retomar a execução.
+
+        Args:
+            inputs: Parâmetros da execução (country, period, niche e opcionalmente run_id)
+            stores: Lojas curadas (name, url e opcionalmente platform/api_credentials)
+            max_workers: Lojas processadas simultaneamente (padrão: PIPELINE_STORE_CONCURRENCY)
+            store_timeout: Prazo em segundos por loja (padrão: PIPELINE_STORE_TIMEOUT)
+            ledger: Registro de checkpoints da execução (opcional)
+            review: Pontuar os produtos inseridos e exportar um lote de revisão
+
+        Returns:
+            Dict[str, Any]: Resumo da execução com produtos em alta, inserções e status por loja
+        """
+        run_id = ledger.run_id if ledger else inputs.get("run_id") or new_run_id()
+        # Tempo, tokens e custo de cada etapa ficam em ./runs/<run_id>/metrics.json
+        with metrics.run_scope(run_id):
+            return self._run_pipeline(inputs, stores, run_id, max_workers, store_timeout, ledger, review)
+
+    def _run_pipeline(self,
+                      inputs: dict,
+                      stores: List[Dict[str, Any]],
+                      run_id: str,
+                      max_workers: Optional[int],
+                      store_timeout: Optional[float],
+                      ledger: Optional[RunLedger],
+                      review: bool) -> Dict[str, Any]:
+        """Corpo de run_pipeline, executado dentro do escopo de métricas da execução."""
+        max_workers = max_workers or PIPELINE_STORE_CONCURRENCY
+        store_timeout = store_timeout or PIPELINE_STORE_TIMEOUT
+        stores = [self._normalize_store(store) for store in stores if store.get("name")]
+
+        inserted_stores = insert_affiliate_stores(stores)
+        product_names = _checkpoint(
+            ledger, "trending_products",
+            {key: inputs.get(key) for key in ("country", "period", "niche")},
+            lambda: self.trending_products(inputs)[0]
+        )
+        events.emit("trending_products", products=product_names)
+
+        targets = [store for store in stores if store.get("url")]
+        store_results = {}
+        if targets:
+            # Lojas com o mesmo nome são distinguidas pela URL no resumo
+            labels = []
+            for store in targets:
+                label = store["name"]
+                if label in labels:
+                    label = f"{store['name']} ({store['url']})"
+                labels.append(label)
+            # Sinaliza às lojas que estouraram o prazo que não devem mais inserir produtos
+            cancels = [threading.Event() for _ in targets]
+
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="store")
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._process_store, store, product_names, run_id, store_timeout, ledger, cancel)
+                for store, cancel in zip(targets, cancels)
+            ]
+            # Lojas na fila também precisam de prazo: o limite total cobre as ondas do pool
+            waves = -(-len(targets) // max_workers)
+            deadline = time.monotonic() + store_timeout * waves + 5
+            for name, future, cancel in zip(labels, futures, cancels):
+                try:
+                    store_results[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    cancel.set()
+                    future.cancel()
+                    store_results[name] = {"status": "timeout", "error": "Prazo da loja excedido"}
+                    events.emit("store_failed", store=name, **store_results[name])
+                except Exception as e:
+                    print(f"Erro ao processar loja {name}: {e}")
+                    store_results[name] = {"status": "error", "error": str(e)}
+                    events.emit("store_failed", store=name, **store_results[name])
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        summary = {
+            "run_id": run_id,
+            "stores_inserted": len(inserted_stores),
+            "trending_products": product_names,
+            "products_inserted": {
+                name: result["inserted"] for name, result in store_results.items() if "inserted" in result
+            },
+            "stores": store_results,
+        }
+        if review and not events.cancel_requested():
+            summary["review_batches"] = self._review(store_results, run_id, ledger)
+        return summary
+
+    @staticmethod
+    def _review(store_results: Dict[str, Dict[str, Any]], run_id: str, ledger: Optional[RunLedger]) -> List[str]:
+        """Pontua os produtos coletados e exporta um lote para revisão humana."""
+        from review_interface.export_batch import export_batch
+        from src.crews.score_products import score_products
+
+        products = []
+        for result in store_results.values():
+            if result.get("spool"):
+                products.extend(load_spooled_products(result["spool"]))
+        if not products:
+            return []
+
+        product_keys = [(p.get("title"), p.get("product_url"), p.get("price")) for p in products]
+        scored = _checkpoint(ledger, "scores", product_keys, lambda: score_products(products, MyLLM.for_task("scoring")))
+        events.emit("scores", count=len(scored), top=[
+            {"title": p.get("title"), "score": p.get("score"), "rank": p.get("rank")} for p in scored[:10]
+        ])
+        batches = _checkpoint(
+            ledger, "review_batches", [(p.get("title"), p.get("rank")) for p in scored],
+            lambda: [export_batch(scored, batch_name=f"review_{run_id}")]
+        )
+        events.emit("review_batches", batches=batches)
+        return batches
+
+    @staticmethod
+    def _process_store(store: Dict[str, Any],
+                       product_names: List[str],
+                       run_id: str,
+                       timeout: float,
+                       ledger: Optional[RunLedger] = None,
+                       cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Processa uma loja: scraping até o prazo, pré-score, spool e inserção.
+        A coleta completa é registrada no ledger; coletas interrompidas pelo
+        prazo são inseridas, mas refeitas ao retomar a execução. Se a execução
+        já deu a loja como expirada (cancel), nada é gravado nem inserido.
+
+        Args:
+            store: Loja normalizada (name e url)
+            product_names: Produtos em alta a buscar
+            run_id: Identificador da execução (agrupa os spools)
+            timeout: Prazo em segundos para o scraping
+            ledger: Registro de checkpoints da execução (opcional)
+            cancel: Sinalizado quando a loja estourou o prazo global da execução (opcional)
+
+        Returns:
+            Dict[str, Any]: Status, contagens e tempo gasto na loja
+        """
+        # Lojas ainda não iniciadas são puladas quando o cliente cancela a execução
+        if events.cancel_requested() or (cancel and cancel.is_set()):
+            return {"status": "cancelled"}
+        started = time.monotonic()
+        deadline = started + timeout
+        # A URL distingue lojas com o mesmo nome (ver _run_pipeline)
+        stage = f"scraped/{store['name']}/{hashlib.sha256(store['url'].encode('utf-8')).hexdigest()[:8]}"
+        stage_inputs = {"url": store["url"], "product_names": product_names}
+
+        products = ledger.load(stage, stage_inputs) if ledger else None
+        timed_out = False
+        if products is None:
+            products = scrape_products(store["url"], product_names, deadline=deadline)
+            timed_out = time.monotonic() >= deadline
+            if ledger and not timed_out:
+                ledger.save(stage, stage_inputs, products)
+
+        events.emit("store_scraped", store=store["name"], scraped=len(products), partial=timed_out)
+
+        # O resumo da execução já foi devolvido sem esta loja: não inserir o que não foi contado
+        if cancel and cancel.is_set():
+            return {"status": "timeout", "scraped": len(products)}
+
+        selected, rejected = select_for_scoring(products, min_score=PIPELINE_MIN_PRESCORE)
+        summary = spool_products(selected, store["url"], run_id=run_id)
+        inserted = insert_products(load_spooled_products(summary["handle"]), affiliate_store_name=store["name"])
+
+        elapsed = time.monotonic() - started
+        metrics.record("stage", "process_store", seconds=elapsed)
+        result = {
+            "status": "partial" if timed_out else "ok",
+            "scraped": len(products),
+            "rejected": len(rejected),
+            "inserted": len(inserted),
+            "spool": summary["handle"],
+            "elapsed": round(elapsed, 2),
+        }
+        events.emit("store_inserted", store=store["name"], **{k: v for k, v in result.items() if k != "spool"})
+        return result
+
+    def trending_products(self, inputs: dict, force_refresh: bool = False) -> Tuple[List[str], str]:
+        """
+        Produtos em alta do nicho/período, reaproveitados do trend store enquanto válidos.
+
+        Args:
+            inputs: country, niche e period
+            force_refresh: Executa o analista mesmo com entrada válida
+
+        Returns:
+            Tuple[List[str], str]: Produtos e origem ("store", "inflight", "computed" ou "stale")
+        """
+        products, source = trend_store.trending_products(
+            inputs.get("country", ""), inputs.get("niche", ""), inputs.get("period", ""),
+            lambda: self._find_trending_products(inputs),
+            force_refresh=force_refresh
+        )
+        if source == "store":
+            metrics.record("stage", "trending_products", outcome="cache_hit")
+        return products, source
+
+    def _find_trending_products(self, inputs: dict) -> List[str]:
+        """Executa somente o agente analista e devolve os nomes de produtos em alta."""
+        analyst = self.create_analyst_agent()
+        crew = Crew(
+            agents=[analyst],
+            tasks=[self.create_trending_products_task(analyst)],
+            process=Process.sequential,
+            verbose=True,
+            step_callback=events.step_callback("trending_products"),
+            task_callback=events.task_callback("trending_products")
+        )
+        result = crew.kickoff(inputs=inputs)
+        return self._parse_product_names(result.raw if isinstance(result, CrewOutput) else str(result))
+
+    @staticmethod
+    def _parse_product_names(result_text: str, limit: int = 5) -> List[str]:
+        """Extrai os nomes de produtos de uma lista numerada ou com marcadores."""
+        names = []
+        for line in result_text.split("\n"):
+            name = line.strip().lstrip("0123456789.)*- ").split(":")[0].strip(" *")
+            if name and name not in names:
+                names.append(name)
+        return names[:limit]
+
+    @staticmethod
+    def _normalize_store(store: Dict[str, Any]) -> Dict[str, Any]:
+        """Completa plataforma e credenciais exigidas pelo AffiliateStoreCreate."""
+        normalized = dict(store)
+        url = normalized.get("url") or ""
+        if not normalized.get("platform"):
+            normalized["platform"] = urlparse(url).netloc.replace("www.", "") or "unknown"
+        if not normalized.get("api_credentials"):
+            normalized["api_credentials"] = {"affiliate_url": url}
+        return normalized
+
+
+def _checkpoint(ledger: Optional[RunLedger], stage: str, inputs: Any, compute: Callable[[], Any]) -> Any:
+    """Executa a etapa pelo ledger, quando houver, ou diretamente."""
+    if ledger is None:
+        return compute()
+    return ledger.stage(stage, inputs, compute)
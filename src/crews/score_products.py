@@ -3,17 +3,41 @@ Módulo para pontuação e priorização de produtos.
 Utiliza o framework CrewAI para automatizar o processo de avaliação e ranqueamento.
 """
 
+import contextvars
 import json
 import os
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 from crewai import Agent, Crew, CrewOutput, Process, Task
-from crewai_tools import SerperDevTool, WebsiteSearchTool
 from dotenv import load_dotenv
 
+from src.app.schemas.crew_outputs import ProductCuration
+from src.crews.structured_output import parse_structured_output
+from src.tools.tool_pool import get_serper_tool, get_website_search_tool
+from src.utils import events
+from src.utils.product_prescorer import select_for_scoring
+from src.utils.prompt_packing import chunk_records, pack_records
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Orçamento aproximado de tokens dos produtos em cada prompt de análise
+SCORING_CHUNK_TOKENS = int(os.getenv("SCORING_CHUNK_TOKENS", "3000"))
+# Número máximo de lotes pontuados em paralelo
+SCORING_MAX_WORKERS = int(os.getenv("SCORING_MAX_WORKERS", "4"))
+
+# Campos enviados ao LLM; URLs e demais campos ficam apenas no produto original
+PROMPT_FIELDS = ["title", "price", "sale_price", "category", "brand", "available"]
+DESCRIPTION_MAX_CHARS = int(os.getenv("SCORING_DESCRIPTION_MAX_CHARS", "200"))
+# Formato dos produtos no prompt: "tsv" (tabela, mais compacto) ou "json"
+SCORING_PROMPT_FORMAT = os.getenv("SCORING_PROMPT_FORMAT", "tsv")
+PROMPT_FORMAT_LABELS = {"tsv": "tab-separated, first line is the header", "json": "JSON"}
+
+# Filtro heurístico aplicado antes dos agentes (ver product_prescorer)
+PRESCORE_TOP_K = int(os.getenv("PRESCORE_TOP_K", "50"))
+PRESCORE_MIN_SCORE = float(os.getenv("PRESCORE_MIN_SCORE", "0.1"))
+
 class ProductScoringAgent:
     """
     Classe responsável por pontuar e priorizar produtos.
@@ -22,8 +46,8 @@ class ProductScoringAgent:
     
     def __init__(self):
         """Inicializa o agente com as ferramentas necessárias."""
-        self.serper_tool = SerperDevTool()
-        self.web_tool = WebsiteSearchTool()
+        self.serper_tool = get_serper_tool()
+        self.web_tool = get_website_search_tool()
     
     def create_analyst_agent(self, llm) -> Agent:
         """
@@ -75,14 +99,16 @@ class ProductScoringAgent:
         Returns:
             Task: Tarefa configurada
         """
-        products_str = json.dumps(products, ensure_ascii=False, indent=2)
+        products_str = pack_records(
+            products, PROMPT_FIELDS, {"description": DESCRIPTION_MAX_CHARS}, fmt=SCORING_PROMPT_FORMAT
+        )
         
         return Task(
             description=f"""
             Analyze the following products to determine their market potential, pricing competitiveness, 
             and likely conversion rate. Consider current market trends, seasonality, and target audience.
             
-            Products:
+            Products ({PROMPT_FORMAT_LABELS[SCORING_PROMPT_FORMAT]}):
             {products_str}
             """,
             expected_output="""
@@ -97,9 +123,10 @@ class ProductScoringAgent:
             agent=agent
         )
     
-    def create_curation_task(self, agent: Agent, analysis_result: str) -> Task:
+    def create_curation_task(self, agent: Agent, analysis_task: Task) -> Task:
         """
         Cria a tarefa de curadoria e priorização dos produtos analisados.
+        O resultado da tarefa de análise é recebido como contexto.
         """
         return Task(
             description="""
@@ -109,180 +136,186 @@ class ProductScoringAgent:
             expected_output="""
             A prioritized list of products with:
             1. Rank (1 being highest priority)
-            2. Product name
+            2. Product name (exactly as the product title in the input)
             3. Overall score
             4. Key strengths
             5. Recommended marketing approach
+            Answer as JSON with a 'products' list (rank, product_name, score, strengths, marketing_approach).
             """,
             agent=agent,
-            inputs={"analysis_result": analysis_result.raw if isinstance(analysis_result, CrewOutput) else analysis_result}
+            context=[analysis_task],
+            output_pydantic=ProductCuration
         )
 
-    def score_products(self, products: List[Dict[str, Any]], llm) -> List[Dict[str, Any]]:
+    def score_products(self,
+                       products: List[Dict[str, Any]],
+                       llm,
+                       top_k: Optional[int] = PRESCORE_TOP_K,
+                       min_prescore: Optional[float] = PRESCORE_MIN_SCORE) -> List[Dict[str, Any]]:
         """
         Executa o processo completo de pontuação e priorização de produtos.
+        Uma pré-pontuação heurística escolhe os candidatos enviados ao LLM; estes são
+        divididos em lotes dentro do orçamento de tokens, pontuados em paralelo e
+        depois reordenados globalmente pela pontuação.
         
         Args:
             products: Lista de produtos a serem avaliados
             llm: Modelo de linguagem a ser utilizado
+            top_k: Máximo de produtos enviados ao LLM (None para todos)
+            min_prescore: Pré-pontuação mínima para envio ao LLM (None para todos)
             
         Returns:
-            List[Dict[str, Any]]: Lista de produtos pontuados e priorizados
+            List[Dict[str, Any]]: Lista de produtos pontuados e priorizados,
+            cada um com "prescore" e "score" (o "score" do LLM só vai para o
+            lote de revisão; no banco fica apenas products.prescore)
+        """
+        products, _ = select_for_scoring(products, top_k=top_k, min_score=min_prescore)
+        if not products:
+            return []
+
+        chunks = chunk_records(products, SCORING_CHUNK_TOKENS, PROMPT_FIELDS, {"description": DESCRIPTION_MAX_CHARS})
+        if len(chunks) <= 1:
+            return self._score_chunk(products, llm)
+
+        with ThreadPoolExecutor(max_workers=min(SCORING_MAX_WORKERS, len(chunks))) as executor:
+            # Cada lote herda o contexto (prioridade do agendador de LLM)
+            chunk_results = list(executor.map(
+                lambda chunk, context: context.run(self._score_chunk, chunk, llm),
+                chunks, [contextvars.copy_context() for _ in chunks]
+            ))
+
+        return _merge_scored_chunks(chunk_results)
+
+    def _score_chunk(self, products: List[Dict[str, Any]], llm) -> List[Dict[str, Any]]:
+        """
+        Pontua um lote de produtos com os agentes analista e curador.
+        
+        Args:
+            products: Lote de produtos a serem avaliados
+            llm: Modelo de linguagem a ser utilizado
+            
+        Returns:
+            List[Dict[str, Any]]: Produtos do lote pontuados e ordenados por rank
         """
         # Criar agentes
         analyst = self.create_analyst_agent(llm)
         curator = self.create_curator_agent(llm)
         
-        # Criar tarefa de análise
+        # Criar tarefas; a curadoria recebe a análise como contexto
         analysis_task = self.create_analysis_task(analyst, products)
+        curation_task = self.create_curation_task(curator, analysis_task)
         
-        # Executar análise
-        analysis_crew = Crew(
-            agents=[analyst],
-            tasks=[analysis_task],
-            process=Process.sequential,
-            verbose=True
-        )
-        
-        analysis_result = analysis_crew.kickoff()
-        
-        # Criar tarefa de curadoria
-        curation_task = self.create_curation_task(curator, analysis_result)
-        
-        # Executar curadoria
-        curation_crew = Crew(
-            agents=[curator],
-            tasks=[curation_task],
+        # Executar análise e curadoria
+        crew = Crew(
+            agents=[analyst, curator],
+            tasks=[analysis_task, curation_task],
             process=Process.sequential,
-            verbose=True
+            verbose=True,
+            step_callback=events.step_callback("scoring"),
+            task_callback=events.task_callback("scoring")
         )
         
-        curation_result = curation_crew.kickoff()
+        curation_result = crew.kickoff()
         
         # Processar e formatar o resultado
         try:
-            # Tentar extrair uma lista estruturada do resultado
-            scored_products = self._parse_curation_result(curation_result, products)
+            # Validar a resposta estruturada (com uma tentativa de reparo)
+            scored_products = self._parse_curation_result(curation_result, products, llm)
         except Exception as e:
             print(f"Erro ao processar resultado: {e}")
             # Retornar os produtos originais com o resultado bruto
-            scored_products = products
-            for product in scored_products:
-                product["raw_score_data"] = curation_result
+            curation_text = curation_result.raw if isinstance(curation_result, CrewOutput) else str(curation_result)
+            scored_products = [dict(product, raw_score_data=curation_text) for product in products]
         
         return scored_products
     
-    def _parse_curation_result(self, result: str, original_products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _parse_curation_result(self,
+                               result: Any,
+                               original_products: List[Dict[str, Any]],
+                               llm=None) -> List[Dict[str, Any]]:
         """
         Processa o resultado da curadoria para extrair informações estruturadas.
         
         Args:
-            result: Resultado bruto da curadoria
+            result: Resultado da curadoria (CrewOutput ou texto JSON)
             original_products: Lista original de produtos
+            llm: Modelo usado para uma única tentativa de reparo (opcional)
             
         Returns:
             List[Dict[str, Any]]: Lista estruturada de produtos pontuados
         """
-        # Criar cópia dos produtos originais para adicionar pontuações
-        scored_products = []
-        product_map = {p.get("title", ""): p for p in original_products}
+        curation = parse_structured_output(result, ProductCuration, llm=llm)
         
-        # Extrair informações do texto
-        lines = result.strip().split('\n')
-        current_product = {}
+        # Casar pelo título exato e, em seguida, ignorando caixa e espaços
+        product_map = {p.get("title", ""): p for p in original_products}
+        normalized_map = {" ".join(title.lower().split()): p for title, p in product_map.items()}
         
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
+        scored_products = []
+        for item in curation.products:
+            original = product_map.get(item.product_name) or normalized_map.get(" ".join(item.product_name.lower().split()))
+            if not original:
                 continue
-                
-            # Verificar se é um novo produto (começa com número ou marcador de lista)
-            if (line[0].isdigit() and '. ' in line[:10]) or line.startswith('*') or line.startswith('-'):
-                # Salvar produto anterior se existir
-                if current_product and 'product_name' in current_product:
-                    # Encontrar produto original
-                    original = product_map.get(current_product['product_name'])
-                    if original:
-                        # Mesclar dados
-                        merged = original.copy()
-                        merged.update({
-                            "rank": current_product.get('rank', 999),
-                            "score": current_product.get('score', 0),
-                            "strengths": current_product.get('strengths', ""),
-                            "marketing_approach": current_product.get('marketing_approach', "")
-                        })
-                        scored_products.append(merged)
-                
-                # Iniciar novo produto
-                rank_part = line.split('.')[0].strip() if '.' in line else ""
-                name_part = line.split('.')[1].strip() if '.' in line else line.lstrip('*- ')
-                
-                current_product = {
-                    "rank": int(rank_part) if rank_part.isdigit() else 999,
-                    "product_name": name_part
-                }
-            
-            # Extrair pontuação
-            elif "score" in line.lower() and ":" in line:
-                score_text = line.split(":")[-1].strip()
-                try:
-                    # Extrair número da pontuação
-                    import re
-                    score_match = re.search(r'(\d+(\.\d+)?)', score_text)
-                    if score_match:
-                        current_product['score'] = float(score_match.group(1))
-                except:
-                    current_product['score'] = 0
-            
-            # Extrair pontos fortes
-            elif "strength" in line.lower() and ":" in line:
-                current_product['strengths'] = line.split(":")[-1].strip()
-            
-            # Extrair abordagem de marketing
-            elif "marketing" in line.lower() and ":" in line:
-                current_product['marketing_approach'] = line.split(":")[-1].strip()
-        
-        # Adicionar o último produto se existir
-        if current_product and 'product_name' in current_product:
-            original = product_map.get(current_product['product_name'])
-            if original:
-                merged = original.copy()
-                merged.update({
-                    "rank": current_product.get('rank', 999),
-                    "score": current_product.get('score', 0),
-                    "strengths": current_product.get('strengths', ""),
-                    "marketing_approach": current_product.get('marketing_approach', "")
-                })
-                scored_products.append(merged)
+            merged = original.copy()
+            merged.update({
+                "rank": item.rank,
+                "score": item.score,
+                "strengths": item.strengths,
+                "marketing_approach": item.marketing_approach
+            })
+            scored_products.append(merged)
         
         # Ordenar por rank
         scored_products.sort(key=lambda x: x.get('rank', 999))
         
-        # Se não conseguiu extrair produtos estruturados, retornar os originais
+        # Se não conseguiu casar nenhum produto, retornar os originais
         if not scored_products:
+            raw_text = result.raw if isinstance(result, CrewOutput) else str(result)
             for i, product in enumerate(original_products):
                 product_copy = product.copy()
-                product_copy["raw_score_data"] = result
+                product_copy["raw_score_data"] = raw_text
                 product_copy["rank"] = i + 1
                 scored_products.append(product_copy)
         
         return scored_products
 
 
+def _merge_scored_chunks(chunk_results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Combina os resultados dos lotes em uma única ordem global.
+    Ordena pela pontuação (desempate pelo rank dentro do lote) e renumera os ranks.
+    
+    Args:
+        chunk_results: Produtos pontuados de cada lote
+        
+    Returns:
+        List[Dict[str, Any]]: Produtos com rank global
+    """
+    merged = [product for chunk in chunk_results for product in chunk]
+    merged.sort(key=lambda p: (-float(p.get("score") or 0), p.get("rank", 999)))
+    for position, product in enumerate(merged, 1):
+        product["rank"] = position
+    return merged
+
+
 # Função principal para uso direto do módulo
-def score_products(products: List[Dict[str, Any]], llm) -> List[Dict[str, Any]]:
+def score_products(products: List[Dict[str, Any]],
+                   llm,
+                   top_k: Optional[int] = PRESCORE_TOP_K,
+                   min_prescore: Optional[float] = PRESCORE_MIN_SCORE) -> List[Dict[str, Any]]:
     """
     Função principal para pontuação e priorização de produtos.
     
     Args:
         products: Lista de produtos a serem avaliados
         llm: Modelo de linguagem a ser utilizado
+        top_k: Máximo de produtos enviados ao LLM (None para todos)
+        min_prescore: Pré-pontuação mínima para envio ao LLM (None para todos)
         
     Returns:
         List[Dict[str, Any]]: Lista de produtos pontuados e priorizados
     """
     agent = ProductScoringAgent()
-    return agent.score_products(products, llm)
+    return agent.score_products(products, llm, top_k=top_k, min_prescore=min_prescore)
 
 
 # Exemplo de uso
@@ -318,7 +351,7 @@ if __name__ == "__main__":
     ]
     
     # Pontuar produtos
-    scored_products = score_products(sample_products, MyLLM.GTP4o_mini)
+    scored_products = score_products(sample_products, MyLLM.for_task("scoring"))
     
     # Imprimir resultado
     print(json.dumps(scored_products, indent=2, ensure_ascii=False))
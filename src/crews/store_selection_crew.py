@@ -3,9 +3,9 @@ from typing import List
 from crewai import Agent, Crew, Process, Task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool, WebsiteSearchTool
 
 from src.tools.db_tools import insert_affiliate_stores_tool, insert_products_tool
+from src.tools.tool_pool import get_serper_tool, get_website_search_tool
 from src.utils.MyLLM import MyLLM
 
 
@@ -24,8 +24,8 @@ class ResearchStores():
         return Agent(
             config=self.agents_config['researcher'],
             verbose=True,
-            tools=[SerperDevTool(), WebsiteSearchTool()],  # type: ignore[index]
-            llm=MyLLM.GTP4o_mini,
+            tools=[get_serper_tool(), get_website_search_tool()],  # type: ignore[index]
+            llm=MyLLM.for_task("research"),
             allow_delegation=False,
         )
 
@@ -35,7 +35,7 @@ class ResearchStores():
             config=self.agents_config['curator'],  # type: ignore[index]
             verbose=True,
             tools=[insert_affiliate_stores_tool(), insert_products_tool()],
-            llm=MyLLM.GTP4o_mini,
+            llm=MyLLM.for_task("curation"),
             allow_delegation=False,
         )
 
@@ -43,7 +43,7 @@ class ResearchStores():
     @task
     def research(self) -> Task:
         return Task(
-            config=self.tasks_config.get['research_affiliate_stores']  # type: ignore[index]
+            config=self.tasks_config['research_affiliate_stores']  # type: ignore[index]
         )
 
     def selection(self) -> Task:
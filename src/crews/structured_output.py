@@ -0,0 +1,141 @@
+"""
+Módulo para leitura das saídas estruturadas das crews.
+Valida a resposta contra modelos pydantic em uma única passagem e, quando a
+resposta vem malformada, faz uma única tentativa de reparo com o LLM em vez
+de executar a crew novamente.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, List, Optional, Type, TypeVar
+
+from crewai import CrewOutput
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(item_model: Type[BaseModel]) -> TypeAdapter:
+    """Retorna (em cache) o TypeAdapter que valida uma lista inteira de itens."""
+    return TypeAdapter(List[item_model])
+
+
+def _list_field(model: Type[BaseModel]) -> tuple:
+    """Identifica o campo de lista do modelo e o tipo dos seus itens."""
+    for name, field in model.model_fields.items():
+        args = getattr(field.annotation, "__args__", ())
+        if getattr(field.annotation, "__origin__", None) is list and args:
+            return name, args[0]
+    raise TypeError(f"{model.__name__} não possui um campo de lista")
+
+
+def _extract_json(text: str) -> Any:
+    """
+    Extrai o JSON de uma resposta de LLM, com ou sem bloco de código.
+
+    Args:
+        text: Resposta bruta
+
+    Returns:
+        Any: Objeto JSON decodificado
+
+    Raises:
+        ValueError: Se nenhum JSON válido for encontrado
+    """
+    fenced = _FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+    text = text.strip()
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("Nenhum JSON encontrado na resposta")
+    start = min(starts)
+    end = text.rfind("}" if text[start] == "{" else "]")
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON inválido na resposta: {e}") from e
+
+
+def validate_output(text: str, model: Type[T]) -> T:
+    """
+    Valida uma resposta textual contra o modelo.
+    Aceita tanto o objeto completo quanto apenas a lista de itens.
+
+    Args:
+        text: Resposta bruta do LLM
+        model: Modelo pydantic com um campo de lista
+
+    Returns:
+        T: Instância validada do modelo
+
+    Raises:
+        ValueError: Se a resposta não puder ser validada
+    """
+    field_name, item_model = _list_field(model)
+    data = _extract_json(text)
+    if isinstance(data, dict):
+        data = data.get(field_name, data)
+    if not isinstance(data, list):
+        raise ValueError(f"Esperada uma lista em '{field_name}'")
+
+    try:
+        items = _list_adapter(item_model).validate_python(data)
+    except ValidationError as e:
+        raise ValueError(str(e)) from e
+    return model(**{field_name: items})
+
+
+def parse_structured_output(result: Any, model: Type[T], llm: Optional[Any] = None) -> T:
+    """
+    Converte o resultado de uma crew no modelo esperado.
+    Usa a saída pydantic da crew quando disponível; caso contrário valida o
+    texto bruto e, se falhar, pede ao LLM uma única correção.
+
+    Args:
+        result: CrewOutput ou texto retornado pela crew
+        model: Modelo pydantic esperado
+        llm: LLM usado na tentativa de reparo (opcional)
+
+    Returns:
+        T: Instância validada do modelo
+
+    Raises:
+        ValueError: Se a resposta (e o reparo) não puderem ser validados
+    """
+    if isinstance(result, CrewOutput):
+        if isinstance(result.pydantic, model):
+            return result.pydantic
+        text = result.raw
+    else:
+        text = str(result)
+
+    try:
+        return validate_output(text, model)
+    except ValueError as error:
+        if llm is None:
+            raise
+        repaired = llm.call([{"role": "user", "content": _repair_prompt(text, model, error)}])
+        return validate_output(str(repaired), model)
+
+
+def _repair_prompt(text: str, model: Type[BaseModel], error: Exception) -> str:
+    """Monta o prompt de reparo de uma resposta malformada."""
+    schema = json.dumps(model.model_json_schema(), ensure_ascii=False)
+    return (
+        "The answer below should be JSON matching the schema, but it failed validation.\n"
+        f"Schema:\n{schema}\n\n"
+        f"Validation error:\n{error}\n\n"
+        f"Answer:\n{text}\n\n"
+        "Return only the corrected JSON, without comments or code fences."
+    )
@@ -1,21 +1,61 @@
 # /main.py
+import argparse
 import os
 
 from dotenv import load_dotenv
 
+from src.crews.discover_and_score_stores import find_and_score_stores
 from src.crews.product_discovery_crew import ProductDiscoveryCrew
 from src.crews.store_selection_crew import ResearchStores
+from src.tools.product_spool import validate_run_id
+from src.utils import metrics
+from src.utils.MyLLM import MyLLM
+from src.utils.run_ledger import RunLedger
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
 def main():
+    parser = argparse.ArgumentParser(description="Pipeline de povoamento de lojas e produtos")
+    parser.add_argument("--mode", choices=["crew", "pipeline"], default="crew",
+                        help="'pipeline' usa agentes apenas para pesquisa e curadoria e processa "
+                             "as lojas em paralelo; 'crew' as percorre em sequência")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Lojas processadas em paralelo no modo pipeline")
+    parser.add_argument("--store-timeout", type=float, default=None,
+                        help="Prazo em segundos por loja no modo pipeline")
+    parser.add_argument("--run-id", default=None, type=validate_run_id,
+                        help="Retoma a execução indicada a partir da última etapa concluída")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Não reaproveita checkpoints de execuções com as mesmas entradas")
+    parser.add_argument("--review", action="store_true",
+                        help="Pontua os produtos e exporta um lote de revisão ao final")
+    args = parser.parse_args()
+
     # Parâmetros do fluxo
     country = 'Brasil'
     period = 'junho de 2024 a maio 2025'
     niche = 'produtos infantís'
     inputs = {"country": country, "period": period, "niche": niche}
 
+    if args.mode == "pipeline":
+        ledger = RunLedger(run_id=args.run_id, reuse=not args.fresh)
+        print(f'Execução: {ledger.run_id}')
+
+        with metrics.run_scope(ledger.run_id):
+            stores = ledger.stage("stores", inputs, lambda: find_and_score_stores(
+                country=country, period=period, niche=niche, llm=MyLLM.for_task("research")
+            ))
+            print(f'Lojas Selecionadas:\n{stores}\n')
+
+            final_result = ProductDiscoveryCrew().run_pipeline(
+                inputs, stores, max_workers=args.concurrency, store_timeout=args.store_timeout,
+                ledger=ledger, review=args.review
+            )
+        print(f'Resultado Final:\n{final_result}')
+        print(f'Métricas da execução: runs/{ledger.run_id}/metrics.json')
+        return
+
     # Etapa 1: Seleção de lojas
     store_selection_crew = ResearchStores().store_selection_crew()
     store_result = store_selection_crew().kickoff(inputs=inputs)
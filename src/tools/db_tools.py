@@ -4,6 +4,7 @@ from crewai.tools import tool
 
 from src.app.db.insert_affiliate_stores import insert_affiliate_stores
 from src.app.db.insert_products import insert_products
+from src.tools.product_spool import load_spooled_products
 
 
 @tool('InsertAffiliateStoresTool')
@@ -33,3 +34,19 @@ def insert_products_tool(products_by_store: Dict[str, List[Dict]]) -> str:
         return f"{total_inserted} products inserted across {len(products_by_store)} stores."
     except Exception as e:
         return f"Failed to insert products: {e}"
+
+
+@tool('InsertSpooledProductsTool')
+def insert_spooled_products_tool(spool_by_store: Dict[str, str]) -> str:
+    """
+    Insert spooled products into the database.
+    The key must be the store name, and the value must be the spool handle returned by ScrapeStoreProductsTool.
+    """
+    total_inserted = 0
+    try:
+        for store_name, handle in spool_by_store.items():
+            inserted = insert_products(products_data=load_spooled_products(handle), affiliate_store_name=store_name)
+            total_inserted += len(inserted)
+        return f"{total_inserted} products inserted across {len(spool_by_store)} stores."
+    except Exception as e:
+        return f"Failed to insert spooled products: {e}"
@@ -1,24 +1,38 @@
-from typing import List
+import json
+import time
+from typing import Any, Dict, List, Optional
 
-import requests
 from bs4 import BeautifulSoup
 from crewai.tools import tool
 
+from src.tools.product_spool import spool_products
+from src.tools.tool_pool import get_http_session
+from src.utils.metrics import instrument
 
-@tool("ScrapeStoreProductsTool")
-def scrape_store_products(store_url: str, product_names: List[str]) -> str:
+
+@instrument("tool", "scrape_store_products")
+def scrape_products(store_url: str,
+                    product_names: List[str],
+                    limit: int = 100,
+                    deadline: Optional[float] = None) -> List[Dict[str, Any]]:
     """
-    Acessa a loja pela URL e coleta até 100 produtos relacionados aos nomes fornecidos.
-    Retorna os produtos em formato JSON prontos para uso com ProductCreate.
+    Acessa a loja pela URL e coleta até `limit` produtos relacionados aos nomes fornecidos.
+    Retorna os produtos como dicionários no formato ProductCreate.
+    Com `deadline` (time.monotonic), interrompe a coleta ao atingir o prazo e
+    devolve o que já foi coletado.
     """
     scraped_products = []
-    
+
     for name in product_names:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        timeout = None if deadline is None else max(1.0, deadline - time.monotonic())
+
         # Exemplo genérico de scraping
-        response = requests.get(f"{store_url}/search?q={name}")
+        response = get_http_session().get(f"{store_url}/search?q={name}", timeout=timeout)
         if response.status_code != 200:
             continue
-        
+
         soup = BeautifulSoup(response.text, "html.parser")
         items = soup.select(".product")  # ajustar conforme a loja real
 
@@ -40,7 +54,23 @@ def scrape_store_products(store_url: str, product_names: List[str]) -> str:
             except Exception as e:
                 continue
 
-            if len(scraped_products) >= 100:
+            if len(scraped_products) >= limit:
                 break
 
-    return str(scraped_products[:100])
+        if len(scraped_products) >= limit:
+            break
+
+    return scraped_products[:limit]
+
+
+@tool("ScrapeStoreProductsTool")
+def scrape_store_products(store_url: str, product_names: List[str], run_id: str = "") -> str:
+    """
+    Acessa a loja pela URL e coleta até 100 produtos relacionados aos nomes fornecidos.
+    Os produtos são gravados em um spool e a ferramenta retorna apenas um resumo JSON
+    com o handle do spool, que deve ser repassado ao InsertSpooledProductsTool.
+    Use o mesmo run_id para todas as lojas de uma mesma execução.
+    """
+    products = scrape_products(store_url, product_names)
+    summary = spool_products(products, store_url, run_id=run_id or None)
+    return json.dumps(summary, ensure_ascii=False)
@@ -0,0 +1,142 @@
+"""
+Módulo de spool de produtos coletados.
+Grava os produtos de cada loja em arquivos NDJSON por execução, para que
+apenas um handle compacto (e não o payload completo) passe pelos agentes.
+"""
+
+import json
+import os
+import re
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+SPOOL_DIR = os.getenv("PRODUCT_SPOOL_DIR", "./spool")
+
+# Handles têm o formato "<run_id>/<arquivo>.ndjson" e chegam via LLM,
+# então são validados antes de qualquer acesso ao disco.
+_HANDLE_PATTERN = re.compile(r"^[\w-]+/[\w.-]+\.ndjson$")
+# Identificadores de execução viram nomes de diretório (spool, runs/) e chegam
+# pela API e pela CLI, então só letras ASCII, dígitos, "_" e "-" são aceitos.
+_RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def new_run_id() -> str:
+    """
+    Gera um identificador único para uma execução do pipeline.
+
+    Returns:
+        str: Identificador no formato "<timestamp>_<sufixo>"
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{uuid.uuid4().hex[:8]}"
+
+
+def validate_run_id(run_id: str) -> str:
+    """
+    Valida um identificador de execução antes de usá-lo em caminhos.
+
+    Args:
+        run_id: Identificador recebido
+
+    Returns:
+        str: O próprio identificador
+
+    Raises:
+        ValueError: Se o identificador for inválido
+    """
+    if not isinstance(run_id, str) or not _RUN_ID_PATTERN.match(run_id):
+        raise ValueError(f"Identificador de execução inválido: {run_id!r}")
+    return run_id
+
+
+def _slugify(value: str) -> str:
+    """Converte uma URL ou nome de loja em um nome de arquivo seguro."""
+    value = re.sub(r"^https?://", "", value.lower())
+    slug = re.sub(r"[^a-z0-9]+", "-", value).strip("-")
+    return slug[:80] or "store"
+
+
+def spool_path(handle: str) -> str:
+    """
+    Resolve o caminho em disco de um handle de spool.
+
+    Args:
+        handle: Handle retornado por spool_products
+
+    Returns:
+        str: Caminho do arquivo NDJSON
+
+    Raises:
+        ValueError: Se o handle for inválido
+    """
+    if not isinstance(handle, str) or not _HANDLE_PATTERN.match(handle):
+        raise ValueError(f"Handle de spool inválido: {handle!r}")
+    return os.path.join(SPOOL_DIR, handle)
+
+
+def spool_products(products: Iterable[Dict[str, Any]],
+                   store_url: str,
+                   run_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Grava os produtos de uma loja no spool da execução.
+
+    Args:
+        products: Produtos no formato ProductCreate
+        store_url: URL da loja de origem
+        run_id: Identificador da execução (gerado se não fornecido)
+
+    Returns:
+        Dict[str, Any]: Resumo com handle, quantidade e categorias
+    """
+    run_id = _slugify(run_id) if run_id else new_run_id()
+    handle = f"{run_id}/{_slugify(store_url)}.ndjson"
+    file_path = spool_path(handle)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    count = 0
+    categories = Counter()
+    with open(file_path, "w", encoding="utf-8") as spool_file:
+        for product in products:
+            spool_file.write(json.dumps(product, ensure_ascii=False))
+            spool_file.write("\n")
+            count += 1
+            categories[product.get("category") or "sem categoria"] += 1
+
+    return {
+        "handle": handle,
+        "store_url": store_url,
+        "count": count,
+        "categories": dict(categories),
+    }
+
+
+def iter_spooled_products(handle: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lê os produtos de um spool linha a linha.
+
+    Args:
+        handle: Handle retornado por spool_products
+
+    Yields:
+        Dict[str, Any]: Produto no formato ProductCreate
+    """
+    with open(spool_path(handle), "r", encoding="utf-8") as spool_file:
+        for line in spool_file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def load_spooled_products(handle: str) -> List[Dict[str, Any]]:
+    """
+    Carrega todos os produtos de um spool.
+
+    Args:
+        handle: Handle retornado por spool_products
+
+    Returns:
+        List[Dict[str, Any]]: Lista de produtos
+    """
+    return list(iter_spooled_products(handle))
@@ -0,0 +1,214 @@
+"""
+Cliente Serper com cache, coalescência e envio em lote.
+Normaliza consulta, localidade e quantidade de resultados; guarda respostas
+em disco com TTL; compartilha uma única requisição entre chamadas idênticas
+simultâneas e agrupa consultas pendentes no endpoint de múltiplas buscas.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+from src.utils import metrics
+from src.utils.sqlite_cache import SQLiteCache
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+SERPER_BASE_URL = os.getenv("SERPER_BASE_URL", "https://google.serper.dev")
+SERPER_CACHE_PATH = os.getenv("SERPER_CACHE_PATH", "./.cache/serper_cache.sqlite3")
+SERPER_CACHE_TTL = float(os.getenv("SERPER_CACHE_TTL", str(24 * 3600)))
+# Janela (segundos) em que consultas pendentes são agrupadas em um único envio
+SERPER_BATCH_WINDOW = float(os.getenv("SERPER_BATCH_WINDOW", "0.05"))
+SERPER_BATCH_MAX = int(os.getenv("SERPER_BATCH_MAX", "20"))
+SERPER_TIMEOUT = float(os.getenv("SERPER_TIMEOUT", "10"))
+
+
+class SerperClient:
+    """
+    Cliente da API Serper compartilhável entre threads.
+    """
+
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 base_url: str = SERPER_BASE_URL,
+                 cache: Optional[SQLiteCache] = None,
+                 batch_window: float = SERPER_BATCH_WINDOW,
+                 batch_max: int = SERPER_BATCH_MAX,
+                 timeout: float = SERPER_TIMEOUT,
+                 session: Optional[requests.Session] = None):
+        """
+        Inicializa o cliente.
+
+        Args:
+            api_key: Chave da API (padrão: SERPER_API_KEY)
+            base_url: URL base da API (ou do servidor substituto local)
+            cache: Cache de respostas (padrão: SQLite em SERPER_CACHE_PATH)
+            batch_window: Tempo de espera para agrupar consultas (0 envia imediatamente)
+            batch_max: Máximo de consultas por requisição em lote
+            timeout: Timeout das requisições em segundos
+            session: Sessão HTTP a ser reutilizada
+        """
+        self.api_key = api_key or os.getenv("SERPER_API_KEY", "")
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache if cache is not None else SQLiteCache(SERPER_CACHE_PATH, ttl_seconds=SERPER_CACHE_TTL)
+        self.batch_window = batch_window
+        self.batch_max = batch_max
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.requests_sent = 0
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._pending: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+
+    @staticmethod
+    def normalize(query: str,
+                  num: int = 10,
+                  gl: Optional[str] = None,
+                  hl: Optional[str] = None,
+                  location: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Monta o payload canônico de uma consulta.
+
+        Args:
+            query: Texto da busca
+            num: Quantidade de resultados
+            gl: País (ex.: "br")
+            hl: Idioma (ex.: "pt-br")
+            location: Localização textual
+
+        Returns:
+            Dict[str, Any]: Payload normalizado
+        """
+        payload = {"q": " ".join(query.lower().split()), "num": int(num)}
+        if gl:
+            payload["gl"] = gl.lower()
+        if hl:
+            payload["hl"] = hl.lower()
+        if location:
+            payload["location"] = " ".join(location.split())
+        return payload
+
+    @staticmethod
+    def cache_key(payload: Dict[str, Any], search_type: str = "search") -> str:
+        """Chave de cache de um payload normalizado."""
+        return f"{search_type}:{json.dumps(payload, sort_keys=True, ensure_ascii=False)}"
+
+    def search(self, query: str, num: int = 10, gl: Optional[str] = None, hl: Optional[str] = None,
+               location: Optional[str] = None, search_type: str = "search") -> Dict[str, Any]:
+        """
+        Executa uma busca, usando cache e requisições compartilhadas quando possível.
+
+        Args:
+            query: Texto da busca
+            num: Quantidade de resultados
+            gl: País
+            hl: Idioma
+            location: Localização textual
+            search_type: "search" ou "news"
+
+        Returns:
+            Dict[str, Any]: Resposta da API Serper
+        """
+        payload = self.normalize(query, num, gl, hl, location)
+        return self._submit([payload], search_type)[0].result(timeout=self.timeout * 3)
+
+    def search_many(self, queries: List[Dict[str, Any]], search_type: str = "search") -> List[Dict[str, Any]]:
+        """
+        Executa várias buscas de uma vez, agrupando as que não estão em cache.
+
+        Args:
+            queries: Lista de dicionários com os argumentos de normalize()
+            search_type: "search" ou "news"
+
+        Returns:
+            List[Dict[str, Any]]: Respostas na mesma ordem das consultas
+        """
+        payloads = [self.normalize(**query) for query in queries]
+        futures = self._submit(payloads, search_type, flush=True)
+        return [future.result(timeout=self.timeout * 3) for future in futures]
+
+    def _submit(self, payloads: List[Dict[str, Any]], search_type: str, flush: bool = False) -> List[Future]:
+        """Registra as consultas e devolve um Future por consulta."""
+        futures = []
+        flush_now = flush or self.batch_window <= 0
+
+        with self._lock:
+            for payload in payloads:
+                key = self.cache_key(payload, search_type)
+                future = self._inflight.get(key)
+                if future is None:
+                    future = Future()
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        metrics.record("http", "serper", outcome="cache_hit")
+                        future.set_result(json.loads(cached))
+                    else:
+                        self._inflight[key] = future
+                        self._pending.setdefault(search_type, []).append((key, payload))
+                futures.append(future)
+
+            pending = self._pending.get(search_type, [])
+            if len(pending) >= self.batch_max:
+                flush_now = True
+            elif pending and not flush_now and search_type not in self._timers:
+                timer = threading.Timer(self.batch_window, self._flush, args=(search_type,))
+                timer.daemon = True
+                self._timers[search_type] = timer
+                timer.start()
+
+        if flush_now:
+            self._flush(search_type)
+        return futures
+
+    def _flush(self, search_type: str) -> None:
+        """Envia as consultas pendentes em lotes de até batch_max."""
+        with self._lock:
+            pending = self._pending.pop(search_type, [])
+            timer = self._timers.pop(search_type, None)
+        if timer is not None:
+            timer.cancel()
+
+        for start in range(0, len(pending), self.batch_max):
+            self._send(pending[start:start + self.batch_max], search_type)
+
+    def _send(self, batch: List[Tuple[str, Dict[str, Any]]], search_type: str) -> None:
+        """Faz a requisição (simples ou em lote) e resolve os Futures."""
+        keys = [key for key, _ in batch]
+        body: Any = batch[0][1] if len(batch) == 1 else [payload for _, payload in batch]
+
+        try:
+            with metrics.observe("http", "serper"):
+                response = self.session.post(
+                    f"{self.base_url}/{search_type}",
+                    headers={"X-API-KEY": self.api_key, "content-type": "application/json"},
+                    json=body,
+                    timeout=self.timeout
+                )
+                self.requests_sent += 1
+                response.raise_for_status()
+                results = response.json()
+                if len(batch) == 1:
+                    results = [results]
+                if not isinstance(results, list) or len(results) != len(batch):
+                    raise ValueError("Resposta em lote do Serper com tamanho inesperado")
+        except Exception as e:
+            with self._lock:
+                futures = [self._inflight.pop(key) for key in keys]
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        for key, result in zip(keys, results):
+            self.cache.set(key, json.dumps(result, ensure_ascii=False))
+        with self._lock:
+            futures = [self._inflight.pop(key) for key in keys]
+        for future, result in zip(futures, results):
+            future.set_result(result)
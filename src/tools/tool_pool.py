@@ -0,0 +1,161 @@
+"""
+Pool de ferramentas compartilhadas pelo processo.
+Entrega instâncias únicas e thread-safe do Serper e da busca em sites, além
+de uma sessão HTTP com pool de conexões reutilizada pelas ferramentas e do
+cliente Serper com cache em disco e envio em lote. A busca em sites usa o
+índice persistente de src.tools.website_index.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Type
+
+import requests
+from crewai.tools import BaseTool
+from crewai_tools import SerperDevTool
+from pydantic import BaseModel, Field
+from requests.adapters import HTTPAdapter
+
+from src.tools.serper_client import SerperClient
+from src.utils import metrics
+
+# Conexões mantidas por host na sessão HTTP compartilhada
+TOOL_HTTP_POOL_SIZE = int(os.getenv("TOOL_HTTP_POOL_SIZE", "20"))
+SERPER_TIMEOUT = float(os.getenv("SERPER_TIMEOUT", "10"))
+
+_lock = threading.Lock()
+_http_session: Optional[requests.Session] = None
+_serper_client: Optional[SerperClient] = None
+_serper_tools: Dict[int, SerperDevTool] = {}
+_website_search_tool: Optional[BaseTool] = None
+_website_index = None
+
+
+def get_http_session() -> requests.Session:
+    """
+    Retorna a sessão HTTP compartilhada, com keep-alive e pool de conexões.
+
+    Returns:
+        requests.Session: Sessão única do processo
+    """
+    global _http_session
+    if _http_session is None:
+        with _lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=TOOL_HTTP_POOL_SIZE, pool_maxsize=TOOL_HTTP_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def get_serper_client() -> SerperClient:
+    """
+    Retorna o cliente Serper compartilhado (cache, coalescência e lotes).
+
+    Returns:
+        SerperClient: Cliente único do processo
+    """
+    global _serper_client
+    if _serper_client is None:
+        session = get_http_session()
+        with _lock:
+            if _serper_client is None:
+                _serper_client = SerperClient(timeout=SERPER_TIMEOUT, session=session)
+    return _serper_client
+
+
+class PooledSerperDevTool(SerperDevTool):
+    """SerperDevTool que consulta pelo cliente Serper compartilhado."""
+
+    def _make_api_request(self, search_query: str, search_type: str) -> Dict[str, Any]:
+        # Valida o tipo de busca ("search" ou "news")
+        self._get_search_url(search_type)
+        results = get_serper_client().search(
+            search_query,
+            num=self.n_results,
+            gl=self.country or None,
+            hl=self.locale or None,
+            location=self.location or None,
+            search_type=search_type
+        )
+        if not results:
+            raise ValueError("Empty response from Serper API")
+        return results
+
+
+class WebsiteSearchToolSchema(BaseModel):
+    """Entrada da busca em sites."""
+
+    search_query: str = Field(..., description="Mandatory search query you want to use to search a specific website")
+    website: str = Field(..., description="Mandatory valid website URL you want to search on")
+
+
+class IndexedWebsiteSearchTool(BaseTool):
+    """Busca semântica em sites sobre o índice persistente e deduplicado."""
+
+    name: str = "Search in a specific website"
+    description: str = "A tool that can be used to semantic search a query from a specific URL content."
+    args_schema: Type[BaseModel] = WebsiteSearchToolSchema
+    limit: int = 5
+
+    def _run(self, search_query: str, website: Optional[str] = None, **kwargs: Any) -> str:
+        with metrics.observe("tool", "website_search"):
+            hits = get_website_index().query(search_query, url=website, limit=self.limit)
+        if not hits:
+            return "No relevant content found."
+        return "\n\n".join(f"[{hit['url']}]\n{hit['text']}" for hit in hits)
+
+
+def get_website_index():
+    """
+    Retorna o índice de páginas compartilhado pelo processo.
+
+    Returns:
+        WebsiteIndex: Instância única
+    """
+    global _website_index
+    if _website_index is None:
+        with _lock:
+            if _website_index is None:
+                from src.tools.website_index import WebsiteIndex
+
+                _website_index = WebsiteIndex()
+    return _website_index
+
+
+def get_serper_tool(n_results: int = 10) -> SerperDevTool:
+    """
+    Retorna a ferramenta Serper compartilhada para a quantidade de resultados.
+
+    Args:
+        n_results: Quantidade de resultados por busca
+
+    Returns:
+        SerperDevTool: Instância compartilhada
+    """
+    tool = _serper_tools.get(n_results)
+    if tool is None:
+        with _lock:
+            tool = _serper_tools.get(n_results)
+            if tool is None:
+                tool = PooledSerperDevTool(n_results=n_results)
+                _serper_tools[n_results] = tool
+    return tool
+
+
+def get_website_search_tool() -> BaseTool:
+    """
+    Retorna a ferramenta de busca em sites compartilhada.
+    O índice de embeddings é aberto uma única vez por processo.
+
+    Returns:
+        BaseTool: Instância compartilhada
+    """
+    global _website_search_tool
+    if _website_search_tool is None:
+        with _lock:
+            if _website_search_tool is None:
+                _website_search_tool = IndexedWebsiteSearchTool()
+    return _website_search_tool
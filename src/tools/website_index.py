@@ -0,0 +1,358 @@
+"""
+Índice persistente de páginas para busca semântica em sites.
+Cada página é identificada pela URL canônica e pelo hash do conteúdo: páginas
+inalteradas nunca são reprocessadas. Os embeddings ficam em coleções Chroma
+por domínio e um manifesto SQLite controla validade, tamanho e uso, permitindo
+atualizar páginas antigas e remover as menos usadas quando o índice passa do limite.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+WEBSITE_INDEX_PATH = os.getenv("WEBSITE_INDEX_PATH", "./db/website_index")
+WEBSITE_INDEX_MAX_AGE = float(os.getenv("WEBSITE_INDEX_MAX_AGE", str(7 * 24 * 3600)))
+WEBSITE_INDEX_MAX_CHUNKS = int(os.getenv("WEBSITE_INDEX_MAX_CHUNKS", "50000"))
+WEBSITE_INDEX_CHUNK_SIZE = int(os.getenv("WEBSITE_INDEX_CHUNK_SIZE", "1000"))
+WEBSITE_INDEX_CHUNK_OVERLAP = int(os.getenv("WEBSITE_INDEX_CHUNK_OVERLAP", "100"))
+WEBSITE_INDEX_EMBEDDING_MODEL = os.getenv("WEBSITE_INDEX_EMBEDDING_MODEL", "text-embedding-3-small")
+
+# Parâmetros HNSW: grafo mais denso na construção e busca rápida com boa revocação
+HNSW_CONFIGURATION = {
+    "space": "cosine",
+    "ef_construction": int(os.getenv("WEBSITE_INDEX_EF_CONSTRUCTION", "200")),
+    "max_neighbors": int(os.getenv("WEBSITE_INDEX_MAX_NEIGHBORS", "32")),
+    "ef_search": int(os.getenv("WEBSITE_INDEX_EF_SEARCH", "64")),
+}
+
+# Parâmetros de rastreamento descartados na URL canônica (nomes exatos e prefixos)
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "ref", "mc_cid", "mc_eid"})
+TRACKING_PREFIXES = ("utm_",)
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normaliza uma URL: esquema e host em minúsculas, sem fragmento, porta padrão,
+    parâmetros de rastreamento ou barra final; parâmetros restantes ordenados.
+
+    Args:
+        url: URL original
+
+    Returns:
+        str: URL canônica
+    """
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def content_hash(text: str) -> str:
+    """Hash SHA-256 do texto com espaços normalizados."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def chunk_text(text: str, size: int = WEBSITE_INDEX_CHUNK_SIZE, overlap: int = WEBSITE_INDEX_CHUNK_OVERLAP) -> List[str]:
+    """
+    Divide o texto em trechos de até `size` caracteres com sobreposição.
+
+    Args:
+        text: Texto da página
+        size: Tamanho máximo de cada trecho
+        overlap: Caracteres repetidos entre trechos consecutivos
+
+    Returns:
+        List[str]: Trechos não vazios
+    """
+    text = " ".join(text.split())
+    step = max(1, size - overlap)
+    return [text[i:i + size] for i in range(0, len(text), step) if text[i:i + size].strip()]
+
+
+def fetch_page_text(url: str) -> str:
+    """
+    Baixa a página e extrai o texto visível.
+
+    Args:
+        url: URL da página
+
+    Returns:
+        str: Texto da página
+    """
+    from bs4 import BeautifulSoup
+
+    from src.tools.tool_pool import get_http_session
+
+    response = get_http_session().get(url, timeout=15)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, "html.parser")
+    for tag in soup(["script", "style", "noscript", "svg"]):
+        tag.decompose()
+    return soup.get_text(" ", strip=True)
+
+
+def _default_embedding_function():
+    from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+
+    return OpenAIEmbeddingFunction(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        model_name=WEBSITE_INDEX_EMBEDDING_MODEL
+    )
+
+
+class WebsiteIndex:
+    """
+    Índice de páginas com coleções por domínio e manifesto de controle.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_age: float = WEBSITE_INDEX_MAX_AGE,
+                 max_chunks: int = WEBSITE_INDEX_MAX_CHUNKS,
+                 embedding_function: Any = None,
+                 fetcher: Callable[[str], str] = fetch_page_text):
+        """
+        Inicializa o índice.
+
+        Args:
+            path: Diretório do armazenamento Chroma e do manifesto (padrão:
+                  WEBSITE_INDEX_PATH lido do ambiente na criação do índice)
+            max_age: Idade (segundos) a partir da qual a página é baixada de novo
+            max_chunks: Limite de trechos no índice antes da remoção por LRU
+            embedding_function: Função de embeddings (padrão: OpenAI)
+            fetcher: Função que retorna o texto de uma URL
+        """
+        import chromadb
+
+        # Lido aqui, e não na importação: src/batch.py define o path de cada vaga
+        # no processo filho depois que este módulo já foi importado
+        path = path or os.getenv("WEBSITE_INDEX_PATH", WEBSITE_INDEX_PATH)
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_age = max_age
+        self.max_chunks = max_chunks
+        self.fetcher = fetcher
+        self.embedding_function = embedding_function or _default_embedding_function()
+        self.client = chromadb.PersistentClient(path=path)
+
+        self._lock = threading.Lock()
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._collections: Dict[str, Any] = {}
+        # O Chroma persistente não suporta vários processos gravando no mesmo diretório:
+        # use um path por processo (ver src/batch.py). O timeout cobre leitores concorrentes.
+        self._manifest = sqlite3.connect(os.path.join(path, "manifest.sqlite3"), timeout=30, check_same_thread=False)
+        self._manifest.execute("PRAGMA journal_mode=WAL")
+        self._manifest.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                collection TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                chunks INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._manifest.commit()
+
+    @staticmethod
+    def collection_name(url: str) -> str:
+        """Nome da coleção Chroma do domínio da URL."""
+        host = urlsplit(canonical_url(url)).hostname or "unknown"
+        if host.startswith("www."):
+            host = host[4:]
+        name = re.sub(r"[^a-zA-Z0-9]+", "_", host).strip("_")[:56]
+        return f"site_{name or 'unknown'}"
+
+    def _collection(self, name: str):
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self.client.get_or_create_collection(
+                name=name,
+                configuration={"hnsw": HNSW_CONFIGURATION},
+                embedding_function=self.embedding_function
+            )
+            self._collections[name] = collection
+        return collection
+
+    def _page(self, url: str) -> Optional[tuple]:
+        with self._lock:
+            return self._manifest.execute(
+                "SELECT collection, content_hash, chunks, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    @staticmethod
+    def _chunk_ids(url: str, chunks: int) -> List[str]:
+        prefix = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return [f"{prefix}:{i}" for i in range(chunks)]
+
+    def ensure(self, url: str) -> str:
+        """
+        Garante que a página está indexada e atualizada.
+        Páginas dentro do prazo de validade não são baixadas; páginas baixadas
+        com o mesmo hash de conteúdo não geram novos embeddings. A URL canônica
+        é só a chave do índice: o download usa a URL pedida.
+
+        Args:
+            url: URL da página
+
+        Returns:
+            str: URL canônica indexada
+        """
+        source_url = url.strip() if "://" in url else f"https://{url.strip()}"
+        url = canonical_url(url)
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        with url_lock:
+            now = time.time()
+            page = self._page(url)
+            if page and now - page[3] < self.max_age:
+                self._touch(url, now)
+                return url
+
+            text = self.fetcher(source_url)
+            digest = content_hash(text)
+            if page and page[1] == digest:
+                with self._lock:
+                    self._manifest.execute(
+                        "UPDATE pages SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url)
+                    )
+                    self._manifest.commit()
+                return url
+
+            name = self.collection_name(url)
+            collection = self._collection(name)
+            if page:
+                collection.delete(ids=self._chunk_ids(url, page[2]))
+
+            chunks = chunk_text(text)
+            if chunks:
+                collection.add(
+                    ids=self._chunk_ids(url, len(chunks)),
+                    documents=chunks,
+                    metadatas=[{"url": url, "content_hash": digest} for _ in chunks]
+                )
+            with self._lock:
+                self._manifest.execute(
+                    "INSERT OR REPLACE INTO pages (url, collection, content_hash, chunks, size, fetched_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, name, digest, len(chunks), len(text), now, now)
+                )
+                self._manifest.commit()
+
+        self.enforce_limit()
+        return url
+
+    def _touch(self, url: str, now: float) -> None:
+        with self._lock:
+            self._manifest.execute("UPDATE pages SET last_access = ? WHERE url = ?", (now, url))
+            self._manifest.commit()
+
+    def query(self, question: str, url: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Busca os trechos mais próximos da pergunta.
+
+        Args:
+            question: Texto da busca
+            url: Página a consultar (indexada sob demanda); sem URL busca em todo o índice
+            limit: Quantidade de trechos
+
+        Returns:
+            List[Dict[str, Any]]: Trechos com "url", "text" e "distance"
+        """
+        if url:
+            url = self.ensure(url)
+            targets = [(self.collection_name(url), {"url": url})]
+        else:
+            with self._lock:
+                names = [row[0] for row in self._manifest.execute("SELECT DISTINCT collection FROM pages")]
+            targets = [(name, None) for name in names]
+
+        hits = []
+        for name, where in targets:
+            collection = self._collection(name)
+            if collection.count() == 0:
+                continue
+            result = collection.query(query_texts=[question], n_results=limit, where=where)
+            for text, metadata, distance in zip(result["documents"][0], result["metadatas"][0], result["distances"][0]):
+                hits.append({"url": metadata.get("url"), "text": text, "distance": distance})
+
+        hits.sort(key=lambda hit: hit["distance"])
+        return hits[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        """Totais de páginas, trechos e bytes de texto indexados."""
+        with self._lock:
+            pages, chunks, size = self._manifest.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chunks), 0), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        return {"pages": pages, "chunks": chunks, "bytes": size}
+
+    def evict(self, url: str) -> None:
+        """Remove uma página do índice e do manifesto."""
+        url = canonical_url(url)
+        page = self._page(url)
+        if not page:
+            return
+        self._collection(page[0]).delete(ids=self._chunk_ids(url, page[2]))
+        with self._lock:
+            self._manifest.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._manifest.commit()
+
+    def enforce_limit(self) -> int:
+        """
+        Remove as páginas menos acessadas até o índice caber em max_chunks
+        e compacta o armazenamento se algo foi removido.
+
+        Returns:
+            int: Quantidade de páginas removidas
+        """
+        with self._lock:
+            total = self._manifest.execute("SELECT COALESCE(SUM(chunks), 0) FROM pages").fetchone()[0]
+            if total <= self.max_chunks:
+                return 0
+            rows = self._manifest.execute("SELECT url, chunks FROM pages ORDER BY last_access").fetchall()
+
+        evicted = 0
+        for url, chunks in rows:
+            if total <= self.max_chunks:
+                break
+            self.evict(url)
+            total -= chunks
+            evicted += 1
+
+        self.compact()
+        return evicted
+
+    def compact(self) -> None:
+        """Remove coleções vazias e compacta o manifesto."""
+        with self._lock:
+            used = {row[0] for row in self._manifest.execute("SELECT DISTINCT collection FROM pages")}
+            for collection in self.client.list_collections():
+                name = getattr(collection, "name", collection)
+                if name.startswith("site_") and name not in used:
+                    self.client.delete_collection(name)
+                    self._collections.pop(name, None)
+            self._manifest.execute("VACUUM")
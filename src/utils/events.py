@@ -0,0 +1,219 @@
+"""
+Barramento de eventos de progresso das execuções.
+Etapas do pipeline e callbacks de passo/tarefa das crews publicam eventos na
+execução corrente (metrics.current_run_id); clientes assinam a execução e
+recebem o histórico já emitido seguido dos novos eventos (ver /run-complete-discovery/stream).
+"""
+
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from src.utils.metrics import current_run_id
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Eventos mantidos por execução para quem assina depois do início
+EVENTS_HISTORY = int(os.getenv("EVENTS_HISTORY", "1000"))
+# Segundos que uma execução encerrada continua disponível para assinatura
+EVENTS_RETENTION = float(os.getenv("EVENTS_RETENTION", "900"))
+# Intervalo dos comentários keep-alive do SSE
+EVENTS_KEEPALIVE = float(os.getenv("EVENTS_KEEPALIVE", "15"))
+
+FINAL_EVENTS = ("done", "error")
+
+
+class _RunChannel:
+    def __init__(self):
+        self.history: List[Dict[str, Any]] = []
+        self.subscribers: List[queue.Queue] = []
+        self.closed_at: Optional[float] = None
+        self.cancelled = threading.Event()
+
+
+class EventBus:
+    """
+    Publicação e assinatura de eventos por execução.
+    """
+
+    def __init__(self, history: int = EVENTS_HISTORY, retention: float = EVENTS_RETENTION):
+        self.history = history
+        self.retention = retention
+        self._channels: Dict[str, _RunChannel] = {}
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for run_id, channel in list(self._channels.items()):
+            if channel.closed_at is not None and now - channel.closed_at > self.retention:
+                del self._channels[run_id]
+
+    def open(self, run_id: str) -> bool:
+        """
+        Passa a registrar os eventos da execução. A verificação e a criação são
+        atômicas: entre chamadas concorrentes, só uma abre a execução.
+
+        Args:
+            run_id: Execução
+
+        Returns:
+            bool: True se a execução foi aberta agora, False se já estava em andamento
+        """
+        with self._lock:
+            self._expire()
+            channel = self._channels.get(run_id)
+            if channel is not None and channel.closed_at is None:
+                return False
+            self._channels[run_id] = _RunChannel()
+            return True
+
+    def has_run(self, run_id: str) -> bool:
+        """Indica se há eventos registrados da execução (em andamento ou retidos)."""
+        return run_id in self._channels
+
+    def is_active(self, run_id: str) -> bool:
+        """Indica se a execução está aberta e ainda não terminou."""
+        channel = self._channels.get(run_id)
+        return channel is not None and channel.closed_at is None
+
+    def publish(self, run_id: str, event: str, data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Publica um evento para os assinantes da execução.
+
+        Args:
+            run_id: Execução
+            event: Nome do evento (ex.: store_inserted)
+            data: Dados serializáveis em JSON
+
+        Returns:
+            Optional[Dict[str, Any]]: Evento publicado, ou None se a execução não estiver aberta
+        """
+        with self._lock:
+            channel = self._channels.get(run_id)
+            if channel is None or channel.closed_at is not None:
+                return None
+            message = {"id": next(self._sequence), "event": event, "data": data or {}, "time": time.time()}
+            channel.history.append(message)
+            del channel.history[:-self.history]
+            if event in FINAL_EVENTS:
+                channel.closed_at = time.monotonic()
+            subscribers = list(channel.subscribers)
+        for subscriber in subscribers:
+            subscriber.put(message)
+        return message
+
+    def subscribe(self, run_id: str, keepalive: float = EVENTS_KEEPALIVE) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Itera sobre o histórico e os novos eventos até o evento final.
+        Produz None a cada `keepalive` segundos sem eventos.
+
+        Raises:
+            KeyError: Se a execução não tiver eventos registrados
+        """
+        with self._lock:
+            channel = self._channels.get(run_id)
+            if channel is None:
+                raise KeyError(run_id)
+            backlog = list(channel.history)
+            live: queue.Queue = queue.Queue()
+            if channel.closed_at is None:
+                channel.subscribers.append(live)
+
+        try:
+            last_id = 0
+            for message in backlog:
+                last_id = message["id"]
+                yield message
+                if message["event"] in FINAL_EVENTS:
+                    return
+            while True:
+                try:
+                    message = live.get(timeout=keepalive)
+                except queue.Empty:
+                    yield None
+                    continue
+                if message["id"] <= last_id:
+                    continue
+                yield message
+                if message["event"] in FINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                if live in channel.subscribers:
+                    channel.subscribers.remove(live)
+
+    def cancel(self, run_id: str) -> bool:
+        """Pede o cancelamento da execução; retorna False se ela não estiver aberta."""
+        with self._lock:
+            channel = self._channels.get(run_id)
+            if channel is None or channel.closed_at is not None:
+                return False
+            channel.cancelled.set()
+        self.publish(run_id, "cancel_requested")
+        return True
+
+    def is_cancelled(self, run_id: Optional[str]) -> bool:
+        channel = self._channels.get(run_id) if run_id else None
+        return bool(channel and channel.cancelled.is_set())
+
+
+bus = EventBus()
+
+
+def emit(event: str, **data: Any) -> None:
+    """Publica um evento na execução corrente (sem efeito fora de uma execução aberta)."""
+    run_id = current_run_id()
+    if run_id:
+        bus.publish(run_id, event, data)
+
+
+def cancel_requested() -> bool:
+    """Indica se o cliente pediu o cancelamento da execução corrente."""
+    return bus.is_cancelled(current_run_id())
+
+
+def format_sse(message: Optional[Dict[str, Any]]) -> str:
+    """Formata um evento (ou um keep-alive, para None) no protocolo Server-Sent Events."""
+    if message is None:
+        return ": keep-alive\n\n"
+    data = json.dumps(message["data"], ensure_ascii=False, default=str)
+    return f"id: {message['id']}\nevent: {message['event']}\ndata: {data}\n\n"
+
+
+def _short(text: Any, limit: int = 300) -> str:
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def step_callback(stage: str) -> Callable[[Any], None]:
+    """
+    Callback de passo para Crew(step_callback=...): publica cada ação dos agentes.
+
+    Args:
+        stage: Etapa do pipeline à qual a crew pertence
+    """
+    def _callback(step: Any) -> None:
+        emit("agent_step", stage=stage, tool=getattr(step, "tool", None),
+             thought=_short(getattr(step, "thought", "")))
+    return _callback
+
+
+def task_callback(stage: str) -> Callable[[Any], None]:
+    """
+    Callback de tarefa para Crew(task_callback=...): publica cada tarefa concluída.
+
+    Args:
+        stage: Etapa do pipeline à qual a crew pertence
+    """
+    def _callback(output: Any) -> None:
+        emit("task_completed", stage=stage, agent=getattr(output, "agent", None),
+             summary=_short(getattr(output, "raw", output)))
+    return _callback
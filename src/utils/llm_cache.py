@@ -0,0 +1,194 @@
+"""
+Cache persistente de respostas de LLM.
+Envolve instâncias de crewai.LLM para que prompts idênticos (mesmo modelo,
+mensagens normalizadas e ferramentas) sejam respondidos a partir do disco.
+"""
+
+import copy
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from crewai.llms.base_llm import BaseLLM
+from dotenv import load_dotenv
+
+from src.utils import metrics
+from src.utils.llm_scheduler import get_scheduler
+from src.utils.prompt_packing import count_tokens
+from src.utils.sqlite_cache import SQLiteCache
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./.cache/llm_cache.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_default_cache: Optional[SQLiteCache] = None
+
+
+def get_llm_cache() -> SQLiteCache:
+    """
+    Retorna o cache de respostas compartilhado pelo processo.
+
+    Returns:
+        SQLiteCache: Instância única do cache de LLM
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SQLiteCache(LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL, max_bytes=LLM_CACHE_MAX_BYTES)
+    return _default_cache
+
+
+def cache_bypass_enabled() -> bool:
+    """Indica se a variável LLM_CACHE_BYPASS pede execuções sem leitura do cache."""
+    return os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes", "sim")
+
+
+def _normalize_messages(messages: Any) -> List[Dict[str, Any]]:
+    """Converte as mensagens para uma forma canônica, sem variações de espaço."""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+
+    normalized = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            content = " ".join(content.split())
+        normalized.append({"role": message.get("role"), "content": content})
+    return normalized
+
+
+def make_cache_key(model: str, messages: Any, tools: Optional[List[Dict[str, Any]]] = None, **params: Any) -> str:
+    """
+    Gera a chave de cache de uma chamada de LLM.
+
+    Args:
+        model: Identificador do modelo
+        messages: Mensagens da chamada (string ou lista de dicionários)
+        tools: Esquemas das ferramentas disponíveis (opcional)
+        **params: Parâmetros adicionais que alteram a resposta (ex.: temperature)
+
+    Returns:
+        str: Hash SHA-256 da chamada normalizada
+    """
+    payload = {
+        "model": model,
+        "messages": _normalize_messages(messages),
+        "tools": tools or [],
+        "params": params,
+    }
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class CachedLLM(BaseLLM):
+    """
+    LLM que consulta o cache em disco antes de delegar a chamada ao modelo real.
+    Atributos não definidos aqui são repassados ao LLM envolvido.
+    """
+
+    def __init__(self, llm: BaseLLM, cache: Optional[SQLiteCache] = None, bypass: Optional[bool] = None,
+                 rate_key: Optional[str] = None):
+        """
+        Inicializa o wrapper de cache.
+
+        Args:
+            llm: Instância de crewai.LLM a ser envolvida
+            cache: Cache a ser utilizado (padrão: cache compartilhado do processo)
+            bypass: Se True, ignora leituras do cache mas continua gravando respostas
+            rate_key: Chave do provedor no agendador de limites (None: sem agendamento)
+        """
+        self._llm = llm
+        self._cache = cache
+        self.rate_key = rate_key
+        self.bypass = cache_bypass_enabled() if bypass is None else bypass
+        super().__init__(
+            model=llm.model,
+            temperature=getattr(llm, "temperature", None),
+            provider=getattr(llm, "provider", None),
+            stop=getattr(llm, "stop", None),
+        )
+
+    @property
+    def cache(self) -> SQLiteCache:
+        if self._cache is None:
+            self._cache = get_llm_cache()
+        return self._cache
+
+    @property
+    def stop(self) -> List[str]:
+        return self._llm.stop
+
+    @stop.setter
+    def stop(self, value: List[str]) -> None:
+        self._llm.stop = value
+
+    def with_stop(self, stop: List[str]) -> "CachedLLM":
+        """
+        Cópia do wrapper com outras stop words, sem alterar este modelo.
+        O modelo envolvido é copiado (rasa) e compartilha cache e limites com o original.
+        """
+        llm = copy.copy(self._llm)
+        llm.stop = list(stop)
+        return CachedLLM(llm, cache=self._cache, bypass=self.bypass, rate_key=self.rate_key)
+
+    @property
+    def is_litellm(self) -> bool:
+        return getattr(self._llm, "is_litellm", False)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ("_llm", "rate_key"):
+            raise AttributeError(name)
+        return getattr(self._llm, name)
+
+    def call(self,
+             messages: Any,
+             tools: Optional[List[Dict[str, Any]]] = None,
+             callbacks: Optional[List[Any]] = None,
+             available_functions: Optional[Dict[str, Any]] = None,
+             from_task: Any = None,
+             from_agent: Any = None,
+             response_model: Any = None) -> Any:
+        """
+        Responde a partir do cache quando possível; caso contrário chama o LLM.
+        Chamadas que executam funções ou pedem modelos estruturados não são armazenadas.
+        """
+        cacheable = available_functions is None and response_model is None
+        key = None
+        if cacheable:
+            key = make_cache_key(self.model, messages, tools, temperature=self.temperature, stop=self.stop)
+            if not self.bypass:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    metrics.record("llm", self.model, outcome="cache_hit")
+                    return json.loads(cached)
+
+        with metrics.observe("llm", self.model) as span:
+            # Só as chamadas que chegam ao provedor passam pelos limites de RPM/TPM
+            result = get_scheduler().call(self.rate_key, messages, lambda: self._llm.call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                response_model=response_model,
+            ))
+            span["tokens_in"] = count_tokens(json.dumps(_normalize_messages(messages), ensure_ascii=False))
+            span["tokens_out"] = count_tokens(result if isinstance(result, str) else json.dumps(result, default=str))
+            span["cost"] = metrics.llm_cost(self.model, span["tokens_in"], span["tokens_out"])
+
+        if cacheable and isinstance(result, str) and result:
+            self.cache.set(key, json.dumps(result, ensure_ascii=False))
+        return result
+
+    def supports_stop_words(self) -> bool:
+        return self._llm.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self._llm.get_context_window_size()
+
+    def get_token_usage_summary(self) -> Any:
+        return self._llm.get_token_usage_summary()
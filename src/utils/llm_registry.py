@@ -0,0 +1,159 @@
+"""
+Registro preguiçoso de modelos de linguagem.
+Os modelos são descritos em src/config/llms.yaml e só são instanciados no
+primeiro acesso; a instância é compartilhada por todas as crews do processo.
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+LLM_CONFIG_PATH = os.getenv(
+    "LLM_CONFIG_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "llms.yaml")
+)
+# Conexões HTTP mantidas abertas pelo cliente compartilhado
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+
+
+class LLMRegistry:
+    """
+    Registro thread-safe que cria cada modelo uma única vez, sob demanda.
+    """
+
+    def __init__(self, config_path: str = LLM_CONFIG_PATH):
+        """
+        Inicializa o registro sem criar nenhum modelo.
+
+        Args:
+            config_path: Caminho do YAML com a definição dos modelos
+        """
+        self.config_path = config_path
+        self._config: Optional[Dict[str, Any]] = None
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._http_client = None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        if self._config is None:
+            import yaml
+
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                self._config = yaml.safe_load(f) or {}
+        return self._config
+
+    def names(self) -> List[str]:
+        """Lista os nomes dos modelos configurados."""
+        return list(self.config.get("models", {}))
+
+    def is_loaded(self, name: str) -> bool:
+        """Indica se o modelo já foi instanciado."""
+        return name in self._instances
+
+    def get(self, name: str) -> Any:
+        """
+        Retorna o modelo pelo nome, criando-o no primeiro acesso.
+
+        Args:
+            name: Nome do modelo em llms.yaml (ex.: "GTP4o_mini")
+
+        Returns:
+            CachedLLM: Instância compartilhada do modelo
+
+        Raises:
+            KeyError: Se o modelo não estiver configurado
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = self._build(name)
+                self._instances[name] = instance
+        return instance
+
+    def spec(self, name: str) -> Dict[str, Any]:
+        """
+        Retorna a configuração efetiva de um modelo (padrões + entrada do YAML).
+        Variáveis LLM_<NOME>_TIMEOUT sobrescrevem o timeout configurado.
+
+        Args:
+            name: Nome do modelo
+
+        Returns:
+            Dict[str, Any]: Configuração do modelo
+        """
+        models = self.config.get("models", {})
+        if name not in models:
+            raise KeyError(f"Modelo não configurado: {name}")
+
+        spec = dict(self.config.get("defaults", {}))
+        spec.update(models[name])
+        timeout = os.getenv(f"LLM_{name.upper()}_TIMEOUT")
+        if timeout:
+            spec["timeout"] = float(timeout)
+        return spec
+
+    def _build(self, name: str) -> Any:
+        """Cria o modelo envolvido pelo cache de respostas."""
+        from crewai import LLM
+
+        from src.utils.llm_cache import CachedLLM
+
+        spec = self.spec(name)
+        kwargs = {
+            "model": spec["model"],
+            "timeout": spec.get("timeout"),
+        }
+        if spec.get("base_url"):
+            kwargs["base_url"] = spec["base_url"]
+        if spec.get("api_key_env"):
+            kwargs["api_key"] = os.getenv(spec["api_key_env"])
+        if spec.get("provider"):
+            kwargs["provider"] = spec["provider"]
+            # Provedores nativos compartilham um único pool de conexões HTTP
+            kwargs["max_retries"] = spec.get("max_retries", 2)
+            kwargs["client_params"] = {"http_client": self._shared_http_client()}
+
+        # Modelos da mesma chave de API dividem os limites de RPM/TPM (rate_limits)
+        return CachedLLM(LLM(**kwargs), rate_key=spec.get("api_key_env") or spec["model"].split("/")[0])
+
+    def _shared_http_client(self) -> Any:
+        """Cliente httpx com keep-alive reutilizado por todos os modelos nativos."""
+        if self._http_client is None:
+            import httpx
+
+            self._http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_HTTP_MAX_CONNECTIONS,
+                )
+            )
+        return self._http_client
+
+
+_registry: Optional[LLMRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> LLMRegistry:
+    """
+    Retorna o registro de modelos compartilhado pelo processo.
+
+    Returns:
+        LLMRegistry: Instância única do registro
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LLMRegistry()
+    return _registry
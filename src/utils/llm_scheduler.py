@@ -0,0 +1,299 @@
+"""
+Agendador de chamadas de LLM com limites de requisições e tokens por minuto.
+Todas as chamadas de um mesmo provedor (chave de API) passam por um par de
+token buckets (RPM/TPM) com capacidade de poucos segundos, o que suaviza rajadas
+e mantém a vazão agregada no limite. Chamadas aguardam em uma fila com
+prioridade: interativas (API) são liberadas antes das de lote.
+Os buckets são do processo: quando LLM_RATE_SHARE processos usam as mesmas
+chaves (ex.: vagas de src/batch.py), cada um recebe a fração 1/LLM_RATE_SHARE
+dos limites.
+"""
+
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+PRIORITIES = {"interactive": PRIORITY_INTERACTIVE, "batch": PRIORITY_BATCH}
+
+# Segundos de vazão que cada bucket acumula (rajada máxima)
+LLM_SCHEDULER_BURST_SECONDS = float(os.getenv("LLM_SCHEDULER_BURST_SECONDS", "2"))
+# Tokens de saída estimados por chamada, somados aos de entrada na reserva
+LLM_SCHEDULER_OUTPUT_TOKENS = int(os.getenv("LLM_SCHEDULER_OUTPUT_TOKENS", "500"))
+# Pausa (segundos) do provedor após um 429 sem Retry-After
+LLM_SCHEDULER_BACKOFF = float(os.getenv("LLM_SCHEDULER_BACKOFF", "2"))
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "llm_priority",
+    default=PRIORITIES.get(os.getenv("LLM_DEFAULT_PRIORITY", "batch"), PRIORITY_BATCH)
+)
+
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """
+    Define a prioridade das chamadas de LLM feitas dentro do bloco.
+
+    Args:
+        priority: "interactive" ou "batch"
+    """
+    token = _priority.set(PRIORITIES[priority])
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    """Prioridade das chamadas no contexto atual (menor é mais urgente)."""
+    return _priority.get()
+
+
+class TokenBucket:
+    """
+    Bucket com reposição contínua. O saldo pode ficar negativo quando uma
+    chamada consome mais que a capacidade; a dívida atrasa as seguintes.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = LLM_SCHEDULER_BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Segundos até o bucket admitir `amount` (limitado à capacidade)."""
+        self._refill(now)
+        needed = min(amount, self.capacity) - self.level
+        return 0.0 if needed <= 0 else needed / self.rate
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class ProviderLimiter:
+    """
+    Limites RPM/TPM de uma chave de provedor com fila de prioridade.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.paused_until = 0.0
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _wait_time(self, tokens: float, now: float) -> float:
+        waits = [self.paused_until - now]
+        if self.requests:
+            waits.append(self.requests.wait_time(1, now))
+        if self.tokens:
+            waits.append(self.tokens.wait_time(tokens, now))
+        return max(waits)
+
+    def acquire(self, tokens: float, priority: int = PRIORITY_BATCH, timeout: Optional[float] = None) -> None:
+        """
+        Bloqueia até a chamada caber nos limites e ser a primeira da fila.
+
+        Args:
+            tokens: Tokens estimados da chamada
+            priority: Prioridade (menor é mais urgente)
+            timeout: Espera máxima em segundos
+
+        Raises:
+            TimeoutError: Se a espera exceder o timeout
+        """
+        entry = (priority, next(self._sequence))
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(tokens, now) if self._queue[0] == entry else None
+                    if wait is not None and wait <= 0:
+                        if self.requests:
+                            self.requests.consume(1, now)
+                        if self.tokens:
+                            self.tokens.consume(tokens, now)
+                        return
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise TimeoutError("Tempo de espera pelo limite do provedor excedido")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._condition.wait(wait)
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+
+    def settle(self, estimated: float, actual: float) -> None:
+        """Ajusta o bucket de tokens com o consumo real da chamada."""
+        if not self.tokens:
+            return
+        with self._condition:
+            self.tokens.consume(actual - estimated, time.monotonic())
+            self._condition.notify_all()
+
+    def backoff(self, seconds: float) -> None:
+        """Pausa o provedor e zera os buckets após um erro de limite (429)."""
+        with self._condition:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.drain(now)
+            self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Fila e saldo atual dos buckets."""
+        with self._condition:
+            now = time.monotonic()
+            snapshot: Dict[str, Any] = {"queued": len(self._queue), "paused": max(0.0, self.paused_until - now)}
+            for field, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                if bucket:
+                    bucket._refill(now)
+                    snapshot[field] = {"per_minute": bucket.rate * 60, "available": bucket.level}
+            return snapshot
+
+
+def estimate_tokens(messages: Any) -> int:
+    """Estimativa de tokens de entrada (≈ 4 caracteres por token)."""
+    if isinstance(messages, str):
+        return len(messages) // 4 + 1
+    total = 0
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else message
+        total += len(str(content or "")) // 4 + 4
+    return total
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Indica se a exceção corresponde a um HTTP 429 do provedor."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return "ratelimit" in type(error).__name__.lower() or "429" in str(error)[:200]
+
+
+def _retry_after(error: Exception) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return LLM_SCHEDULER_BACKOFF
+
+
+class LLMScheduler:
+    """
+    Agendador do processo, com um limitador por chave de provedor.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Inicializa o agendador.
+
+        Args:
+            limits: Limites por chave ({"OPENAI_API_KEY": {"rpm": 500, "tpm": 200000}}).
+                    Variáveis LLM_RATE_<CHAVE>_RPM/_TPM sobrescrevem os valores e
+                    LLM_RATE_SHARE divide-os entre os processos que compartilham as chaves.
+        """
+        self.limits = limits or {}
+        self._limiters: Dict[str, Optional[ProviderLimiter]] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, key: str) -> Optional[ProviderLimiter]:
+        """Limitador da chave (None quando a chave não tem limites)."""
+        if key in self._limiters:
+            return self._limiters[key]
+        with self._lock:
+            if key not in self._limiters:
+                config = dict(self.limits.get(key, {}))
+                for field in ("rpm", "tpm"):
+                    override = os.getenv(f"LLM_RATE_{key.upper()}_{field.upper()}")
+                    if override:
+                        config[field] = float(override)
+                # Lido na criação do limitador: src/batch.py define o valor no processo filho
+                share = max(1, int(os.getenv("LLM_RATE_SHARE", "1")))
+                rpm = float(config["rpm"]) / share if config.get("rpm") else None
+                tpm = float(config["tpm"]) / share if config.get("tpm") else None
+                self._limiters[key] = ProviderLimiter(rpm, tpm) if (rpm or tpm) else None
+        return self._limiters[key]
+
+    def call(self, key: Optional[str], messages: Any, fn, timeout: Optional[float] = None) -> Any:
+        """
+        Executa fn() dentro dos limites da chave.
+
+        Args:
+            key: Chave do provedor (None executa sem agendamento)
+            messages: Mensagens da chamada (para estimar tokens)
+            fn: Função que faz a chamada ao modelo
+            timeout: Espera máxima na fila
+
+        Returns:
+            Any: Retorno de fn()
+        """
+        limiter = self.limiter(key) if key else None
+        if limiter is None:
+            return fn()
+
+        estimated = estimate_tokens(messages) + LLM_SCHEDULER_OUTPUT_TOKENS
+        limiter.acquire(estimated, priority=current_priority(), timeout=timeout)
+        try:
+            result = fn()
+        except Exception as e:
+            if is_rate_limit_error(e):
+                limiter.backoff(_retry_after(e))
+            raise
+
+        actual = estimate_tokens(messages) + (len(result) // 4 if isinstance(result, str) else LLM_SCHEDULER_OUTPUT_TOKENS)
+        limiter.settle(estimated, actual)
+        return result
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Estado de cada chave com limites já utilizada."""
+        return {key: limiter.snapshot() for key, limiter in list(self._limiters.items()) if limiter}
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """
+    Retorna o agendador compartilhado, com limites de rate_limits em llms.yaml.
+
+    Returns:
+        LLMScheduler: Instância única
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                from src.utils.llm_registry import get_registry
+
+                _scheduler = LLMScheduler(get_registry().config.get("rate_limits", {}))
+    return _scheduler
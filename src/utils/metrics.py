@@ -0,0 +1,349 @@
+"""
+Instrumentação de crews, tarefas, chamadas de LLM e ferramentas.
+Cada operação registra tempo, tokens de entrada/saída, custo estimado,
+tentativas extras e acertos de cache. Os valores são expostos como métricas
+Prometheus (GET /metrics, quando prometheus_client está instalado) e agregados
+por execução em ./runs/<run_id>/metrics.json para localizar as etapas mais caras.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from src.tools.product_spool import validate_run_id
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+RUNS_DIR = os.getenv("RUNS_DIR", "./runs")
+METRICS_FILENAME = "metrics.json"
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+except ImportError:  # prometheus_client é opcional; sem ele só há o agregado por execução
+    Counter = Histogram = None
+
+if Histogram is not None:
+    OPERATION_SECONDS = Histogram(
+        "affiliate_operation_seconds", "Duração das operações", ["kind", "name"],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+    )
+    OPERATIONS = Counter("affiliate_operations_total", "Operações por desfecho (ok, error, cache_hit)",
+                         ["kind", "name", "outcome"])
+    RETRIES = Counter("affiliate_retries_total", "Tentativas extras (fallback de modelo, ferramenta repetida)",
+                      ["kind", "name"])
+    LLM_TOKENS = Counter("affiliate_llm_tokens_total", "Tokens de LLM", ["model", "direction"])
+    LLM_COST = Counter("affiliate_llm_cost_usd_total", "Custo estimado das chamadas de LLM (USD)", ["model"])
+
+_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("metrics_run_id", default=None)
+
+
+class RunMetrics:
+    """
+    Agregado das operações de uma execução, por (kind, name).
+    """
+
+    FIELDS = ("count", "errors", "cache_hits", "retries", "seconds", "max_seconds", "tokens_in", "tokens_out", "cost")
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.scopes = 0
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, name: str, seconds: float, outcome: str,
+            tokens_in: int, tokens_out: int, cost: float, retries: int) -> None:
+        with self._lock:
+            totals = self._totals.setdefault((kind, name), dict.fromkeys(self.FIELDS, 0))
+            totals["count"] += 1
+            totals["errors"] += outcome == "error"
+            totals["cache_hits"] += outcome == "cache_hit"
+            totals["retries"] += retries
+            totals["seconds"] += seconds
+            totals["max_seconds"] = max(totals["max_seconds"], seconds)
+            totals["tokens_in"] += tokens_in
+            totals["tokens_out"] += tokens_out
+            totals["cost"] += cost
+
+    def summary(self) -> Dict[str, Any]:
+        """Totais da execução e operações ordenadas pelo tempo gasto."""
+        with self._lock:
+            operations = [
+                dict(kind=kind, name=name, **{field: round(value, 6) for field, value in totals.items()})
+                for (kind, name), totals in self._totals.items()
+            ]
+        operations.sort(key=lambda op: -op["seconds"])
+        llm = [op for op in operations if op["kind"] == "llm"]
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "totals": {
+                "llm_calls": sum(op["count"] for op in llm),
+                "llm_cache_hits": sum(op["cache_hits"] for op in llm),
+                "tokens_in": sum(op["tokens_in"] for op in llm),
+                "tokens_out": sum(op["tokens_out"] for op in llm),
+                "cost": round(sum(op["cost"] for op in llm), 6),
+            },
+            "operations": operations,
+        }
+
+
+_runs: Dict[str, RunMetrics] = {}
+_runs_lock = threading.Lock()
+
+
+def current_run_id() -> Optional[str]:
+    """Execução à qual as operações do contexto atual são atribuídas."""
+    return _run_id.get()
+
+
+@contextmanager
+def run_scope(run_id: str, runs_dir: str = RUNS_DIR) -> Iterator[RunMetrics]:
+    """
+    Atribui as operações do bloco (e das threads que copiam o contexto) à execução
+    e grava o agregado em <runs_dir>/<run_id>/metrics.json ao final.
+
+    Args:
+        run_id: Identificador da execução
+        runs_dir: Diretório base dos artefatos
+
+    Yields:
+        RunMetrics: Agregado da execução
+
+    Raises:
+        ValueError: Se run_id não for um identificador válido
+    """
+    validate_run_id(run_id)
+    with _runs_lock:
+        run = _runs.setdefault(run_id, RunMetrics(run_id))
+        run.scopes += 1
+    token = _run_id.set(run_id)
+    try:
+        yield run
+    finally:
+        _run_id.reset(token)
+        save_run_metrics(run, runs_dir)
+        with _runs_lock:
+            run.scopes -= 1
+            # Escopos aninhados (API → pipeline) compartilham o agregado até o último sair
+            if run.scopes == 0:
+                _runs.pop(run_id, None)
+
+
+def save_run_metrics(run: RunMetrics, runs_dir: str = RUNS_DIR) -> str:
+    """Grava o agregado da execução e retorna o caminho do arquivo."""
+    run_dir = os.path.join(runs_dir, validate_run_id(run.run_id))
+    os.makedirs(run_dir, exist_ok=True)
+    path = os.path.join(run_dir, METRICS_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(run.summary(), f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_run_metrics(run_id: str, runs_dir: str = RUNS_DIR) -> Optional[Dict[str, Any]]:
+    """Agregado da execução (em andamento ou gravado), ou None. Levanta ValueError para run_id inválido."""
+    validate_run_id(run_id)
+    run = _runs.get(run_id)
+    if run is not None:
+        return run.summary()
+    path = os.path.join(runs_dir, run_id, METRICS_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record(kind: str,
+           name: str,
+           seconds: float = 0.0,
+           outcome: str = "ok",
+           tokens_in: int = 0,
+           tokens_out: int = 0,
+           cost: float = 0.0,
+           retries: int = 0,
+           model: Optional[str] = None) -> None:
+    """
+    Registra uma operação concluída.
+
+    Args:
+        kind: Tipo da operação (crew, task, llm, tool, agent_tool, http, stage)
+        name: Nome da operação (modelo, ferramenta, tarefa...)
+        seconds: Duração
+        outcome: "ok", "error" ou "cache_hit"
+        tokens_in: Tokens de entrada (LLM)
+        tokens_out: Tokens de saída (LLM)
+        cost: Custo estimado em USD (LLM)
+        retries: Tentativas extras
+        model: Modelo para os contadores de tokens/custo (padrão: name)
+    """
+    if Histogram is not None:
+        OPERATIONS.labels(kind, name, outcome).inc()
+        if outcome != "cache_hit":
+            OPERATION_SECONDS.labels(kind, name).observe(seconds)
+        if retries:
+            RETRIES.labels(kind, name).inc(retries)
+        if tokens_in or tokens_out:
+            LLM_TOKENS.labels(model or name, "in").inc(tokens_in)
+            LLM_TOKENS.labels(model or name, "out").inc(tokens_out)
+        if cost:
+            LLM_COST.labels(model or name).inc(cost)
+
+    run_id = _run_id.get()
+    run = _runs.get(run_id) if run_id else None
+    if run is not None:
+        run.add(kind, name, seconds, outcome, tokens_in, tokens_out, cost, retries)
+
+
+@contextmanager
+def observe(kind: str, name: str) -> Iterator[Dict[str, Any]]:
+    """
+    Mede o bloco e registra a operação; exceções contam como "error".
+    O dicionário retornado aceita tokens_in, tokens_out, cost, retries e outcome.
+
+    Args:
+        kind: Tipo da operação
+        name: Nome da operação
+    """
+    span: Dict[str, Any] = {}
+    started = time.monotonic()
+    try:
+        yield span
+    except Exception:
+        span["outcome"] = "error"
+        raise
+    finally:
+        record(kind, name, seconds=time.monotonic() - started, **span)
+
+
+def instrument(kind: str, name: Optional[str] = None) -> Callable:
+    """Decorador que registra cada chamada da função com observe()."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with observe(kind, name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+_model_costs: Optional[Dict[str, Tuple[float, float]]] = None
+
+
+def llm_cost(model: str, tokens_in: int, tokens_out: int) -> float:
+    """
+    Custo estimado (USD) a partir de cost_input/cost_output de llms.yaml (por milhão de tokens).
+
+    Args:
+        model: Identificador do modelo (campo model do registro)
+        tokens_in: Tokens de entrada
+        tokens_out: Tokens de saída
+
+    Returns:
+        float: Custo estimado (0 para modelos sem preço configurado)
+    """
+    global _model_costs
+    if _model_costs is None:
+        from src.utils.llm_registry import get_registry
+
+        registry = get_registry()
+        _model_costs = {}
+        for name in registry.names():
+            spec = registry.spec(name)
+            _model_costs.setdefault(spec["model"], (
+                float(spec.get("cost_input", 0) or 0), float(spec.get("cost_output", 0) or 0)
+            ))
+    cost_input, cost_output = _model_costs.get(model, (0.0, 0.0))
+    return (tokens_in * cost_input + tokens_out * cost_output) / 1_000_000
+
+
+def render_latest() -> Optional[Tuple[bytes, str]]:
+    """Métricas no formato de exposição do Prometheus, ou None sem prometheus_client."""
+    if Histogram is None:
+        return None
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+_crewai_hooks = None
+
+
+def install_crewai_hooks() -> None:
+    """
+    Registra no barramento de eventos do CrewAI os handlers que medem
+    kickoffs de crews, tarefas e ferramentas usadas pelos agentes.
+    Pode ser chamada várias vezes; o registro acontece uma vez por processo.
+    """
+    global _crewai_hooks
+    if _crewai_hooks is not None:
+        return
+
+    from crewai.events import (BaseEventListener, CrewKickoffCompletedEvent, CrewKickoffFailedEvent,
+                               CrewKickoffStartedEvent, TaskCompletedEvent, TaskFailedEvent,
+                               ToolUsageErrorEvent, ToolUsageFinishedEvent)
+
+    class _MetricsListener(BaseEventListener):
+        def setup_listeners(self, bus):
+            kickoffs: Dict[int, float] = {}
+
+            def _crew_name(source, event) -> str:
+                return event.crew_name or type(source).__name__
+
+            @bus.on(CrewKickoffStartedEvent)
+            def _crew_started(source, event):
+                kickoffs[id(source)] = time.monotonic()
+
+            @bus.on(CrewKickoffCompletedEvent)
+            def _crew_completed(source, event):
+                started = kickoffs.pop(id(source), None)
+                seconds = time.monotonic() - started if started else 0.0
+                record("crew", _crew_name(source, event), seconds=seconds)
+
+            @bus.on(CrewKickoffFailedEvent)
+            def _crew_failed(source, event):
+                started = kickoffs.pop(id(source), None)
+                seconds = time.monotonic() - started if started else 0.0
+                record("crew", _crew_name(source, event), seconds=seconds, outcome="error")
+
+            def _task_name(event) -> str:
+                task = event.task
+                name = getattr(task, "name", None) or getattr(getattr(task, "agent", None), "role", None)
+                return str(name or "task")
+
+            def _task_seconds(event) -> float:
+                task = event.task
+                start, end = getattr(task, "start_time", None), getattr(task, "end_time", None)
+                return (end - start).total_seconds() if start and end else 0.0
+
+            @bus.on(TaskCompletedEvent)
+            def _task_completed(source, event):
+                record("task", _task_name(event), seconds=_task_seconds(event))
+
+            @bus.on(TaskFailedEvent)
+            def _task_failed(source, event):
+                record("task", _task_name(event), seconds=_task_seconds(event), outcome="error")
+
+            @bus.on(ToolUsageFinishedEvent)
+            def _tool_finished(source, event):
+                record(
+                    "agent_tool", event.tool_name,
+                    seconds=(event.finished_at - event.started_at).total_seconds(),
+                    outcome="cache_hit" if event.from_cache else "ok",
+                    retries=max(0, (event.run_attempts or 1) - 1)
+                )
+
+            @bus.on(ToolUsageErrorEvent)
+            def _tool_error(source, event):
+                record("agent_tool", event.tool_name, outcome="error")
+
+    _crewai_hooks = _MetricsListener()
@@ -0,0 +1,354 @@
+"""
+Roteamento de modelos por classe de tarefa.
+Para cada classe (research, curation, extraction, scoring) os candidatos de
+src/config/llms.yaml são ordenados pela latência p95 e taxa de erro medidas nas
+últimas chamadas e pelo custo configurado. Uma falha passa a chamada ao próximo
+candidato, e rotas com hedge disparam um segundo modelo quando o primeiro demora.
+"""
+
+import copy
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from crewai.llms.base_llm import BaseLLM
+from dotenv import load_dotenv
+
+from src.utils import metrics
+from src.utils.llm_registry import LLMRegistry, get_registry
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Desative para usar sempre o primeiro candidato de cada rota
+LLM_ROUTING = os.getenv("LLM_ROUTING", "true").lower() in ("1", "true", "yes", "sim")
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "8"))
+
+ROUTER_DEFAULTS = {
+    "window": 50,
+    "min_samples": 5,
+    "expected_latency": 10.0,
+    "max_error_rate": 0.5,
+    "latency_weight": 1.0,
+    "error_weight": 2.0,
+    "cost_weight": 0.5,
+    "hedge_after": 8.0,
+}
+
+
+class ModelStats:
+    """
+    Janela deslizante de latência e sucesso das chamadas de um modelo.
+    """
+
+    def __init__(self, window: int):
+        self._calls: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._calls.append((latency, ok))
+
+    @property
+    def count(self) -> int:
+        return len(self._calls)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Percentil (0-100) da latência das chamadas bem-sucedidas."""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._calls if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(q / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._calls:
+                return 0.0
+            return sum(1 for _, ok in self._calls if not ok) / len(self._calls)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"calls": self.count, "p50": self.percentile(50), "p95": self.percentile(95), "error_rate": self.error_rate}
+
+
+class ModelRouter:
+    """
+    Escolhe a ordem dos modelos de cada rota com base nas estatísticas recentes.
+    """
+
+    def __init__(self, registry: Optional[LLMRegistry] = None):
+        """
+        Inicializa o roteador.
+
+        Args:
+            registry: Registro de modelos (padrão: registro compartilhado)
+        """
+        self.registry = registry or get_registry()
+        self.settings = dict(ROUTER_DEFAULTS, **self.registry.config.get("router", {}))
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def route(self, task_class: str) -> Dict[str, Any]:
+        """
+        Configuração da rota (candidates e hedge).
+
+        Raises:
+            KeyError: Se a rota não estiver configurada
+        """
+        routes = self.registry.config.get("routes", {})
+        if task_class not in routes:
+            raise KeyError(f"Rota não configurada: {task_class}")
+        return routes[task_class]
+
+    def stats(self, name: str) -> ModelStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(name, ModelStats(int(self.settings["window"])))
+        return stats
+
+    def record(self, name: str, latency: float, ok: bool) -> None:
+        """Registra o desfecho de uma chamada ao modelo."""
+        self.stats(name).record(latency, ok)
+
+    def available(self, name: str) -> bool:
+        """Indica se o modelo tem a chave de API configurada (quando exige uma)."""
+        key_env = self.registry.spec(name).get("api_key_env")
+        return not key_env or bool(os.getenv(key_env))
+
+    def cost(self, name: str) -> float:
+        spec = self.registry.spec(name)
+        return float(spec.get("cost_input", 0) or 0) + float(spec.get("cost_output", 0) or 0)
+
+    def rank(self, task_class: str) -> List[str]:
+        """
+        Ordena os candidatos da rota, do mais ao menos indicado.
+        Modelos ainda sem medições entram com a latência esperada e sem peso de
+        custo, preservando a ordem configurada; modelos com taxa de erro acima
+        de max_error_rate vão para o fim.
+
+        Args:
+            task_class: Classe da tarefa (research, curation, extraction, scoring)
+
+        Returns:
+            List[str]: Nomes dos modelos disponíveis em ordem de preferência
+        """
+        candidates = [name for name in self.route(task_class)["candidates"] if self.available(name)]
+        if not LLM_ROUTING:
+            return candidates
+
+        settings = self.settings
+        max_cost = max((self.cost(name) for name in candidates), default=0) or 1.0
+
+        def _key(item):
+            index, name = item
+            stats = self.stats(name)
+            if stats.count < settings["min_samples"]:
+                return (False, settings["latency_weight"], index)
+            p95 = stats.percentile(95) or float(settings["expected_latency"])
+            score = (
+                settings["latency_weight"] * p95 / float(settings["expected_latency"])
+                + settings["error_weight"] * stats.error_rate
+                + settings["cost_weight"] * self.cost(name) / max_cost
+            )
+            return (stats.error_rate > settings["max_error_rate"], score, index)
+
+        return [name for _, name in sorted(enumerate(candidates), key=_key)]
+
+    def hedge_after(self, name: str) -> float:
+        """
+        Espera antes de disparar o segundo candidato: p95 do modelo, nunca abaixo
+        do hedge_after configurado. Assim só a cauda lenta (~5% das chamadas)
+        paga um segundo modelo.
+        """
+        minimum = float(self.settings["hedge_after"])
+        stats = self.stats(name)
+        if stats.count >= self.settings["min_samples"]:
+            p95 = stats.percentile(95)
+            if p95:
+                return max(p95, minimum)
+        return minimum
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+        return self._executor
+
+    def llm(self, task_class: str) -> "RoutedLLM":
+        """Retorna o LLM roteado da classe de tarefa."""
+        return RoutedLLM(self, task_class)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Estatísticas atuais de cada modelo já utilizado."""
+        return {name: stats.snapshot() for name, stats in list(self._stats.items())}
+
+
+class RoutedLLM(BaseLLM):
+    """
+    LLM que delega cada chamada ao melhor modelo da rota, com fallback e hedge.
+    Atributos não definidos aqui são repassados ao modelo preferido no momento.
+    """
+
+    def __init__(self, router: ModelRouter, task_class: str):
+        """
+        Inicializa o LLM roteado.
+
+        Args:
+            router: Roteador de modelos
+            task_class: Classe da tarefa (chave de routes em llms.yaml)
+        """
+        self._router = router
+        self.task_class = task_class
+        primary = self._primary()
+        super().__init__(
+            model=primary.model,
+            temperature=getattr(primary, "temperature", None),
+            provider=getattr(primary, "provider", None),
+            stop=getattr(primary, "stop", None),
+        )
+
+    def _primary(self) -> Any:
+        names = self._router.rank(self.task_class)
+        if not names:
+            raise RuntimeError(f"Nenhum modelo disponível para a rota {self.task_class}")
+        return self._router.registry.get(names[0])
+
+    @property
+    def stop(self) -> List[str]:
+        return self.__dict__.get("_stop_words", [])
+
+    @stop.setter
+    def stop(self, value: List[str]) -> None:
+        self.__dict__["_stop_words"] = list(value or [])
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ("_router", "task_class", "_stop_words"):
+            raise AttributeError(name)
+        return getattr(self._primary(), name)
+
+    def _call_model(self, name: str, messages: Any, kwargs: Dict[str, Any]) -> Any:
+        model = self._router.registry.get(name)
+        # Repassar as stop words definidas pelo agente em uma cópia do modelo escolhido:
+        # a instância do registro é compartilhada entre crews e threads e não é alterada
+        if self.stop and model.supports_stop_words():
+            stop = list(dict.fromkeys(list(model.stop or []) + self.stop))
+            if hasattr(model, "with_stop"):
+                model = model.with_stop(stop)
+            else:
+                model = copy.copy(model)
+                model.stop = stop
+        started = time.monotonic()
+        try:
+            result = model.call(messages, **kwargs)
+        except Exception:
+            self._router.record(name, time.monotonic() - started, ok=False)
+            raise
+        self._router.record(name, time.monotonic() - started, ok=True)
+        return result
+
+    def call(self,
+             messages: Any,
+             tools: Optional[List[Dict[str, Any]]] = None,
+             callbacks: Optional[List[Any]] = None,
+             available_functions: Optional[Dict[str, Any]] = None,
+             from_task: Any = None,
+             from_agent: Any = None,
+             response_model: Any = None) -> Any:
+        """
+        Chama os modelos da rota em ordem de preferência até um responder.
+        O hedge só é usado quando a chamada não executa funções (evita efeitos duplicados).
+        """
+        kwargs = {
+            "tools": tools,
+            "callbacks": callbacks,
+            "available_functions": available_functions,
+            "from_task": from_task,
+            "from_agent": from_agent,
+            "response_model": response_model,
+        }
+        names = self._router.rank(self.task_class)
+        if not names:
+            raise RuntimeError(f"Nenhum modelo disponível para a rota {self.task_class}")
+
+        hedge = bool(self._router.route(self.task_class).get("hedge")) and available_functions is None
+        if hedge and len(names) > 1:
+            try:
+                return self._hedged_call(names[0], names[1], messages, kwargs)
+            except Exception as e:
+                print(f"Falha nos modelos {names[0]} e {names[1]} ({self.task_class}): {e}")
+                names = names[2:]
+                if not names:
+                    raise
+
+        last_error: Optional[Exception] = None
+        for attempt, name in enumerate(names):
+            try:
+                result = self._call_model(name, messages, kwargs)
+                if attempt:
+                    metrics.record("route", self.task_class, retries=attempt)
+                return result
+            except Exception as e:
+                print(f"Falha no modelo {name} ({self.task_class}), tentando o próximo: {e}")
+                last_error = e
+        metrics.record("route", self.task_class, outcome="error", retries=len(names) - 1)
+        raise last_error
+
+    def _hedged_call(self, primary: str, secondary: str, messages: Any, kwargs: Dict[str, Any]) -> Any:
+        """Dispara o secundário se o primário não responder a tempo; vale a primeira resposta."""
+        executor = self._router.executor
+        # As threads do hedge herdam o contexto (prioridade do agendador de LLM)
+        pending = {executor.submit(contextvars.copy_context().run, self._call_model, primary, messages, kwargs)}
+        done, pending = wait(pending, timeout=self._router.hedge_after(primary))
+        if not done or next(iter(done)).exception() is not None:
+            pending.add(executor.submit(contextvars.copy_context().run, self._call_model, secondary, messages, kwargs))
+
+        error: Optional[BaseException] = None
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def supports_stop_words(self) -> bool:
+        return self._primary().supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self._primary().get_context_window_size()
+
+    def get_token_usage_summary(self) -> Any:
+        return self._primary().get_token_usage_summary()
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """
+    Retorna o roteador compartilhado pelo processo.
+
+    Returns:
+        ModelRouter: Instância única
+    """
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter()
+    return _router
@@ -0,0 +1,154 @@
+"""
+Pré-pontuação heurística de produtos.
+Calcula, de forma vetorizada sobre o lote, sinais baratos (desconto, faixa de
+preço na categoria, qualidade do título e duplicidade) para descartar
+candidatos fracos antes da pontuação por LLM.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Peso de cada sinal na pré-pontuação final (soma = 1)
+PRESCORE_WEIGHTS = {
+    "discount": 0.35,
+    "price": 0.25,
+    "title": 0.25,
+    "uniqueness": 0.15,
+}
+# Desconto a partir do qual o sinal de desconto é máximo
+FULL_DISCOUNT = 0.5
+# Fator aplicado a produtos sem imagem
+MISSING_IMAGE_FACTOR = 0.5
+
+
+def _to_float(value: Any) -> float:
+    """Converte preços em float, retornando NaN quando inválidos."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _normalize_title(title: str) -> str:
+    """Normaliza o título para detecção de duplicados."""
+    return re.sub(r"[^a-z0-9]+", " ", title.lower()).strip()
+
+
+def _price_percentiles(prices: np.ndarray, categories: List[str]) -> np.ndarray:
+    """
+    Calcula o percentil de preço de cada produto dentro da sua categoria.
+
+    Args:
+        prices: Preços dos produtos (NaN para inválidos)
+        categories: Categoria de cada produto
+
+    Returns:
+        np.ndarray: Percentis entre 0 e 1 (NaN para preços inválidos)
+    """
+    percentiles = np.full(len(prices), np.nan)
+    category_array = np.array(categories, dtype=object)
+
+    for category in set(categories):
+        mask = (category_array == category) & np.isfinite(prices) & (prices > 0)
+        count = int(mask.sum())
+        if count == 0:
+            continue
+        if count == 1:
+            percentiles[mask] = 0.5
+            continue
+        ranks = prices[mask].argsort().argsort()
+        percentiles[mask] = ranks / (count - 1)
+
+    return percentiles
+
+
+def prescore_products(products: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Calcula a pré-pontuação (0 a 1) de um lote de produtos.
+
+    Args:
+        products: Lista de produtos no formato ProductCreate
+
+    Returns:
+        np.ndarray: Pré-pontuação de cada produto, na mesma ordem
+    """
+    if not products:
+        return np.zeros(0)
+
+    prices = np.array([_to_float(p.get("price")) for p in products])
+    sale_prices = np.array([_to_float(p.get("sale_price")) for p in products])
+    available = np.array([p.get("available", True) is not False for p in products], dtype=float)
+    has_image = np.array([bool(p.get("image_url")) for p in products])
+    titles = [str(p.get("title") or "") for p in products]
+    categories = [str(p.get("category") or "") for p in products]
+
+    # Desconto percentual (0 quando não há preço promocional válido)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discount = np.where(
+            np.isfinite(sale_prices) & (prices > 0) & (sale_prices < prices),
+            (prices - sale_prices) / prices,
+            0.0,
+        )
+    discount_signal = np.clip(discount / FULL_DISCOUNT, 0.0, 1.0)
+
+    # Preços no meio da distribuição da categoria pontuam mais que os extremos
+    percentiles = _price_percentiles(prices, categories)
+    price_signal = np.where(np.isfinite(percentiles), 1.0 - np.abs(2.0 * percentiles - 1.0), 0.0)
+
+    # Qualidade do título: tamanho razoável, várias palavras e sem caixa alta total
+    lengths = np.array([len(t) for t in titles])
+    word_counts = np.array([len(t.split()) for t in titles])
+    shouting = np.array([t.isupper() for t in titles])
+    title_signal = (
+        0.5 * np.clip(lengths / 20.0, 0.0, 1.0) * (lengths <= 150)
+        + 0.3 * np.clip(word_counts / 3.0, 0.0, 1.0)
+        + 0.2 * ~shouting
+    )
+
+    # Títulos repetidos no lote dividem o sinal de unicidade
+    normalized = [_normalize_title(t) for t in titles]
+    counts = Counter(normalized)
+    uniqueness_signal = 1.0 / np.array([counts[t] for t in normalized], dtype=float)
+
+    scores = (
+        PRESCORE_WEIGHTS["discount"] * discount_signal
+        + PRESCORE_WEIGHTS["price"] * price_signal
+        + PRESCORE_WEIGHTS["title"] * title_signal
+        + PRESCORE_WEIGHTS["uniqueness"] * uniqueness_signal
+    )
+    scores = scores * available * np.where(has_image, 1.0, MISSING_IMAGE_FACTOR)
+    return np.round(scores, 4)
+
+
+def select_for_scoring(products: List[Dict[str, Any]],
+                       top_k: Optional[int] = None,
+                       min_score: Optional[float] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Separa os produtos que seguem para a pontuação por LLM.
+    Cada produto retornado é uma cópia com o campo "prescore", gravado na
+    coluna products.prescore quando o produto é inserido (insert_products).
+
+    Args:
+        products: Lista de produtos
+        top_k: Quantidade máxima de produtos selecionados (opcional)
+        min_score: Pré-pontuação mínima para seleção (opcional)
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: Selecionados (maior
+        pré-pontuação primeiro) e descartados
+    """
+    scores = prescore_products(products)
+    annotated = [dict(product, prescore=float(score)) for product, score in zip(products, scores)]
+
+    order = np.argsort(-scores, kind="stable")
+    selected, rejected = [], []
+    for index in order:
+        product = annotated[index]
+        keep = min_score is None or product["prescore"] >= min_score
+        keep = keep and (top_k is None or len(selected) < top_k)
+        (selected if keep else rejected).append(product)
+
+    return selected, rejected
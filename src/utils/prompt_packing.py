@@ -0,0 +1,217 @@
+"""
+Empacotamento compacto de dados em prompts.
+Projeta registros nos campos relevantes, trunca descrições, serializa em JSON
+compacto ou TSV, conta tokens e corta o contexto passado entre etapas das crews
+para caber em um orçamento de tokens.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Orçamento de tokens do texto repassado de uma etapa da crew para a seguinte
+STAGE_CONTEXT_TOKENS = int(os.getenv("STAGE_CONTEXT_TOKENS", "2500"))
+# Encoding do tiktoken usado na contagem (quando instalado)
+PROMPT_TOKEN_ENCODING = os.getenv("PROMPT_TOKEN_ENCODING", "o200k_base")
+
+TRIM_MARKER = "[...]"
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken é opcional; sem ele a contagem é aproximada
+    tiktoken = None
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Conta os tokens do texto (tiktoken quando disponível, senão ~4 caracteres por token).
+
+    Args:
+        text: Texto a ser medido
+
+    Returns:
+        int: Número de tokens
+    """
+    global _encoding
+    if tiktoken is not None:
+        try:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding(PROMPT_TOKEN_ENCODING)
+            return len(_encoding.encode(text, disallowed_special=()))
+        except Exception:
+            pass
+    return len(text) // 4 + 1
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Corta o texto em max_chars, preferindo terminar em um espaço."""
+    text = " ".join(str(text).split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    space = cut.rfind(" ")
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def project(record: Dict[str, Any],
+            fields: Iterable[str],
+            text_fields: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    Reduz um registro aos campos do prompt, sem valores vazios.
+
+    Args:
+        record: Registro completo
+        fields: Campos mantidos sem alteração
+        text_fields: Campos de texto livre e seu tamanho máximo em caracteres
+
+    Returns:
+        Dict[str, Any]: Registro projetado
+    """
+    projected = {field: record[field] for field in fields if record.get(field) not in (None, "")}
+    for field, max_chars in (text_fields or {}).items():
+        if record.get(field):
+            projected[field] = truncate(record[field], max_chars)
+    return projected
+
+
+def render_json(records: List[Dict[str, Any]]) -> str:
+    """Serializa os registros em JSON sem indentação nem espaços."""
+    return json.dumps(records, ensure_ascii=False, separators=(",", ":"))
+
+
+def _tsv_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return " ".join(str(value).split())
+
+
+def render_tsv(records: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> str:
+    """
+    Serializa os registros como tabela TSV (cabeçalho + uma linha por registro).
+    Em listas de registros homogêneos evita repetir os nomes dos campos.
+
+    Args:
+        records: Registros projetados
+        columns: Ordem das colunas (padrão: campos na ordem em que aparecem)
+
+    Returns:
+        str: Tabela TSV
+    """
+    if columns is None:
+        columns = list(dict.fromkeys(field for record in records for field in record))
+    lines = ["\t".join(columns)]
+    lines.extend("\t".join(_tsv_cell(record.get(column)) for column in columns) for record in records)
+    return "\n".join(lines)
+
+
+RENDERERS: Dict[str, Callable[[List[Dict[str, Any]]], str]] = {"json": render_json, "tsv": render_tsv}
+
+
+def pack_records(records: List[Dict[str, Any]],
+                 fields: Iterable[str],
+                 text_fields: Optional[Dict[str, int]] = None,
+                 fmt: str = "json") -> str:
+    """
+    Projeta e serializa os registros para o prompt.
+
+    Args:
+        records: Registros completos
+        fields: Campos mantidos
+        text_fields: Campos de texto livre e seu tamanho máximo
+        fmt: "json" ou "tsv"
+
+    Returns:
+        str: Registros prontos para o prompt
+    """
+    fields = list(fields)
+    projected = [project(record, fields, text_fields) for record in records]
+    if fmt == "tsv":
+        columns = [field for field in fields + list(text_fields or {}) if any(field in p for p in projected)]
+        return render_tsv(projected, columns)
+    return RENDERERS[fmt](projected)
+
+
+def chunk_records(records: List[Dict[str, Any]],
+                  token_budget: int,
+                  fields: Iterable[str],
+                  text_fields: Optional[Dict[str, int]] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Divide os registros em lotes cuja forma projetada cabe no orçamento de tokens.
+
+    Args:
+        records: Registros completos
+        token_budget: Orçamento aproximado de tokens por lote
+        fields: Campos mantidos no prompt
+        text_fields: Campos de texto livre e seu tamanho máximo
+
+    Returns:
+        List[List[Dict[str, Any]]]: Lotes de registros na ordem original
+    """
+    fields = list(fields)
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for record in records:
+        record_tokens = count_tokens(render_json([project(record, fields, text_fields)]))
+        if current and current_tokens + record_tokens > token_budget:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(record)
+        current_tokens += record_tokens
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def trim_text(text: str, max_tokens: int = STAGE_CONTEXT_TOKENS) -> str:
+    """
+    Reduz o texto de uma etapa ao orçamento de tokens da seguinte.
+    Remove espaços repetidos, linhas em branco seguidas e linhas repetidas em
+    sequência (linhas iguais em blocos diferentes, como atributos de lojas
+    distintas, são mantidas) e, se ainda exceder, mantém as linhas iniciais que
+    cabem no orçamento (a conclusão das crews costuma vir primeiro) seguidas
+    de TRIM_MARKER.
+
+    Args:
+        text: Texto produzido pela etapa anterior
+        max_tokens: Orçamento de tokens
+
+    Returns:
+        str: Texto cortado
+    """
+    lines = []
+    for line in str(text or "").splitlines():
+        line = " ".join(line.split())
+        if lines and line == lines[-1]:
+            continue
+        if line or lines:
+            lines.append(line)
+    compact = "\n".join(lines).strip()
+    if count_tokens(compact) <= max_tokens:
+        return compact
+
+    kept = []
+    used = count_tokens(TRIM_MARKER)
+    for line in lines:
+        line_tokens = count_tokens(line) + 1
+        if used + line_tokens > max_tokens:
+            if not kept:
+                kept.append(truncate(line, max(1, (max_tokens - used) * 4)))
+            break
+        kept.append(line)
+        used += line_tokens
+    return "\n".join(kept).strip() + "\n" + TRIM_MARKER
@@ -0,0 +1,208 @@
+"""
+Registro de execuções com checkpoints por etapa.
+A saída de cada etapa (lojas selecionadas, produtos em alta, produtos coletados,
+pontuações e lotes de revisão) é gravada em ./runs/<run_id>/ e registrada na
+tabela run_checkpoints com o hash das entradas da etapa. Uma execução retomada
+pula as etapas já concluídas, e uma execução nova reaproveita checkpoints
+recentes de outra execução com as mesmas entradas.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from src.tools.product_spool import new_run_id, validate_run_id
+from src.utils import metrics
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+RUNS_DIR = os.getenv("RUNS_DIR", "./runs")
+# Idade máxima (segundos) de um checkpoint de outra execução para ser reaproveitado
+RUN_CHECKPOINT_MAX_AGE = float(os.getenv("RUN_CHECKPOINT_MAX_AGE", str(24 * 3600)))
+
+
+def input_hash(inputs: Any) -> str:
+    """
+    Hash estável das entradas de uma etapa.
+
+    Args:
+        inputs: Valor serializável em JSON
+
+    Returns:
+        str: SHA-256 do JSON canônico
+    """
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _stage_filename(stage: str) -> str:
+    # O hash curto evita que etapas diferentes ("Loja A" e "Loja_A") dividam o arquivo
+    digest = hashlib.sha256(stage.encode("utf-8")).hexdigest()[:8]
+    return re.sub(r"[^\w.-]+", "_", stage).strip("_") + f"-{digest}.json"
+
+
+class RunLedger:
+    """
+    Checkpoints de uma execução do pipeline.
+    """
+
+    def __init__(self,
+                 run_id: Optional[str] = None,
+                 reuse: bool = True,
+                 max_age: float = RUN_CHECKPOINT_MAX_AGE,
+                 runs_dir: str = RUNS_DIR,
+                 session_factory: Optional[Callable] = None):
+        """
+        Inicializa o registro.
+
+        Args:
+            run_id: Execução a retomar (nova se omitido)
+            reuse: Reaproveitar checkpoints recentes de execuções com as mesmas entradas
+            max_age: Idade máxima (segundos) dos checkpoints reaproveitados
+            runs_dir: Diretório base dos artefatos
+            session_factory: Fábrica de sessões do banco (padrão: SessionLocal)
+
+        Raises:
+            ValueError: Se run_id não for um identificador válido
+        """
+        self.run_id = validate_run_id(run_id) if run_id else new_run_id()
+        self.reuse = reuse
+        self.max_age = max_age
+        self.run_dir = os.path.join(runs_dir, self.run_id)
+        if session_factory is None:
+            from src.app.db.session import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    def _repository(self, db):
+        from src.app.repositories.run_checkpoint_repository import \
+            RunCheckpointRepository
+        return RunCheckpointRepository(db)
+
+    def load(self, stage: str, inputs: Any) -> Optional[Any]:
+        """
+        Retorna a saída registrada da etapa para estas entradas, se houver.
+        Procura primeiro nesta execução e depois, com reuse, em execuções recentes.
+
+        Args:
+            stage: Nome da etapa
+            inputs: Entradas da etapa
+
+        Returns:
+            Any: Saída registrada (ou None)
+        """
+        digest = input_hash(inputs)
+        db = self.session_factory()
+        try:
+            repository = self._repository(db)
+            checkpoint = repository.get(self.run_id, stage)
+            if checkpoint and checkpoint.input_hash == digest:
+                value = self._read(checkpoint.artifact_path)
+                if value is not None:
+                    return value
+
+            if not self.reuse:
+                return None
+            since = datetime.now(timezone.utc) - timedelta(seconds=self.max_age)
+            checkpoint = repository.find_fresh(stage, digest, since)
+            if checkpoint is None:
+                return None
+            value = self._read(checkpoint.artifact_path)
+            if value is None:
+                return None
+
+            # Copiar o artefato para esta execução, que passa a ter a etapa concluída
+            path = self._artifact_path(stage)
+            os.makedirs(self.run_dir, exist_ok=True)
+            if os.path.abspath(path) != os.path.abspath(checkpoint.artifact_path):
+                shutil.copyfile(checkpoint.artifact_path, path)
+            repository.save(self.run_id, stage, digest, path, checkpoint.item_count)
+            return value
+        except Exception as e:
+            print(f"Erro ao consultar checkpoint {stage}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def save(self, stage: str, inputs: Any, value: Any) -> str:
+        """
+        Grava a saída da etapa e registra o checkpoint.
+
+        Args:
+            stage: Nome da etapa
+            inputs: Entradas da etapa
+            value: Saída serializável em JSON
+
+        Returns:
+            str: Caminho do artefato
+        """
+        os.makedirs(self.run_dir, exist_ok=True)
+        path = self._artifact_path(stage)
+        # Escrita atômica: um artefato registrado nunca fica pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=self.run_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+        db = self.session_factory()
+        try:
+            count = len(value) if isinstance(value, (list, dict)) else None
+            self._repository(db).save(self.run_id, stage, input_hash(inputs), path, count)
+        except Exception as e:
+            print(f"Erro ao registrar checkpoint {stage}: {e}")
+        finally:
+            db.close()
+        return path
+
+    def stage(self, stage: str, inputs: Any, compute: Callable[[], Any]) -> Any:
+        """
+        Executa a etapa somente se não houver checkpoint válido.
+
+        Args:
+            stage: Nome da etapa
+            inputs: Entradas da etapa (compõem o hash)
+            compute: Função que produz a saída da etapa
+
+        Returns:
+            Any: Saída registrada ou recém-calculada
+        """
+        value = self.load(stage, inputs)
+        if value is not None:
+            print(f"Etapa {stage} reaproveitada do checkpoint ({self.run_id})")
+            metrics.record("stage", stage, outcome="cache_hit")
+            return value
+        with metrics.observe("stage", stage):
+            value = compute()
+        self.save(stage, inputs, value)
+        return value
+
+    def completed_stages(self) -> List[str]:
+        """Lista as etapas já concluídas nesta execução."""
+        db = self.session_factory()
+        try:
+            return [checkpoint.stage for checkpoint in self._repository(db).list_for_run(self.run_id)]
+        finally:
+            db.close()
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumo da execução para retorno da API/CLI."""
+        return {"run_id": self.run_id, "completed_stages": self.completed_stages()}
+
+    def _artifact_path(self, stage: str) -> str:
+        return os.path.join(self.run_dir, _stage_filename(stage))
+
+    @staticmethod
+    def _read(path: str) -> Optional[Any]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
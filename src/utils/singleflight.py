@@ -0,0 +1,54 @@
+"""
+Coalescência de chamadas idênticas simultâneas (singleflight).
+Enquanto uma execução para uma chave está em andamento, as demais chamadas
+com a mesma chave aguardam e recebem o mesmo resultado (ou a mesma exceção).
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    Grupo de chamadas coalescidas por chave, seguro entre threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Executa fn uma única vez por chave entre as chamadas simultâneas.
+
+        Args:
+            key: Identificador da operação
+            fn: Função a executar
+
+        Returns:
+            Tuple[Any, bool]: Resultado e se ele foi compartilhado com outra chamada
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return future.result(), False
+
+    def in_flight(self, key: str) -> bool:
+        """Indica se há execução em andamento para a chave."""
+        with self._lock:
+            return key in self._calls
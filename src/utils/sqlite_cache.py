@@ -0,0 +1,166 @@
+"""
+Cache chave-valor persistido em SQLite.
+Oferece expiração por TTL, remoção por tamanho (menos acessados primeiro)
+e contadores de acertos/erros. Pode ser compartilhado entre processos.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SQLiteCache:
+    """
+    Cache em disco com TTL e limite de tamanho.
+    """
+
+    def __init__(self,
+                 path: str,
+                 ttl_seconds: float,
+                 max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Inicializa o cache, criando o arquivo e a tabela se necessário.
+
+        Args:
+            path: Caminho do arquivo SQLite
+            ttl_seconds: Tempo de vida das entradas em segundos
+            max_entries: Número máximo de entradas (opcional)
+            max_bytes: Tamanho máximo somado dos valores em bytes (opcional)
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries (last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Busca um valor válido no cache.
+
+        Args:
+            key: Chave da entrada
+
+        Returns:
+            Optional[str]: Valor armazenado ou None se ausente/expirado
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Armazena um valor e aplica os limites de tamanho.
+
+        Args:
+            key: Chave da entrada
+            value: Valor serializado
+            ttl_seconds: TTL específico da entrada (opcional)
+        """
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now + ttl, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Remove uma entrada do cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores de uso e ocupação do cache.
+
+        Returns:
+            Dict[str, Any]: Acertos, erros, entradas e bytes armazenados
+        """
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
+
+    def _evict(self, now: float) -> None:
+        """Remove entradas expiradas e as menos acessadas até respeitar os limites."""
+        self._conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+
+        if self.max_entries is not None:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+        if self.max_bytes is not None:
+            total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache_entries"
+            ).fetchone()[0]
+            if total_bytes > self.max_bytes:
+                rows = self._conn.execute(
+                    "SELECT key, size FROM cache_entries ORDER BY last_access ASC"
+                ).fetchall()
+                for key, size in rows:
+                    if total_bytes <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                    total_bytes -= size
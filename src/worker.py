@@ -0,0 +1,201 @@
+# /worker.py
+"""
+Worker da fila de jobs.
+Cada vaga (slot) assume um job da tabela jobs e o executa em um processo
+separado, o que permite cancelar ou aplicar tempo limite sem derrubar o worker.
+
+Uso:
+    python -m src.worker --concurrency 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+from src.app.db.session import SessionLocal
+from src.app.jobs import execute_job
+from src.app.repositories.job_repository import JOB_LEASE_SECONDS, JobRepository
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "1800"))
+# Intervalo (segundos) entre verificações de cancelamento de um job em execução
+JOB_CANCEL_CHECK_INTERVAL = float(os.getenv("JOB_CANCEL_CHECK_INTERVAL", "1"))
+# Intervalo (segundos) entre renovações da posse do job (ver JOB_LEASE_SECONDS)
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", str(JOB_LEASE_SECONDS / 3)))
+
+
+class JobWorker:
+    """
+    Pool de processos que consome a fila de jobs.
+    """
+
+    def __init__(self,
+                 concurrency: int = JOB_WORKER_CONCURRENCY,
+                 poll_interval: float = JOB_POLL_INTERVAL,
+                 timeout: float = JOB_TIMEOUT,
+                 session_factory: Callable = SessionLocal):
+        """
+        Inicializa o worker.
+
+        Args:
+            concurrency: Jobs executados simultaneamente
+            poll_interval: Espera (segundos) quando a fila está vazia
+            timeout: Tempo limite (segundos) de cada job
+            session_factory: Fábrica de sessões do banco
+        """
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.session_factory = session_factory
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._context = multiprocessing.get_context("spawn")
+
+    def run(self) -> None:
+        """Inicia as vagas e bloqueia até stop() ou Ctrl+C."""
+        slots = [
+            threading.Thread(target=self._slot, args=(index,), name=f"job-slot-{index}", daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for slot in slots:
+            slot.start()
+        print(f"Worker {self.name} iniciado com {self.concurrency} vagas")
+
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+        for slot in slots:
+            slot.join()
+
+    def stop(self) -> None:
+        """Sinaliza para as vagas encerrarem; jobs em andamento voltam à fila."""
+        self._stop.set()
+
+    def _repository_call(self, method: str, *args):
+        db = self.session_factory()
+        try:
+            return getattr(JobRepository(db), method)(*args)
+        finally:
+            db.close()
+
+    def _safe_call(self, method: str, *args, default=None):
+        """Chama o repositório sem propagar erros do banco (registra e retorna default)."""
+        try:
+            return self._repository_call(method, *args)
+        except Exception as e:
+            print(f"Erro no repositório de jobs ({method}): {e}")
+            return default
+
+    def _slot(self, index: int) -> None:
+        worker = f"{self.name}/{index}"
+        while not self._stop.is_set():
+            job = self._safe_call("claim", worker)
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            try:
+                self.run_job(job.id, job.kind, job.params, worker)
+            except Exception as e:
+                # A vaga continua ativa; sem desfecho gravado, a posse vence e o job volta à fila
+                print(f"Erro ao executar o job {job.id}: {e}")
+
+    def run_job(self, job_id: int, kind: str, params: dict, worker: Optional[str] = None) -> Optional[str]:
+        """
+        Executa um job já assumido em um processo filho e registra o desfecho.
+        Enquanto o job executa, a posse é renovada a cada JOB_HEARTBEAT_INTERVAL;
+        se o worker morrer, a posse vence e outro worker retoma o job. Erros do
+        banco durante a execução são registrados sem interromper o acompanhamento,
+        e o processo filho é encerrado em qualquer saída.
+
+        Args:
+            job_id: ID do job
+            kind: Tipo do job
+            params: Parâmetros do job
+            worker: Identificador da vaga que assumiu o job (habilita o heartbeat)
+
+        Returns:
+            str: Status final (ou None se o job voltou para a fila)
+        """
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=execute_job, args=(kind, params, sender), daemon=True)
+        process.start()
+        sender.close()
+        deadline = time.monotonic() + self.timeout
+        next_heartbeat = time.monotonic() + JOB_HEARTBEAT_INTERVAL
+
+        try:
+            while True:
+                if receiver.poll(JOB_CANCEL_CHECK_INTERVAL):
+                    try:
+                        status, payload = receiver.recv()
+                    except EOFError:
+                        process.join()
+                        self._safe_call("fail", job_id, f"Processo do job encerrou sem resultado (código {process.exitcode})")
+                        return "failed"
+                    process.join()
+                    if status == "succeeded":
+                        self._safe_call("complete", job_id, payload)
+                    else:
+                        self._safe_call("fail", job_id, payload)
+                    return status
+
+                if self._stop.is_set():
+                    self._terminate(process)
+                    self._safe_call("release", job_id)
+                    return None
+
+                if self._safe_call("is_cancel_requested", job_id, default=False):
+                    self._terminate(process)
+                    self._safe_call("mark_cancelled", job_id)
+                    return "cancelled"
+
+                if time.monotonic() > deadline:
+                    self._terminate(process)
+                    self._safe_call("fail", job_id, f"Tempo limite de {self.timeout:.0f}s excedido")
+                    return "failed"
+
+                if worker and time.monotonic() >= next_heartbeat:
+                    next_heartbeat = time.monotonic() + JOB_HEARTBEAT_INTERVAL
+                    # Em caso de erro, mantém a posse e tenta de novo no próximo intervalo
+                    if not self._safe_call("heartbeat", job_id, worker, default=True):
+                        # A posse venceu e o job foi devolvido à fila: outro worker o executa
+                        self._terminate(process)
+                        return None
+        finally:
+            self._terminate(process)
+            receiver.close()
+
+    @staticmethod
+    def _terminate(process) -> None:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker da fila de jobs")
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY,
+                        help="Jobs executados simultaneamente")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL,
+                        help="Espera em segundos quando a fila está vazia")
+    parser.add_argument("--timeout", type=float, default=JOB_TIMEOUT,
+                        help="Tempo limite em segundos de cada job")
+    args = parser.parse_args()
+
+    JobWorker(concurrency=args.concurrency, poll_interval=args.poll_interval, timeout=args.timeout).run()
+
+
+if __name__ == "__main__":
+    main()
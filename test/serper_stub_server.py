@@ -0,0 +1,111 @@
+"""
+Servidor local que imita a API Serper para testes e benchmarks.
+Responde a /search e /news com resultados determinísticos, aceita o corpo
+simples (objeto) ou em lote (lista) e conta as requisições recebidas.
+
+Uso:
+    python test/serper_stub_server.py --port 8765 --latency 0.2
+    SERPER_BASE_URL=http://127.0.0.1:8765 python src/main.py ...
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+
+def fake_results(payload: Dict[str, Any], search_type: str = "search") -> Dict[str, Any]:
+    """Gera uma resposta determinística para um payload de busca."""
+    query = payload.get("q", "")
+    slug = "-".join(query.split()) or "empty"
+    items = [
+        {
+            "title": f"{query} - resultado {i}",
+            "link": f"https://example.com/{slug}/{i}",
+            "snippet": f"Resultado {i} para {query}",
+            "position": i,
+        }
+        for i in range(1, int(payload.get("num", 10)) + 1)
+    ]
+    key = "news" if search_type == "news" else "organic"
+    return {"searchParameters": dict(payload, type=search_type), key: items}
+
+
+class SerperStubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        search_type = self.path.strip("/") or "search"
+        if search_type not in ("search", "news"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.record(body)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if isinstance(body, list):
+            response = [fake_results(item, search_type) for item in body]
+        else:
+            response = fake_results(body, search_type)
+
+        data = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SerperStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], latency: float = 0.0):
+        super().__init__(address, SerperStubHandler)
+        self.latency = latency
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def record(self, body: Any) -> None:
+        with self._lock:
+            self.requests.append(body)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(port: int = 0, latency: float = 0.0) -> SerperStubServer:
+    """
+    Inicia o servidor em uma thread daemon.
+
+    Args:
+        port: Porta (0 escolhe uma livre)
+        latency: Atraso artificial por requisição, em segundos
+
+    Returns:
+        SerperStubServer: Servidor em execução (use .base_url e .shutdown())
+    """
+    server = SerperStubServer(("127.0.0.1", port), latency=latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor substituto da API Serper")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = SerperStubServer(("127.0.0.1", args.port), latency=args.latency)
+    print(f"Serper stub em {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
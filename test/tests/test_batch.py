@@ -0,0 +1,69 @@
+import os
+import time
+
+import pytest
+
+from src.batch import BatchRunner, load_matrix
+
+
+def _sleep_job(job):
+    if job["niche"] == "quebrado":
+        raise RuntimeError("falhou")
+    time.sleep(float(job.get("store_timeout", 0.5)))
+    return {"niche": job["niche"]}
+
+
+def _index_path_job(job):
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+    from src.tools.website_index import WebsiteIndex
+
+    time.sleep(0.5)
+    return WebsiteIndex(embedding_function=DefaultEmbeddingFunction(), fetcher=str).path
+
+
+def test_load_matrix_from_yaml_and_csv(tmp_path):
+    yaml_path = tmp_path / "nichos.yaml"
+    yaml_path.write_text(
+        "defaults: {country: Brasil, period: '2024'}\n"
+        "matrix: {niche: [moda, games]}\n"
+        "jobs:\n  - {niche: pets, country: Portugal, review: true}\n  - {niche: Moda}\n"
+    )
+    csv_path = tmp_path / "nichos.csv"
+    csv_path.write_text("country,niche,period,store_timeout\nBrasil,moda,2024,30\n")
+
+    jobs = load_matrix(str(yaml_path))
+
+    # "Moda" duplica "moda" e é descartado
+    assert [job["niche"] for job in jobs] == ["moda", "games", "pets"]
+    assert jobs[2] == {"country": "Portugal", "niche": "pets", "period": "2024", "review": True}
+    assert load_matrix(str(csv_path)) == [{"country": "Brasil", "niche": "moda", "period": "2024", "store_timeout": 30.0}]
+
+    (tmp_path / "ruim.csv").write_text("country,niche\nBrasil,moda\n")
+    with pytest.raises(ValueError):
+        load_matrix(str(tmp_path / "ruim.csv"))
+
+
+def test_batch_runs_jobs_in_parallel_with_timeouts():
+    jobs = [{"country": "Brasil", "niche": f"n{i}", "period": "2024", "store_timeout": 1.0} for i in range(3)]
+    jobs.append({"country": "Brasil", "niche": "lento", "period": "2024", "store_timeout": 30.0})
+    jobs.append({"country": "Brasil", "niche": "quebrado", "period": "2024"})
+
+    report = BatchRunner(concurrency=5, timeout=6, target=_sleep_job).run(jobs)
+
+    assert report["counts"] == {"succeeded": 3, "timeout": 1, "failed": 1}
+    assert report["jobs"][0]["result"] == {"niche": "n0"}
+    assert "falhou" in report["jobs"][4]["error"]
+    # O tempo total acompanha o job mais lento, não a soma
+    assert report["elapsed"] < report["job_seconds"]
+
+
+def test_each_slot_gets_its_own_website_index(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.batch.WEBSITE_INDEX_PATH", str(tmp_path / "index"))
+    jobs = [{"country": "Brasil", "niche": f"n{i}", "period": "2024"} for i in range(2)]
+
+    report = BatchRunner(concurrency=2, timeout=60, target=_index_path_job).run(jobs)
+
+    # O caminho usado pelo WebsiteIndex criado em cada processo filho
+    assert report["counts"] == {"succeeded": 2}
+    assert {outcome["result"] for outcome in report["jobs"]} == {str(tmp_path / "index_slot0"), str(tmp_path / "index_slot1")}
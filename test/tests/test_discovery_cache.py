@@ -0,0 +1,73 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.app.db.session import Base
+from src.app.discovery_cache import cached_call, request_key
+from src.app.models.result_cache import ResultCache
+from src.utils.singleflight import SingleFlight
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[ResultCache.__table__])
+    return sessionmaker(bind=engine)
+
+
+def test_singleflight_runs_once_for_concurrent_callers():
+    flight = SingleFlight()
+    calls = []
+    lock = threading.Lock()
+
+    def slow():
+        with lock:
+            calls.append(1)
+        time.sleep(0.2)
+        return "resultado"
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(lambda _: flight.do("k", slow), range(5)))
+
+    assert len(calls) == 1
+    assert [value for value, _ in results] == ["resultado"] * 5
+    assert sum(shared for _, shared in results) == 4
+
+
+def test_request_key_normalizes_text():
+    assert request_key("run", {"niche": "Pets  ", "country": "Brasil"}) == request_key("run", {"country": "brasil", "niche": "pets"})
+
+
+def test_cached_call_serves_fresh_results(session_factory):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"stores": ["Loja A"]}
+
+    params = {"country": "Brasil", "niche": "pets"}
+    assert cached_call("run", params, compute, session_factory=session_factory) == ({"stores": ["Loja A"]}, "computed")
+    assert cached_call("run", params, compute, session_factory=session_factory) == ({"stores": ["Loja A"]}, "cache")
+    assert cached_call("run", params, compute, force_refresh=True, session_factory=session_factory)[1] == "computed"
+    assert cached_call("run", params, compute, ttl_seconds=0, force_refresh=True, session_factory=session_factory)[1] == "computed"
+    assert cached_call("run", params, compute, session_factory=session_factory)[1] == "computed"
+    assert len(calls) == 4
+
+
+def test_incomplete_results_are_not_cached(session_factory):
+    from src.app.main import _is_complete
+
+    params = {"country": "Brasil", "niche": "pets"}
+    partial = {"products": {"stores": {"A": {"status": "ok"}, "B": {"status": "timeout"}}}, "cancelled": False}
+    complete = {"products": {"stores": {"A": {"status": "ok"}}}, "cancelled": False}
+
+    assert cached_call("run", params, lambda: partial, session_factory=session_factory, cacheable=_is_complete)[1] == "computed"
+    assert cached_call("run", params, lambda: dict(complete, cancelled=True), session_factory=session_factory,
+                       cacheable=_is_complete)[1] == "computed"
+    assert cached_call("run", params, lambda: complete, session_factory=session_factory, cacheable=_is_complete)[1] == "computed"
+    assert cached_call("run", params, lambda: partial, session_factory=session_factory, cacheable=_is_complete) == (complete, "cache")
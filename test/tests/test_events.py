@@ -0,0 +1,61 @@
+import threading
+
+from src.utils import events, metrics
+from src.utils.events import EventBus, format_sse
+
+
+def test_subscriber_gets_history_then_live_events_until_done():
+    bus = EventBus()
+    bus.open("run-1")
+    bus.publish("run-1", "stores_selected", {"stores": ["A", "B"]})
+    stream = bus.subscribe("run-1", keepalive=0.05)
+
+    assert next(stream)["event"] == "stores_selected"
+    # Sem eventos novos, o assinante recebe keep-alives
+    assert next(stream) is None
+
+    threading.Timer(0.05, bus.publish, args=("run-1", "store_inserted", {"store": "A", "inserted": 3})).start()
+    threading.Timer(0.1, bus.publish, args=("run-1", "done", {})).start()
+    remaining = [message["event"] for message in stream if message]
+
+    assert remaining == ["store_inserted", "done"]
+    # Depois do fim, novos eventos são ignorados e a execução é reproduzida do histórico
+    assert bus.publish("run-1", "late") is None
+    assert [m["event"] for m in bus.subscribe("run-1") if m] == ["stores_selected", "store_inserted", "done"]
+
+
+def test_emit_and_cancel_follow_the_current_run(tmp_path):
+    events.bus.open("run-2")
+    with metrics.run_scope("run-2", runs_dir=str(tmp_path)):
+        events.emit("trending_products", products=["berço"])
+        assert not events.cancel_requested()
+        assert events.bus.cancel("run-2")
+        assert events.cancel_requested()
+        events.emit("done")
+    events.emit("outside_run")
+
+    history = [m for m in events.bus.subscribe("run-2") if m]
+    assert [m["event"] for m in history] == ["trending_products", "cancel_requested", "done"]
+    assert not events.bus.cancel("run-2")
+    assert format_sse(history[0]) == f"id: {history[0]['id']}\nevent: trending_products\ndata: {{\"products\": [\"berço\"]}}\n\n"
+
+
+def test_concurrent_opens_start_a_single_run():
+    bus = EventBus()
+    barrier = threading.Barrier(8)
+    opened = []
+
+    def _open():
+        barrier.wait()
+        opened.append(bus.open("run-3"))
+
+    threads = [threading.Thread(target=_open) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(opened) == [False] * 7 + [True]
+    bus.publish("run-3", "done")
+    # Uma execução encerrada pode ser aberta de novo
+    assert bus.open("run-3")
@@ -0,0 +1,134 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.app.db.session import Base
+from src.app.models.job import Job
+from src.app.repositories.job_repository import JobRepository
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[Job.__table__])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_claim_takes_oldest_queued_job_once(db):
+    repository = JobRepository(db)
+    first = repository.enqueue("discover_stores", {"niche": "pets"})
+    repository.enqueue("discover_stores", {"niche": "games"})
+
+    claimed = repository.claim("worker/0")
+    assert claimed.id == first.id
+    assert claimed.status == "running" and claimed.attempts == 1
+
+    assert repository.claim("worker/1").params == {"niche": "games"}
+    assert repository.claim("worker/2") is None
+
+
+def test_cancel_queued_and_running_jobs(db):
+    repository = JobRepository(db)
+    running = repository.enqueue("discover_stores", {})
+    queued = repository.enqueue("discover_stores", {})
+    assert repository.claim("worker/0").id == running.id
+
+    assert repository.request_cancel(queued.id).status == "cancelled"
+    assert repository.claim("worker/1") is None
+
+    job = repository.request_cancel(running.id)
+    assert job.status == "running" and repository.is_cancel_requested(running.id)
+    assert repository.mark_cancelled(running.id).status == "cancelled"
+
+
+def test_final_status_is_not_overwritten(db):
+    repository = JobRepository(db)
+    job = repository.enqueue("discover_stores", {})
+    repository.claim("worker/0")
+
+    repository.complete(job.id, {"raw_output": "ok"})
+    repository.fail(job.id, "tarde demais")
+
+    job = repository.get(job.id)
+    assert job.status == "succeeded" and job.result == {"raw_output": "ok"} and job.error is None
+
+
+def test_identical_requests_share_job_and_result(db):
+    repository = JobRepository(db)
+    params = {"niche": "pets"}
+
+    job, source = repository.enqueue_once("discover_stores", params, "k1", ttl_seconds=60)
+    assert source == "queued"
+    assert repository.enqueue_once("discover_stores", params, "k1", ttl_seconds=60) == (job, "inflight")
+
+    repository.claim("worker/0")
+    repository.complete(job.id, {"raw_output": "ok"})
+    assert repository.enqueue_once("discover_stores", params, "k1", ttl_seconds=60) == (job, "cache")
+
+    refreshed, source = repository.enqueue_once("discover_stores", params, "k1", ttl_seconds=60, force_refresh=True)
+    assert source == "queued" and refreshed.id != job.id
+
+
+def test_expired_lease_is_requeued_then_failed(db, monkeypatch):
+    monkeypatch.setattr("src.app.repositories.job_repository.JOB_MAX_ATTEMPTS", 2)
+    repository = JobRepository(db)
+    job = repository.enqueue("discover_stores", {})
+
+    # Worker morto: a posse vence sem heartbeat e o job volta para a fila
+    assert repository.claim("worker/0", lease_seconds=-1).id == job.id
+    assert not repository.heartbeat(job.id, "worker/1")
+    reclaimed = repository.claim("worker/1")
+    assert reclaimed.id == job.id and reclaimed.attempts == 2
+    assert repository.heartbeat(job.id, "worker/1")
+
+    db.query(Job).filter(Job.id == job.id).update({Job.lease_expires_at: None})
+    db.commit()
+    assert repository.claim("worker/2") is None
+    job = repository.get(job.id)
+    assert job.status == "failed" and "tentativas" in job.error
+
+
+def test_orphaned_job_does_not_block_its_request_key(db, monkeypatch):
+    monkeypatch.setattr("src.app.repositories.job_repository.JOB_MAX_ATTEMPTS", 1)
+    repository = JobRepository(db)
+    params = {"niche": "pets"}
+    job, _ = repository.enqueue_once("discover_stores", params, "k1", ttl_seconds=60)
+    repository.claim("worker/0", lease_seconds=-1)
+
+    assert repository.find_active("k1") is None
+    retried, source = repository.enqueue_once("discover_stores", params, "k1", ttl_seconds=60)
+    assert source == "queued" and retried.id != job.id
+    assert repository.get(job.id).status == "failed"
+
+
+def test_discover_stores_handler_runs_store_discovery(monkeypatch):
+    from src.app import jobs
+
+    calls = []
+    monkeypatch.setattr("src.crews.discover_and_score_stores.find_and_score_stores",
+                        lambda llm, **inputs: calls.append(inputs) or [{"name": "Loja A", "score": 8}])
+
+    result = jobs.discover_stores({"country": "Brasil", "period": "2024", "niche": "pets", "extra": 1})
+
+    assert result == {"stores": [{"name": "Loja A", "score": 8}]}
+    assert calls == [{"country": "Brasil", "period": "2024", "niche": "pets"}]
+
+
+def test_worker_survives_database_errors_while_running_a_job(monkeypatch):
+    from src.worker import JobWorker
+
+    calls = []
+
+    def _broken(self, method, *args):
+        calls.append(method)
+        raise RuntimeError("banco indisponível")
+
+    monkeypatch.setattr(JobWorker, "_repository_call", _broken)
+    worker = JobWorker(concurrency=1, timeout=60)
+
+    # Tipo desconhecido: o processo filho falha e o desfecho não pode ser gravado
+    assert worker.run_job(1, "desconhecido", {}, "w/0") == "failed"
+    assert calls[-1] == "fail"
@@ -0,0 +1,46 @@
+from crewai.llms.base_llm import BaseLLM
+
+from src.utils.llm_cache import CachedLLM
+from src.utils.sqlite_cache import SQLiteCache
+
+
+class FakeLLM(BaseLLM):
+    def __init__(self):
+        super().__init__(model="fake-model")
+        self.calls = 0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        self.calls += 1
+        return f"resposta {self.calls}"
+
+
+def test_cached_llm_replays_normalized_prompt(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=60)
+    llm = CachedLLM(FakeLLM(), cache=cache, bypass=False)
+
+    first = llm.call([{"role": "user", "content": "Top  lojas\nno Brasil"}])
+    second = llm.call([{"role": "user", "content": "Top lojas no Brasil"}])
+
+    assert first == second == "resposta 1"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_cached_llm_bypass_refreshes_entry(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=60)
+    inner = FakeLLM()
+    CachedLLM(inner, cache=cache, bypass=False).call("prompt")
+
+    assert CachedLLM(inner, cache=cache, bypass=True).call("prompt") == "resposta 2"
+    assert CachedLLM(inner, cache=cache, bypass=False).call("prompt") == "resposta 2"
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from src.utils.llm_scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    LLMScheduler,
+    ProviderLimiter,
+    TokenBucket,
+    current_priority,
+    llm_priority,
+)
+
+
+def test_token_bucket_refills_continuously():
+    bucket = TokenBucket(per_minute=600, burst_seconds=1)  # 10/s, capacidade 10
+    now = bucket.updated
+    bucket.consume(10, now)
+    assert bucket.wait_time(5, now) == pytest.approx(0.5)
+    assert bucket.wait_time(5, now + 0.5) == 0.0
+
+
+def test_limiter_smooths_requests_to_rpm():
+    limiter = ProviderLimiter(rpm=600)  # 10/s, rajada de 2 s
+    started = time.monotonic()
+    for _ in range(25):
+        limiter.acquire(1)
+    # 20 cabem na rajada; as 5 restantes esperam ~0,5 s
+    assert 0.4 < time.monotonic() - started < 1.5
+
+
+def test_interactive_calls_jump_the_batch_queue():
+    limiter = ProviderLimiter(rpm=60)  # 1/s, rajada de 2
+    limiter.acquire(1)
+    limiter.acquire(1)
+    order = []
+
+    def _call(name, priority):
+        limiter.acquire(1, priority=priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=_call, args=("batch", PRIORITY_BATCH))]
+    threads[0].start()
+    time.sleep(0.1)
+    threads.append(threading.Thread(target=_call, args=("interactive", PRIORITY_INTERACTIVE)))
+    threads[1].start()
+    time.sleep(0.1)
+    # A chamada em lote estava na frente, mas a interativa sai primeiro
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == ["interactive", "batch"]
+
+
+def test_acquire_times_out():
+    limiter = ProviderLimiter(tpm=60)
+    limiter.acquire(2)
+    with pytest.raises(TimeoutError):
+        limiter.acquire(2, timeout=0.2)
+    assert limiter.snapshot()["queued"] == 0
+
+
+def test_scheduler_limits_by_key_and_backs_off_on_429(monkeypatch):
+    monkeypatch.setenv("LLM_RATE_OTHER_KEY_RPM", "120")
+    scheduler = LLMScheduler({"OPENAI_API_KEY": {"rpm": 600, "tpm": 100000}})
+    assert scheduler.limiter("UNLIMITED") is None
+    assert scheduler.limiter("OTHER_KEY").requests.rate == 2
+    assert scheduler.call("OPENAI_API_KEY", [{"role": "user", "content": "oi"}], lambda: "ok") == "ok"
+
+    class RateLimitError(Exception):
+        status_code = 429
+
+    def _fail():
+        raise RateLimitError("limite")
+
+    with pytest.raises(RateLimitError):
+        scheduler.call("OPENAI_API_KEY", "oi", _fail)
+    assert scheduler.snapshot()["OPENAI_API_KEY"]["paused"] > 0
+
+
+def test_priority_context():
+    assert current_priority() == PRIORITY_BATCH
+    with llm_priority("interactive"):
+        assert current_priority() == PRIORITY_INTERACTIVE
+    assert current_priority() == PRIORITY_BATCH
+
+
+def test_rate_share_splits_limits_between_processes(monkeypatch):
+    monkeypatch.setenv("LLM_RATE_SHARE", "4")
+    scheduler = LLMScheduler({"OPENAI_API_KEY": {"rpm": 600, "tpm": 100000}})
+
+    limiter = scheduler.limiter("OPENAI_API_KEY")
+    assert limiter.requests.rate == 2.5
+    assert limiter.tokens.rate == pytest.approx(100000 / 4 / 60)
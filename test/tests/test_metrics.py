@@ -0,0 +1,55 @@
+import json
+import os
+
+import pytest
+
+from src.utils import metrics
+
+
+def test_run_scope_aggregates_and_persists(tmp_path):
+    runs_dir = str(tmp_path)
+
+    with metrics.run_scope("run-1", runs_dir=runs_dir):
+        metrics.record("llm", "gpt-4o-mini", seconds=2.0, tokens_in=1000, tokens_out=200, cost=0.0003)
+        metrics.record("llm", "gpt-4o-mini", outcome="cache_hit")
+        with metrics.run_scope("run-1", runs_dir=runs_dir):
+            with pytest.raises(ValueError):
+                with metrics.observe("tool", "scrape_store_products"):
+                    raise ValueError("falhou")
+        # O escopo interno não encerra o agregado da execução
+        metrics.record("stage", "scores", seconds=5.0)
+
+    metrics.record("stage", "fora_da_execucao", seconds=1.0)
+    with open(os.path.join(runs_dir, "run-1", metrics.METRICS_FILENAME)) as f:
+        saved = json.load(f)
+
+    assert saved == metrics.load_run_metrics("run-1", runs_dir=runs_dir)
+    assert saved["totals"]["llm_calls"] == 2
+    assert saved["totals"]["llm_cache_hits"] == 1
+    assert saved["totals"]["tokens_in"] == 1000
+    operations = {(op["kind"], op["name"]): op for op in saved["operations"]}
+    assert operations[("tool", "scrape_store_products")]["errors"] == 1
+    assert ("stage", "fora_da_execucao") not in operations
+    # Operações mais demoradas primeiro
+    assert saved["operations"][0]["name"] == "scores"
+
+
+def test_instrument_and_prometheus_exposition():
+    @metrics.instrument("tool", "soma")
+    def soma(a, b):
+        return a + b
+
+    assert soma(1, 2) == 3
+    assert soma.__name__ == "soma"
+
+    latest = metrics.render_latest()
+    if latest is None:
+        pytest.skip("prometheus_client não instalado")
+    body, content_type = latest
+    assert b'affiliate_operations_total{kind="tool",name="soma",outcome="ok"}' in body
+    assert content_type.startswith("text/plain")
+
+
+def test_llm_cost_uses_registry_prices():
+    assert metrics.llm_cost("gpt-4o-mini", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert metrics.llm_cost("modelo-desconhecido", 1000, 1000) == 0
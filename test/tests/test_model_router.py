@@ -0,0 +1,123 @@
+import time
+
+import pytest
+
+from src.utils.llm_registry import LLMRegistry
+from src.utils.model_router import ModelRouter
+
+CONFIG = """
+models:
+  fast:
+    model: fast-model
+    cost_input: 1
+    cost_output: 1
+  slow:
+    model: slow-model
+    cost_input: 0
+    cost_output: 0
+  keyless:
+    model: other-model
+    api_key_env: ROUTER_TEST_MISSING_KEY
+router:
+  min_samples: 2
+  expected_latency: 1
+  hedge_after: 0.05
+routes:
+  research:
+    candidates: [slow, keyless, fast]
+  scoring:
+    candidates: [slow, fast]
+    hedge: true
+"""
+
+
+class FakeLLM:
+    def __init__(self, model, delay=0.0, fail=False):
+        self.model = model
+        self.delay = delay
+        self.fail = fail
+        self.stop = []
+        self.calls = 0
+
+    def call(self, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.model} indisponível")
+        return f"resposta de {self.model}"
+
+    def supports_stop_words(self):
+        return True
+
+
+@pytest.fixture
+def router(tmp_path, monkeypatch):
+    monkeypatch.delenv("ROUTER_TEST_MISSING_KEY", raising=False)
+    path = tmp_path / "llms.yaml"
+    path.write_text(CONFIG, encoding="utf-8")
+    registry = LLMRegistry(str(path))
+    registry._instances = {"slow": FakeLLM("slow-model", delay=0.3), "fast": FakeLLM("fast-model")}
+    return ModelRouter(registry)
+
+
+def test_rank_keeps_configured_order_until_measured(router):
+    assert router.rank("research") == ["slow", "fast"]
+
+    for _ in range(2):
+        router.record("slow", 3.0, ok=True)
+        router.record("fast", 0.2, ok=True)
+
+    assert router.rank("research") == ["fast", "slow"]
+
+
+def test_failing_model_falls_back_and_is_demoted(router):
+    router.registry._instances["slow"].fail = True
+    llm = router.llm("research")
+
+    assert llm.call("oi") == "resposta de fast-model"
+    assert llm.call("oi") == "resposta de fast-model"
+    assert router.stats("slow").error_rate == 1.0
+    assert router.rank("research")[0] == "fast"
+
+
+def test_hedged_call_returns_first_response(router):
+    llm = router.llm("scoring")
+
+    started = time.monotonic()
+    assert llm.call("oi") == "resposta de fast-model"
+    assert time.monotonic() - started < 0.25
+    assert router.registry._instances["slow"].calls == 1
+
+
+
+class StopRecorder(FakeLLM):
+    seen = []
+
+    def call(self, messages, **kwargs):
+        StopRecorder.seen.append(list(self.stop))
+        return "ok"
+
+
+def test_agent_stop_words_do_not_leak_into_shared_model(router):
+    shared = router.registry._instances["fast"] = StopRecorder("fast-model")
+    router.registry._instances["slow"].fail = True
+
+    agent_llm = router.llm("research")
+    agent_llm.stop = ["\nObservation:"]
+
+    assert agent_llm.call("oi") == "ok"
+    assert router.llm("research").call("oi") == "ok"
+    # A chamada do agente vê as stop words; o modelo compartilhado continua sem elas
+    assert StopRecorder.seen == [["\nObservation:"], []]
+    assert shared.stop == []
+
+
+def test_hedge_waits_for_the_slow_tail(router):
+    assert router.hedge_after("slow") == 0.05
+    for latency in [0.01] * 18 + [0.4, 0.5]:
+        router.record("slow", latency, True)
+    # A mediana (0,01 s) dispararia o hedge em metade das chamadas
+    assert router.hedge_after("slow") >= 0.4
+    for _ in range(50):
+        router.record("fast", 0.001, True)
+    assert router.hedge_after("fast") == 0.05
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+import src.crews.product_discovery_crew as pipeline
+from src.crews.product_discovery_crew import ProductDiscoveryCrew
+
+
+def _fake_scrape(store_url, product_names, limit=100, deadline=None):
+    if "quebrada" in store_url:
+        raise RuntimeError("loja fora do ar")
+    time.sleep(0.3)
+    return [{"title": f"{name} {store_url}", "price": 10.0, "image_url": "x.jpg",
+             "product_url": f"{store_url}/p", "category": name} for name in product_names]
+
+
+def test_pipeline_fans_out_and_keeps_partial_results(monkeypatch, tmp_path):
+    monkeypatch.setattr("src.tools.product_spool.SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(pipeline, "insert_affiliate_stores", lambda stores: stores)
+    monkeypatch.setattr(pipeline, "insert_products", lambda products, affiliate_store_name=None: products)
+    monkeypatch.setattr(pipeline, "scrape_products", _fake_scrape)
+    monkeypatch.setattr(ProductDiscoveryCrew, "_find_trending_products", lambda self, inputs: ["berço", "carrinho"])
+
+    stores = [{"name": f"Loja {i}", "url": f"https://loja{i}.com"} for i in range(4)]
+    stores.append({"name": "Loja Quebrada", "url": "https://quebrada.com"})
+
+    started = time.monotonic()
+    result = ProductDiscoveryCrew().run_pipeline({"niche": "bebês"}, stores, max_workers=5, store_timeout=10)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert result["products_inserted"] == {f"Loja {i}": 2 for i in range(4)}
+    assert result["stores"]["Loja Quebrada"]["status"] == "error"
+    assert all(result["stores"][f"Loja {i}"]["status"] == "ok" for i in range(4))
+
+
+
+def test_expired_store_does_not_insert_and_duplicate_names_are_kept(monkeypatch, tmp_path):
+    inserted = []
+    cancel = threading.Event()
+
+    def _scrape_until_expired(store_url, product_names, limit=100, deadline=None):
+        if "lenta" in store_url:
+            cancel.set()  # a execução dá a loja como expirada durante o scraping
+        return _fake_scrape(store_url, product_names)
+
+    monkeypatch.setattr("src.tools.product_spool.SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(pipeline, "insert_affiliate_stores", lambda stores: stores)
+    monkeypatch.setattr(pipeline, "insert_products",
+                        lambda products, affiliate_store_name=None: inserted.append(affiliate_store_name) or products)
+    monkeypatch.setattr(pipeline, "scrape_products", _scrape_until_expired)
+    monkeypatch.setattr(ProductDiscoveryCrew, "_find_trending_products", lambda self, inputs: ["berço"])
+
+    result = ProductDiscoveryCrew._process_store({"name": "Lenta", "url": "https://lenta.com"}, ["berço"], "run-1", 10, cancel=cancel)
+    assert result["status"] == "timeout" and inserted == []
+
+    stores = [{"name": "Loja", "url": "https://loja1.com"}, {"name": "Loja", "url": "https://loja2.com"}]
+    result = ProductDiscoveryCrew().run_pipeline({"niche": "bebês"}, stores, max_workers=2, store_timeout=10)
+    assert result["products_inserted"] == {"Loja": 1, "Loja (https://loja2.com)": 1}
+
+
+def test_stores_with_the_same_name_keep_separate_checkpoints(monkeypatch, tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from src.app.db.session import Base
+    from src.app.models.run_checkpoint import RunCheckpoint
+    from src.utils.run_ledger import RunLedger
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[RunCheckpoint.__table__])
+    session_factory = sessionmaker(bind=engine)
+    inserted = {}
+
+    monkeypatch.setattr("src.tools.product_spool.SPOOL_DIR", str(tmp_path / "spool"))
+    monkeypatch.setattr(pipeline, "insert_products",
+                        lambda products, affiliate_store_name=None: inserted.setdefault(products[0]["product_url"], products))
+    monkeypatch.setattr(pipeline, "scrape_products", _fake_scrape)
+    stores = [{"name": "Loja", "url": "https://loja1.com"}, {"name": "Loja", "url": "https://loja2.com"}]
+    ledger = RunLedger(run_id="r1", runs_dir=str(tmp_path), session_factory=session_factory)
+    for store in stores:
+        ProductDiscoveryCrew._process_store(store, ["berço"], "r1", 10, ledger)
+
+    # Retomada: cada loja lê o próprio checkpoint, sem novo scraping
+    inserted.clear()
+    monkeypatch.setattr(pipeline, "scrape_products", lambda *args, **kwargs: pytest.fail("scraping refeito"))
+    resumed = RunLedger(run_id="r1", runs_dir=str(tmp_path), session_factory=session_factory)
+    for store in stores:
+        ProductDiscoveryCrew._process_store(store, ["berço"], "r1", 10, resumed)
+
+    assert sorted(inserted) == ["https://loja1.com/p", "https://loja2.com/p"]
+    assert len([stage for stage in resumed.completed_stages() if stage.startswith("scraped/Loja/")]) == 2
@@ -0,0 +1,60 @@
+from src.utils.product_prescorer import prescore_products, select_for_scoring
+
+
+def _product(title, price, sale_price=None, image_url="https://example.com/img.jpg", available=True):
+    return {
+        "title": title,
+        "price": price,
+        "sale_price": sale_price,
+        "image_url": image_url,
+        "category": "Brinquedos",
+        "available": available,
+    }
+
+def test_prescore_penalizes_poor_candidates():
+    products = [
+        _product("Carrinho de bebê dobrável compacto", 500.0, sale_price=350.0),
+        _product("Carrinho de bebê dobrável compacto", 480.0, image_url=None),
+        _product("Carrinho de bebê dobrável compacto", 520.0, available=False),
+        _product("KIT", 10.0),
+    ]
+
+    scores = prescore_products(products)
+
+    assert scores[0] == scores.max()
+    assert scores[2] == 0
+    assert scores[1] < scores[0]
+
+def test_select_for_scoring_keeps_top_k_with_prescore():
+    candidates = [
+        _product(f"Mamadeira anticólica modelo {i}", 50.0 + i, sale_price=40.0) for i in range(5)
+    ] + [_product("Mamadeira indisponível", 60.0, available=False)]
+
+    selected, rejected = select_for_scoring(candidates, top_k=3, min_score=0.1)
+
+    assert len(selected) == 3
+    assert len(rejected) == 3
+    assert all("prescore" in p for p in selected + rejected)
+    assert selected[0]["prescore"] >= selected[-1]["prescore"]
+    assert "prescore" not in candidates[0]
+
+
+def test_prescore_is_stored_with_the_product():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from src.app.db.insert_products import insert_products
+    from src.app.db.session import Base
+    from src.app.models.affiliate_store import AffiliateStore
+    from src.app.models.product import Product
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[AffiliateStore.__table__, Product.__table__])
+    db = sessionmaker(bind=engine)()
+
+    selected, _ = select_for_scoring([_product("Boneca de pano artesanal", 80.0, 60.0)])
+    [product] = insert_products(selected, db_session=db)
+
+    assert float(product.prescore) == round(selected[0]["prescore"], 4)
+    db.close()
@@ -0,0 +1,18 @@
+import pytest
+
+from src.tools import product_spool
+
+
+def test_spool_round_trip(products, tmp_path, monkeypatch):
+    monkeypatch.setattr(product_spool, "SPOOL_DIR", str(tmp_path))
+
+    summary = product_spool.spool_products(products, "https://amazon.com.br", run_id="run-1")
+
+    assert summary["handle"] == "run-1/amazon-com-br.ndjson"
+    assert summary["count"] == 1
+    assert summary["categories"] == {"Eletrônicos": 1}
+    assert product_spool.load_spooled_products(summary["handle"]) == products
+
+def test_spool_rejects_invalid_handle():
+    with pytest.raises(ValueError):
+        product_spool.spool_path("../etc/passwd")
@@ -0,0 +1,47 @@
+import json
+
+from src.utils.prompt_packing import TRIM_MARKER, count_tokens, pack_records, project, trim_text, truncate
+
+
+PRODUCTS = [
+    {"title": "Carrinho de bebê", "price": 899.9, "url": "https://loja.com/p/1", "description": "Leve e dobrável " * 40},
+    {"title": "Berço\tportátil", "price": 450.0, "brand": "Kids", "image_url": "https://loja.com/i/2.jpg"},
+]
+
+
+def test_project_drops_unused_fields_and_truncates_text():
+    projected = project(PRODUCTS[0], ["title", "price", "brand"], {"description": 50})
+
+    assert set(projected) == {"title", "price", "description"}
+    assert len(projected["description"]) <= 51 and projected["description"].endswith("…")
+    assert truncate("curto", 50) == "curto"
+
+
+def test_tsv_is_smaller_than_indented_json_and_keeps_titles():
+    tsv = pack_records(PRODUCTS, ["title", "price", "brand"], {"description": 100}, fmt="tsv")
+    rows = tsv.split("\n")
+
+    assert rows[0] == "title\tprice\tbrand\tdescription"
+    assert rows[1].startswith("Carrinho de bebê\t899.9\t\t")
+    assert rows[2].split("\t")[0] == "Berço portátil"
+    assert count_tokens(tsv) < count_tokens(json.dumps(PRODUCTS, indent=2, ensure_ascii=False)) / 2
+
+
+def test_trim_text_respects_budget():
+    text = "\n".join(f"Loja {i}: programa de afiliados com comissão de {i}%" for i in range(300))
+    text += "\n" + "Loja 1: programa de afiliados com comissão de 1%"
+
+    trimmed = trim_text(text, max_tokens=200)
+
+    assert trimmed.startswith("Loja 0:")
+    assert trimmed.endswith(TRIM_MARKER)
+    assert count_tokens(trimmed) <= 200
+    assert trim_text("  a   b \n\n\n c ", max_tokens=200) == "a b\n\nc"
+
+
+def test_trim_text_keeps_attribute_lines_shared_by_different_stores():
+    text = "Loja A\n- Commission: 10%\n- Reliability: High\n\nLoja B\n- Commission: 10%\n- Commission: 10%\n- Reliability: High"
+
+    assert trim_text(text, max_tokens=200) == (
+        "Loja A\n- Commission: 10%\n- Reliability: High\n\nLoja B\n- Commission: 10%\n- Reliability: High"
+    )
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from review_interface.convert import convert_review_file
+from review_interface.export_batch import export_for_review
+from review_interface.import_review import import_review_file
+
+
+def test_export_streams_generator_into_parallel_gzip_batches(tmp_path):
+    products = [{"id": i, "title": f"Produto {i}", "price": 10.0 + i} for i in range(25)]
+    consumed = []
+
+    def _stream():
+        for product in products:
+            consumed.append(product["id"])
+            yield product
+
+    files = export_for_review(_stream(), output_dir=str(tmp_path), batch_name="lote",
+                              max_batch_size=10, compress=True, max_workers=2)
+
+    assert [f.rsplit("/", 1)[-1] for f in files] == ["lote_part1.csv.gz", "lote_part2.csv.gz", "lote_part3.csv.gz"]
+    rows = [row for f in files for row in import_review_file(f)]
+    assert [row["id"] for row in rows] == [str(i) for i in range(25)]
+    assert rows[3]["price"] == 13.0 and rows[3]["approved"] is None
+    # Os produtos do chamador não recebem o campo de aprovação
+    assert all("approved" not in product for product in products)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_export_single_json_batch(tmp_path):
+    files = export_for_review(iter([{"id": 1, "title": "A"}]), format="json", output_dir=str(tmp_path), batch_name="unico")
+
+    assert files == [str(tmp_path / "unico.json")]
+    assert json.loads((tmp_path / "unico.json").read_text()) == [{"id": 1, "title": "A", "approved": None}]
+    assert export_for_review([], output_dir=str(tmp_path)) == []
+
+
+def test_parquet_batches_keep_types_and_push_filters_down(tmp_path):
+    pytest.importorskip("pyarrow")
+    products = [{"id": i, "title": f"P{i}", "price": "12.5", "approved": "sim" if i % 2 else "não"} for i in range(6)]
+
+    [parquet_path] = export_for_review(products, format="parquet", output_dir=str(tmp_path), batch_name="tipado")
+
+    rows = import_review_file(parquet_path)
+    assert rows[1]["id"] == "1" and rows[1]["price"] == 12.5 and rows[1]["approved"] is True
+    assert import_review_file(parquet_path, columns=["id", "approved"], only_approved=True) == [
+        {"id": "1", "approved": True}, {"id": "3", "approved": True}, {"id": "5", "approved": True}
+    ]
+
+    csv_path = convert_review_file(parquet_path)
+    assert csv_path == str(tmp_path / "tipado.csv")
+    back = convert_review_file(csv_path, str(tmp_path / "volta.parquet"))
+    assert import_review_file(back) == rows
+
+
+def test_parquet_keeps_external_ids_and_rejects_invalid_values(tmp_path):
+    pytest.importorskip("pyarrow")
+    products = [{"id": "SKU-1", "rank": "3", "approved": "sim"}, {"id": 2**60 + 1, "rank": 2**60 + 1, "approved": False}]
+
+    [parquet_path] = export_for_review(products, format="parquet", output_dir=str(tmp_path), batch_name="ids")
+
+    rows = import_review_file(parquet_path, columns=["id", "rank", "approved"])
+    assert rows == [{"id": "SKU-1", "rank": 3, "approved": True},
+                    {"id": str(2**60 + 1), "rank": 2**60 + 1, "approved": False}]
+
+    with pytest.raises(ValueError, match="talvez"):
+        export_for_review([{"id": 1, "approved": "talvez"}], format="parquet", output_dir=str(tmp_path), batch_name="ruim")
+    with pytest.raises(ValueError, match="2.5"):
+        export_for_review([{"id": 1, "rank": 2.5}], format="parquet", output_dir=str(tmp_path), batch_name="ruim")
+    assert not list(tmp_path.glob("ruim*"))
@@ -0,0 +1,69 @@
+import os
+
+from review_interface.export_batch import export_batch
+from review_interface.import_review import get_latest_review_batch, import_review_delta
+
+
+def test_import_delta_only_reads_new_or_changed_files(tmp_path):
+    review_dir = str(tmp_path)
+    first = export_batch([{"id": 1, "approved": "sim"}, {"id": 2, "approved": "não"}], output_dir=review_dir, batch_name="a")
+    export_batch([{"id": 3, "approved": "sim"}], format="json", output_dir=review_dir, batch_name="b")
+
+    delta = import_review_delta(review_dir)
+    assert sorted(str(p["id"]) for p in delta["products"]) == ["1", "2", "3"]
+    assert delta["rows"] == 3 and delta["unchanged"] == 0
+
+    # Nada mudou: nenhum arquivo é lido
+    assert import_review_delta(review_dir)["products"] == []
+
+    # mtime alterado sem mudar o conteúdo: o hash evita a releitura
+    os.utime(first, (1, 1))
+    assert import_review_delta(review_dir)["unchanged"] == 2
+
+    # Revisão editada e lote novo entram no delta
+    export_batch([{"id": 1, "approved": "não"}, {"id": 2, "approved": "sim"}], output_dir=review_dir, batch_name="a")
+    export_batch([{"id": 4, "approved": "sim"}], output_dir=review_dir, batch_name="c")
+    delta = import_review_delta(review_dir, only_approved=True)
+    assert sorted(p["id"] for p in delta["products"]) == ["2", "4"]
+    assert delta["unchanged"] == 1
+    assert get_latest_review_batch(review_dir) == os.path.join(review_dir, "c.csv")
+
+
+def test_failed_and_approved_only_imports_are_read_again(tmp_path, monkeypatch):
+    import review_interface.import_review as importer
+
+    review_dir = str(tmp_path)
+    export_batch([{"id": 1, "approved": "sim"}, {"id": 2, "approved": "não"}], output_dir=review_dir, batch_name="a")
+
+    # Erro transitório: o arquivo volta na próxima importação mesmo sem mudar
+    def broken(*args, **kwargs):
+        raise OSError("disco indisponível")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(importer, "iter_review_file", broken)
+        assert list(import_review_delta(review_dir)["failed"]) == [os.path.join(review_dir, "a.csv")]
+
+    assert [p["id"] for p in import_review_delta(review_dir, only_approved=True)["products"]] == ["1"]
+    # Uma importação completa ainda entrega as linhas não aprovadas do mesmo arquivo
+    assert [p["id"] for p in import_review_delta(review_dir)["products"]] == ["1", "2"]
+    assert import_review_delta(review_dir, only_approved=True)["products"] == []
+    assert import_review_delta(review_dir)["products"] == []
+
+
+def test_json_batches_stream_and_failed_files_yield_nothing(tmp_path, monkeypatch):
+    import review_interface.import_review as importer
+
+    monkeypatch.setattr(importer, "JSON_READ_SIZE", 7)
+    products = [{"id": i, "title": f"Produto [{i}], \"novo\"", "approved": i % 2 == 0} for i in range(5)]
+    export_batch(products, format="json", output_dir=str(tmp_path), batch_name="lote")
+    path = tmp_path / "lote.json"
+    assert [p["id"] for p in importer.import_review_file(str(path), only_approved=True)] == [0, 2, 4]
+
+    # Lote truncado no meio: nenhuma linha é entregue antes da falha
+    complete = path.read_text(encoding="utf-8")
+    path.write_text(complete[:len(complete) // 2], encoding="utf-8")
+    result = import_review_delta(str(tmp_path))
+    assert result["products"] == [] and list(result["failed"]) == [str(path)]
+
+    path.write_text(complete, encoding="utf-8")
+    assert [p["id"] for p in import_review_delta(str(tmp_path))["products"]] == [0, 1, 2, 3, 4]
@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.app.db.session import Base
+from src.app.models.run_checkpoint import RunCheckpoint
+from src.utils.run_ledger import RunLedger, input_hash
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[RunCheckpoint.__table__])
+    return sessionmaker(bind=engine)
+
+
+def _ledger(tmp_path, session_factory, **kwargs):
+    return RunLedger(runs_dir=str(tmp_path), session_factory=session_factory, **kwargs)
+
+
+def test_resumed_run_skips_completed_stages(tmp_path, session_factory):
+    ledger = _ledger(tmp_path, session_factory, run_id="run1")
+    ledger.stage("stores", {"niche": "bebês"}, lambda: [{"name": "Loja A"}])
+
+    resumed = _ledger(tmp_path, session_factory, run_id="run1", reuse=False)
+    stores = resumed.stage("stores", {"niche": "bebês"}, lambda: pytest.fail("etapa refeita"))
+
+    assert stores == [{"name": "Loja A"}]
+    assert resumed.completed_stages() == ["stores"]
+
+
+def test_identical_inputs_reuse_fresh_checkpoints(tmp_path, session_factory):
+    _ledger(tmp_path, session_factory, run_id="run1").save("trending_products", {"niche": "pets"}, ["ração"])
+
+    other = _ledger(tmp_path, session_factory, run_id="run2")
+    assert other.load("trending_products", {"niche": "pets"}) == ["ração"]
+    assert other.load("trending_products", {"niche": "games"}) is None
+    assert [path.name.startswith("trending_products-") for path in (tmp_path / "run2").iterdir()] == [True]
+    assert other.completed_stages() == ["trending_products"]
+
+    isolated = _ledger(tmp_path, session_factory, run_id="run3", reuse=False)
+    assert isolated.load("trending_products", {"niche": "pets"}) is None
+
+
+def test_changed_inputs_recompute_stage(tmp_path, session_factory):
+    ledger = _ledger(tmp_path, session_factory, run_id="run1", reuse=False)
+    ledger.stage("scraped/Loja A", {"product_names": ["a"]}, lambda: [1])
+
+    assert ledger.stage("scraped/Loja A", {"product_names": ["b"]}, lambda: [2]) == [2]
+    assert ledger.load("scraped/Loja A", {"product_names": ["b"]}) == [2]
+
+
+def test_similar_stage_names_do_not_share_artifacts(tmp_path, session_factory):
+    ledger = _ledger(tmp_path, session_factory, run_id="run1", reuse=False)
+    ledger.save("scraped/Loja A", {}, ["a"])
+    ledger.save("scraped/Loja_A", {}, ["b"])
+
+    assert ledger.load("scraped/Loja A", {}) == ["a"]
+    assert ledger.load("scraped/Loja_A", {}) == ["b"]
+
+
+def test_replaced_checkpoints_stay_fresh(tmp_path, session_factory):
+    from datetime import datetime, timedelta, timezone
+
+    from src.app.repositories.run_checkpoint_repository import \
+        RunCheckpointRepository
+
+    ledger = _ledger(tmp_path, session_factory, run_id="run1")
+    ledger.save("trending_products", {"niche": "pets"}, ["ração"])
+    db = session_factory()
+    db.query(RunCheckpoint).update({"created_at": datetime(2000, 1, 1), "updated_at": None})
+    db.commit()
+    since = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert RunCheckpointRepository(db).find_fresh("trending_products", input_hash({"niche": "pets"}), since) is None
+
+    # Substituído agora: volta a ser reaproveitável por outras execuções
+    ledger.save("trending_products", {"niche": "pets"}, ["ração"])
+    assert _ledger(tmp_path, session_factory, run_id="run2").load("trending_products", {"niche": "pets"}) == ["ração"]
+    db.close()
+
+
+@pytest.mark.parametrize("run_id", ["../../escaped", "a/b", "..", "", "run id", "x" * 65])
+def test_invalid_run_ids_are_rejected(tmp_path, session_factory, run_id):
+    from src.utils import metrics
+
+    if run_id:
+        with pytest.raises(ValueError):
+            _ledger(tmp_path / "runs", session_factory, run_id=run_id)
+    with pytest.raises(ValueError):
+        metrics.load_run_metrics(run_id, runs_dir=str(tmp_path / "runs"))
+    assert not (tmp_path / "escaped").exists()
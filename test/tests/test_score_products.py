@@ -0,0 +1,19 @@
+from src.crews.score_products import DESCRIPTION_MAX_CHARS, PROMPT_FIELDS, _merge_scored_chunks
+from src.utils.prompt_packing import chunk_records
+
+
+def test_chunk_products_respects_token_budget():
+    products = [{"title": f"Produto {i}", "description": "x" * 400, "price": 10.0} for i in range(30)]
+
+    chunks = chunk_records(products, 1000, PROMPT_FIELDS, {"description": DESCRIPTION_MAX_CHARS})
+
+    assert len(chunks) > 1
+    assert [p for chunk in chunks for p in chunk] == products
+
+def test_merge_scored_chunks_ranks_globally():
+    merged = _merge_scored_chunks([
+        [{"title": "A", "score": 7.0, "rank": 1}],
+        [{"title": "B", "score": 9.0, "rank": 1}, {"title": "C", "score": 8.0, "rank": 2}],
+    ])
+
+    assert [(p["title"], p["rank"]) for p in merged] == [("B", 1), ("C", 2), ("A", 3)]
@@ -0,0 +1,67 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serper_stub_server import start_stub_server
+from src.tools.serper_client import SerperClient
+from src.utils.sqlite_cache import SQLiteCache
+
+
+@pytest.fixture
+def stub():
+    server = start_stub_server(latency=0.1)
+    yield server
+    server.shutdown()
+
+
+def _client(stub, tmp_path, batch_window=0.05):
+    cache = SQLiteCache(str(tmp_path / "serper.sqlite3"), ttl_seconds=60)
+    return SerperClient(api_key="test", base_url=stub.base_url, cache=cache, batch_window=batch_window)
+
+
+def test_normalized_queries_hit_cache(stub, tmp_path):
+    client = _client(stub, tmp_path, batch_window=0)
+
+    first = client.search("Lojas  de Eletrônicos", num=5, gl="BR")
+    second = client.search("lojas de eletrônicos", num=5, gl="br")
+
+    assert first == second
+    assert len(first["organic"]) == 5
+    assert len(stub.requests) == 1
+
+
+def test_concurrent_duplicates_share_one_request(stub, tmp_path):
+    client = _client(stub, tmp_path)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: client.search("fone bluetooth"), range(8)))
+
+    assert all(result == results[0] for result in results)
+    assert len(stub.requests) == 1
+
+
+def test_pending_queries_are_batched(stub, tmp_path):
+    client = _client(stub, tmp_path)
+    queries = [f"produto {i}" for i in range(5)]
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(client.search, queries))
+
+    assert [r["searchParameters"]["q"] for r in results] == queries
+    assert len(stub.requests) == 1
+    assert isinstance(stub.requests[0], list) and len(stub.requests[0]) == 5
+
+
+def test_search_many_skips_cached(stub, tmp_path):
+    client = _client(stub, tmp_path)
+    client.search("tenis corrida")
+
+    results = client.search_many([{"query": "tenis corrida"}, {"query": "relogio smart", "num": 3}])
+
+    assert len(results[1]["organic"]) == 3
+    assert len(stub.requests) == 2
+    assert stub.requests[1] == {"q": "relogio smart", "num": 3}
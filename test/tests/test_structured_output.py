@@ -0,0 +1,34 @@
+import pytest
+
+from src.app.schemas.crew_outputs import ProductCuration, StoreSelection
+from src.crews.structured_output import parse_structured_output
+
+
+class RepairLLM:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    def call(self, messages):
+        self.calls += 1
+        return self.answer
+
+
+def test_parse_fenced_list():
+    text = 'Seguem as lojas:\n```json\n[{"name": "Amazon", "url": "https://amazon.com.br"}]\n```'
+
+    selection = parse_structured_output(text, StoreSelection)
+
+    assert selection.stores[0].name == "Amazon"
+
+def test_parse_repairs_malformed_answer_once():
+    llm = RepairLLM('{"products": [{"rank": 1, "product_name": "Mamadeira", "score": 8.5}]}')
+
+    curation = parse_structured_output("1. Mamadeira - score 8.5", ProductCuration, llm=llm)
+
+    assert llm.calls == 1
+    assert curation.products[0].score == 8.5
+
+def test_parse_raises_when_repair_fails():
+    with pytest.raises(ValueError):
+        parse_structured_output("sem json", ProductCuration, llm=RepairLLM("ainda sem json"))
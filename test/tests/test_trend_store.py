@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.app.db.session import Base
+from src.app.models.trend import TrendEntry
+from src.app.trend_store import load_warmup_targets, trending_products
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[TrendEntry.__table__])
+    return sessionmaker(bind=engine)
+
+
+def test_analyst_runs_only_when_entry_is_missing_or_stale(session_factory):
+    calls = []
+
+    def analyst():
+        calls.append(1)
+        return ["Carrinho", "Berço"]
+
+    first = trending_products("Brasil", "Produtos Infantis", "2024", analyst, session_factory=session_factory)
+    # Mesma chave com variações de caixa e espaço
+    second = trending_products("brasil", " produtos  infantis", "2024", analyst, session_factory=session_factory)
+
+    assert first == (["Carrinho", "Berço"], "computed")
+    assert second == (["Carrinho", "Berço"], "store")
+    assert len(calls) == 1
+
+    db = session_factory()
+    entry = db.query(TrendEntry).one()
+    assert entry.hits == 1
+    entry.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+    db.close()
+
+    assert trending_products("Brasil", "produtos infantis", "2024", analyst, session_factory=session_factory)[1] == "computed"
+    assert len(calls) == 2
+
+
+def test_stale_entry_is_used_when_refresh_fails(session_factory):
+    trending_products("Brasil", "moda", "2024", lambda: ["Vestido"], ttl_seconds=-1, session_factory=session_factory)
+
+    def failing():
+        raise RuntimeError("busca indisponível")
+
+    assert trending_products("Brasil", "moda", "2024", failing, session_factory=session_factory) == (["Vestido"], "stale")
+    with pytest.raises(RuntimeError):
+        trending_products("Brasil", "beleza", "2024", failing, session_factory=session_factory)
+
+
+def test_load_warmup_targets(tmp_path):
+    path = tmp_path / "warmup.yaml"
+    path.write_text("country: Brasil\nperiod: '2024'\nniches:\n  - moda\n  - {niche: games, country: Portugal}\n")
+
+    assert load_warmup_targets(str(path)) == [
+        {"country": "Brasil", "niche": "moda", "period": "2024"},
+        {"country": "Portugal", "niche": "games", "period": "2024"},
+    ]
+
+
+def test_crew_mode_stores_trending_products_for_later_runs(session_factory, monkeypatch):
+    import src.crews.product_discovery_crew as discovery
+    from src.app import trend_store
+
+    crews = []
+
+    class FakeCrew:
+        def __init__(self, agents, tasks, **kwargs):
+            crews.append([task.description for task in tasks])
+
+        def kickoff(self, inputs):
+            return "ok"
+
+    store = trend_store.trending_products
+    monkeypatch.setattr(trend_store, "trending_products",
+                        lambda *args, **kwargs: store(*args, session_factory=session_factory, **kwargs))
+    monkeypatch.setattr(discovery, "Crew", FakeCrew)
+    monkeypatch.setattr(discovery.ProductDiscoveryCrew, "_find_trending_products",
+                        lambda self, inputs: crews.append("analyst") or ["Carrinho"])
+
+    inputs = {"country": "Brasil", "niche": "bebês", "period": "2024"}
+    discovery.ProductDiscoveryCrew().run_full_discovery(inputs)
+    discovery.ProductDiscoveryCrew().run_full_discovery(inputs)
+
+    # O analista roda só na primeira execução; a crew completa nunca inclui a tarefa dele
+    assert crews.count("analyst") == 1
+    assert all(not any("Analyze recent trends" in d for d in c) for c in crews if c != "analyst")
@@ -0,0 +1,85 @@
+import hashlib
+
+from chromadb.api.types import EmbeddingFunction
+
+from src.tools.website_index import WebsiteIndex, canonical_url
+
+
+class HashEmbedding(EmbeddingFunction):
+    def __init__(self):
+        self.embedded = 0
+
+    def __call__(self, input):
+        self.embedded += len(input)
+        vectors = []
+        for text in input:
+            digest = hashlib.sha256(text.encode("utf-8")).digest()
+            vectors.append([b / 255 for b in digest[:16]])
+        return vectors
+
+    @staticmethod
+    def name():
+        return "hash-test"
+
+    def get_config(self):
+        return {}
+
+
+class Pages:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetches = []
+
+    def __call__(self, url):
+        self.fetches.append(url)
+        return self.pages[url]
+
+
+def _index(tmp_path, fetcher, **kwargs):
+    return WebsiteIndex(path=str(tmp_path / "index"), embedding_function=HashEmbedding(), fetcher=fetcher, **kwargs)
+
+
+def test_canonical_url():
+    assert canonical_url("HTTPS://Loja.com:443/afiliados/?utm_source=x&b=2&a=1#top") == "https://loja.com/afiliados?a=1&b=2"
+    assert canonical_url("loja.com") == "https://loja.com/"
+    assert canonical_url("https://loja.com/p?reference=ABC&refine=cor&ref=home&fbclid=x") == "https://loja.com/p?reference=ABC&refine=cor"
+
+
+def test_fresh_pages_are_not_refetched(tmp_path):
+    fetcher = Pages({"https://loja.com/afiliados/": "Programa de afiliados com comissão de 10%"})
+    index = _index(tmp_path, fetcher)
+
+    index.query("comissão", url="https://loja.com/afiliados/")
+    hits = index.query("comissão", url="https://LOJA.com/afiliados?utm_medium=ads")
+
+    # O download usa a URL pedida; a forma canônica é só a chave do índice
+    assert fetcher.fetches == ["https://loja.com/afiliados/"]
+    assert hits[0]["url"] == "https://loja.com/afiliados"
+
+
+def test_unchanged_content_is_not_reembedded(tmp_path):
+    fetcher = Pages({"https://loja.com/afiliados": "Comissão de 10%"})
+    index = _index(tmp_path, fetcher, max_age=0)
+    index.ensure("https://loja.com/afiliados")
+    index.ensure("https://loja.com/afiliados")
+    assert index.embedding_function.embedded == 1
+
+    fetcher.pages["https://loja.com/afiliados"] = "Comissão de 15%"
+    index.ensure("https://loja.com/afiliados")
+
+    collection = index._collection(index.collection_name("https://loja.com/afiliados"))
+    assert len(fetcher.fetches) == 3
+    assert index.embedding_function.embedded == 2
+    assert collection.get()["documents"] == ["Comissão de 15%"]
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    pages = {f"https://loja{i}.com/": f"Página da loja {i}" for i in range(3)}
+    index = _index(tmp_path, Pages(pages), max_chunks=2)
+
+    for url in pages:
+        index.ensure(url)
+
+    assert index.stats()["pages"] == 2
+    names = {c.name for c in index.client.list_collections()}
+    assert "site_loja0_com" not in names